@@ -4,13 +4,21 @@ Claude plays ADVENT and commentates in real-time.
 
 Claude sees the terminal, decides what command to type, executes it,
 and provides snarky commentary about what's happening.
+
+By default it plays the console session (input_server.py). With
+?line=<n> on /next and /screen it plays DZ line n instead, through the
+session broker's /lines/<n>/screen and /lines/<n>/send; each line has a
+game (and conversation) of its own.
 """
 
-import http.server
+import asyncio
 import json
 import os
+import re
 import subprocess
+import tempfile
 import time
+import urllib.request
 
 try:
     import anthropic
@@ -21,14 +29,33 @@ except ImportError:
 
 PORT = 8084
 API_KEY_FILE = "/opt/advent/.env"
+SCREEN_URL = "http://127.0.0.1:8083/screen"  # input_server.py's VT100 model
+SEND_URL = "http://127.0.0.1:8083/send"      # input_server.py's InputQueue
+LINE_URL = "http://127.0.0.1:8085/lines/{line}"  # session_broker.py, per DZ line
+DZ_LINES = 8                                     # session_broker.py's slots
+
+# Anthropic API; ANTHROPIC_BASE_URL can point it at a local stub for testing
+API_BASE_URL = os.environ.get("ANTHROPIC_BASE_URL") or None
+API_TIMEOUT = 20  # Seconds
+MODEL = "claude-sonnet-4-20250514"
 
 # Rate limiting
-last_action_time = 0
 MIN_INTERVAL = 3  # Seconds between actions
 
-# Conversation history to avoid repetition
-conversation_history = []
-MAX_HISTORY = 10  # Remember last 10 exchanges
+# Pipelining: the next move is decided while the client shows the last one
+SETTLE_TIME = 0.5  # Seconds for a command's output to reach the screen
+STALE_AFTER = 30   # Seconds before a prepared move is thrown away unused
+
+# Conversation history. The latest RECENT_TURNS exchanges are sent in
+# full; older ones are folded, COMPACT_EVERY at a time, into one-line
+# summaries. Between folds the history only grows at the end, so the
+# prompt cache covers everything but the newest screen.
+RECENT_TURNS = 4
+COMPACT_EVERY = 4
+MAX_SUMMARIES = 30
+GIST_LENGTH = 80      # Characters of screen kept per summary
+CHARS_PER_TOKEN = 4   # Rough estimate, for reporting compaction savings
+CACHED = {"type": "ephemeral"}
 
 SYSTEM_PROMPT = """You are playing ADVENT, a 1986-87 text MUD created by schoolboys at Manchester Grammar School, now running on emulated PDP-11 hardware.
 
@@ -97,9 +124,9 @@ Examples of good commentary:
 If the screen shows an error or you're stuck, try ROOM 2 to reset to start."""
 
 def load_api_key():
-    """Load API key from .env file."""
+    """Load API key from .env file (or the environment, for testing)."""
     if not os.path.exists(API_KEY_FILE):
-        return None
+        return os.environ.get('ANTHROPIC_API_KEY')
 
     with open(API_KEY_FILE, 'r') as f:
         for line in f:
@@ -113,176 +140,411 @@ def load_api_key():
                 return key
     return None
 
-def capture_screen():
-    """Capture current screen session content."""
+def capture_screen(line=None):
+    """Capture current screen session content.
+
+    The input server keeps the screen in memory when the session runs
+    through its relay; otherwise fall back to a screen hardcopy. A DZ
+    line's screen comes from the session broker, and is None while no
+    one is connected to the line.
+    """
+    url = SCREEN_URL if line is None else LINE_URL.format(line=line) + '/screen'
     try:
-        result = subprocess.run(
-            ['screen', '-S', 'advent', '-X', 'hardcopy', '/tmp/screen_capture.txt'],
+        with urllib.request.urlopen(url, timeout=2) as response:
+            content = json.load(response).get('screen')
+        if content is not None or line is not None:
+            return content
+    except Exception:
+        if line is not None:
+            return None
+
+    return capture_hardcopy()
+
+def capture_hardcopy():
+    """Capture the screen session with `screen -X hardcopy`."""
+    # A file per call, so overlapping requests don't read each other's copy
+    fd, path = tempfile.mkstemp(prefix='screen_capture_', suffix='.txt')
+    os.close(fd)
+    try:
+        subprocess.run(
+            ['screen', '-S', 'advent', '-X', 'hardcopy', path],
             capture_output=True,
             timeout=2
         )
 
-        if os.path.exists('/tmp/screen_capture.txt'):
-            with open('/tmp/screen_capture.txt', 'r', errors='replace') as f:
-                content = f.read()
-            os.remove('/tmp/screen_capture.txt')
-            return content.strip()
+        with open(path, 'r', errors='replace') as f:
+            content = f.read()
+        return content.strip() or None
     except Exception as e:
         print(f"Screen capture error: {e}")
+    finally:
+        os.remove(path)
 
     return None
 
-def send_command(command):
-    """Send a command to the game via screen."""
+def send_command(command, line=None):
+    """Send a command to the game through the input server's queue.
+
+    It is typed in order with any other input (and goes through the relay
+    rather than a `screen -X stuff` per command). A DZ line's command goes
+    to that line's queue in the session broker.
+    """
+    url = SEND_URL if line is None else LINE_URL.format(line=line) + '/send'
     try:
         # Send the command followed by Enter
-        subprocess.run(
-            ['screen', '-S', 'advent', '-X', 'stuff', command + '\r'],
-            check=True,
-            timeout=5
-        )
-        return True
+        request = urllib.request.Request(
+            url, data=(command + '\r').encode('utf-8'), method='POST')
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return json.load(response).get('ok', False)
     except Exception as e:
         print(f"Send command error: {e}")
         return False
 
-def get_next_action(screen_content, api_key):
-    """Ask Claude what to do next and get commentary."""
-    global last_action_time, conversation_history
-
-    if not HAS_ANTHROPIC or not api_key:
-        return None, None
-
-    # Rate limit
-    now = time.time()
-    if now - last_action_time < MIN_INTERVAL:
-        return None, None
-
-    try:
-        client = anthropic.Anthropic(api_key=api_key)
-
-        # Add new user message with current screen
-        user_message = f"Current screen:\n\n{screen_content}\n\nWhat's your next move?"
-
-        # Build messages list with history
-        messages = conversation_history.copy()
-        messages.append({"role": "user", "content": user_message})
-
-        message = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=200,
-            system=SYSTEM_PROMPT,
-            messages=messages
-        )
-
-        response = message.content[0].text.strip()
-        last_action_time = now
-
-        # Parse JSON response
-        # Handle potential markdown code blocks
-        if response.startswith('```'):
-            lines = response.split('\n')
-            response = '\n'.join(lines[1:-1])
-
-        data = json.loads(response)
-        command = data.get('command')
-        commentary = data.get('commentary')
-
-        # Add this exchange to history
-        conversation_history.append({"role": "user", "content": user_message})
-        conversation_history.append({"role": "assistant", "content": response})
-
-        # Trim history to avoid token limits
-        if len(conversation_history) > MAX_HISTORY * 2:
-            conversation_history = conversation_history[-(MAX_HISTORY * 2):]
-
-        return command, commentary
-
-    except json.JSONDecodeError as e:
-        print(f"JSON parse error: {e}, response was: {response[:200]}")
-        return None, None
-    except Exception as e:
-        print(f"Claude API error: {e}")
-        return None, None
-
-class GameHandler(http.server.BaseHTTPRequestHandler):
-    api_key = None
-
-    def log_message(self, format, *args):
-        pass
-
-    def send_cors_headers(self):
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-
-    def do_OPTIONS(self):
-        self.send_response(200)
-        self.send_cors_headers()
-        self.end_headers()
-
-    def do_GET(self):
-        if self.path == '/next':
+def screen_gist(screen_content):
+    """The last few non-blank lines of a screen, squeezed onto one line."""
+    lines = [line.strip() for line in screen_content.splitlines() if line.strip()]
+    gist = ' / '.join(lines[-3:])
+    return gist if len(gist) <= GIST_LENGTH else gist[:GIST_LENGTH - 3] + '...'
+
+class Commentator:
+    """Claude's side of the demo, shared by every /next request.
+
+    The API client is created once, so its connection pool (and the TLS
+    session to the API) is reused from turn to turn.
+
+    Turns run as a two-stage pipeline. A background task reads the screen
+    and asks Claude for the next move as soon as the previous command has
+    been typed, and leaves the result in a one-slot queue. /next takes the
+    prepared move, types its command and returns it, so the next decision
+    is being made while the client speaks this turn's commentary. As the
+    queue holds one move, nothing is decided ahead while nobody asks.
+
+    `line` is the DZ line played, or None for the console session.
+    """
+
+    def __init__(self, api_key, line=None):
+        self.api_key = api_key
+        self.line = line
+        self.client = None
+        if HAS_ANTHROPIC and api_key:
+            self.client = anthropic.AsyncAnthropic(
+                api_key=api_key, base_url=API_BASE_URL, timeout=API_TIMEOUT)
+        self.turns = []      # Recent exchanges: {screen, command, user, assistant}
+        self.summaries = []  # (summary line, characters of the exchange it replaces)
+        self.last_action_time = 0
+        self.turn = None     # Task for the turn in progress
+        self.pipeline = None  # Background task deciding the next move
+        self.prepared = asyncio.Queue(1)  # (time ready, result)
+        self.executed = asyncio.Event()   # Set once a move has been typed
+        self.executed.set()
+        self.last_tokens = None
+        self.totals = {"turns": 0, "input": 0, "cache_read": 0,
+                       "cache_write": 0, "saved": 0}
+
+    async def next_turn(self):
+        """Play one turn; requests arriving meanwhile share its result."""
+        if self.pipeline is None or self.pipeline.done():
+            # First turn, or the decide stage died (see _play_turn)
+            self.executed.set()
+            self.pipeline = asyncio.create_task(self._prepare_moves())
+        if self.turn is None or self.turn.done():
+            self.turn = asyncio.create_task(self._play_turn())
+        return await asyncio.shield(self.turn)
+
+    async def _prepare_moves(self):
+        """Decide stage: runs in the background for the server's lifetime."""
+        while True:
+            await self.executed.wait()
+            self.executed.clear()
+            await asyncio.sleep(SETTLE_TIME)  # Let the last command's output arrive
+
+            # Rate limit
+            wait = self.last_action_time + MIN_INTERVAL - time.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            started = time.monotonic()
+            result = await self._decide()
+            result["decide_ms"] = round((time.monotonic() - started) * 1000)
+            await self.prepared.put((time.monotonic(), result))
+
+    async def _decide(self):
+        self.last_tokens = None
+        screen_content = await asyncio.to_thread(capture_screen, self.line)
+
+        if not screen_content:
+            return {"error": "no_screen"}
+
+        if not self.api_key:
+            return {"error": "no_api_key"}
+
+        command, commentary = await self.get_next_action(screen_content)
+
+        return {
+            "command": command,
+            "commentary": commentary,
+            "screen": screen_content[:500],
+            "tokens": self.last_tokens
+        }
+
+    async def _play_turn(self):
+        """Execute stage: hand out the prepared move and type its command.
+
+        If the decide stage dies instead of delivering, its error is the
+        result, and the next /next starts a new one.
+        """
+        while True:
+            getter = asyncio.ensure_future(self.prepared.get())
+            await asyncio.wait({getter, self.pipeline},
+                               return_when=asyncio.FIRST_COMPLETED)
+            if not getter.done():
+                getter.cancel()
+                error = (self.pipeline.exception()
+                         if not self.pipeline.cancelled() else None)
+                print(f"Decide stage stopped: {error!r}")
+                return {"error": "pipeline_failed", "detail": str(error)}
+            ready, result = getter.result()
+            if time.monotonic() - ready <= STALE_AFTER:
+                break
+            # The game has probably moved on since; decide again
+            self.executed.set()
+
+        if result.get("command"):
+            # Execute the command
+            await asyncio.to_thread(send_command, result["command"], self.line)
+        result["ready_ms"] = round((time.monotonic() - ready) * 1000)
+        self.executed.set()
+        return result
+
+    def _messages(self, user_message):
+        """History plus the new screen, with cache breakpoints."""
+        messages = []
+        if self.summaries:
+            lines = '\n'.join(line for line, _ in self.summaries)
+            messages.append({"role": "user",
+                             "content": f"Earlier in this demo (oldest first):\n{lines}"})
+            messages.append({"role": "assistant",
+                             "content": "Noted. I'll head somewhere new."})
+        for turn in self.turns:
+            messages.append({"role": "user", "content": turn["user"]})
+            messages.append({"role": "assistant", "content": turn["assistant"]})
+        # The next turn resends all of this unchanged, so cache up to here
+        messages.append({"role": "user", "content": [
+            {"type": "text", "text": user_message, "cache_control": CACHED}]})
+        return messages
+
+    def _compact(self):
+        """Fold the oldest full exchanges into summary lines."""
+        if len(self.turns) < RECENT_TURNS + COMPACT_EVERY:
+            return
+        for turn, following in zip(self.turns[:COMPACT_EVERY],
+                                   self.turns[1:COMPACT_EVERY + 1]):
+            line = (f"At: {screen_gist(turn['screen'])} | Typed: {turn['command']}"
+                    f" | Then: {screen_gist(following['screen'])}")
+            self.summaries.append(
+                (line, len(turn["user"]) + len(turn["assistant"])))
+        del self.turns[:COMPACT_EVERY]
+        del self.summaries[:-MAX_SUMMARIES]
+
+    def _record_usage(self, usage, latency):
+        """Note one call's token counts; returns them for /next."""
+        cache_read = getattr(usage, "cache_read_input_tokens", 0) or 0
+        cache_write = getattr(usage, "cache_creation_input_tokens", 0) or 0
+        # Exchanges that are only sent as summaries now
+        compacted = sum(chars - len(line)
+                        for line, chars in self.summaries) // CHARS_PER_TOKEN
+        tokens = {
+            "input": usage.input_tokens + cache_read + cache_write,
+            "uncached": usage.input_tokens,
+            "cache_read": cache_read,
+            "cache_write": cache_write,
+            "compacted": max(compacted, 0),
+            "saved": cache_read + max(compacted, 0),
+            "latency_ms": round(latency * 1000),
+        }
+        self.totals["turns"] += 1
+        for key in ("input", "cache_read", "cache_write", "saved"):
+            self.totals[key] += tokens[key]
+        print(f"Turn {self.totals['turns']}: {tokens['input']} input tokens, "
+              f"{cache_read} from cache, ~{tokens['compacted']} compacted away, "
+              f"{tokens['latency_ms']} ms")
+        return tokens
+
+    async def get_next_action(self, screen_content):
+        """Ask Claude what to do next and get commentary."""
+        if self.client is None:
+            return None, None
+
+        now = time.time()
+        response = ''
+        try:
+            # Add new user message with current screen
+            user_message = f"Current screen:\n\n{screen_content}\n\nWhat's your next move?"
+
+            # Build messages list with history
+            messages = self._messages(user_message)
+
+            started = time.monotonic()
+            message = await self.client.messages.create(
+                model=MODEL,
+                max_tokens=200,
+                system=[{"type": "text", "text": SYSTEM_PROMPT,
+                         "cache_control": CACHED}],
+                messages=messages
+            )
+            self.last_tokens = self._record_usage(message.usage,
+                                                  time.monotonic() - started)
+
+            response = message.content[0].text.strip()
+            self.last_action_time = now
+
+            # Parse JSON response
+            # Handle potential markdown code blocks
+            if response.startswith('```'):
+                lines = response.split('\n')
+                response = '\n'.join(lines[1:-1])
+
+            data = json.loads(response)
+            command = data.get('command')
+            commentary = data.get('commentary')
+
+            # Add this exchange to history
+            self.turns.append({"screen": screen_content, "command": command,
+                               "user": user_message, "assistant": response})
+            self._compact()
+
+            return command, commentary
+
+        except json.JSONDecodeError as e:
+            print(f"JSON parse error: {e}, response was: {response[:200]}")
+            return None, None
+        except Exception as e:
+            print(f"Claude API error: {e}")
+            return None, None
+
+    async def close(self):
+        if self.pipeline is not None:
+            self.pipeline.cancel()
+        if self.client is not None:
+            await self.client.close()
+
+class GameServer:
+    """Minimal HTTP/1.1 front end (nginx proxies /api/next and
+    /api/ai-status here). Each request is a coroutine, so spectators
+    waiting on a turn don't hold up /status or /screen."""
+
+    CORS_HEADERS = {
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+        'Access-Control-Allow-Headers': 'Content-Type',
+    }
+
+    def __init__(self, commentator):
+        self.commentator = commentator  # The console session's
+        self.lines = {}                 # DZ line number -> Commentator
+
+    def _commentator(self, query):
+        """The Commentator for ?line=<n>, created on first use; None if the
+        line is not one of the broker's."""
+        match = re.search(r'(?:^|&)line=(\d+)(?:&|$)', query)
+        if match is None:
+            return self.commentator
+        line = int(match.group(1))
+        if line >= DZ_LINES:
+            return None
+        if line not in self.lines:
+            self.lines[line] = Commentator(self.commentator.api_key, line)
+        return self.lines[line]
+
+    async def handle_http(self, reader, writer):
+        try:
+            while await self._handle_request(reader, writer):
+                pass
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_request(self, reader, writer):
+        """Serve one request; returns True to keep the connection open."""
+        request_line = await reader.readline()
+        if not request_line:
+            return False
+        method, target, version = request_line.decode('latin-1').split()
+        path, _, query = target.partition('?')
+        commentator = self._commentator(query)
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get('content-length', 0))
+        if length:
+            await reader.readexactly(length)  # No endpoint takes a body
+
+        keep_alive = (version == 'HTTP/1.1' and
+                      headers.get('connection', '').lower() != 'close')
+
+        if method == 'OPTIONS':
+            await self._respond(writer, 200, None, keep_alive)
+        elif method != 'GET' or commentator is None:
+            await self._respond(writer, 404, None, keep_alive)
+        elif path == '/next':
             # Get next action from Claude
-            screen_content = capture_screen()
-
-            if not screen_content:
-                self.send_json({"error": "no_screen"})
-                return
-
-            if not self.api_key:
-                self.send_json({"error": "no_api_key"})
-                return
-
-            command, commentary = get_next_action(screen_content, self.api_key)
-
-            if command:
-                # Execute the command
-                send_command(command)
-                time.sleep(0.5)  # Brief pause for command to process
-
-            self.send_json({
-                "command": command,
-                "commentary": commentary,
-                "screen": screen_content[:500]
-            })
-
-        elif self.path == '/status':
-            self.send_json({
+            result = await commentator.next_turn()
+            await self._respond(writer, 200, result, keep_alive)
+        elif path == '/status':
+            await self._respond(writer, 200, {
                 "ok": True,
-                "has_api_key": bool(self.api_key),
-                "has_anthropic": HAS_ANTHROPIC
-            })
-
-        elif self.path == '/screen':
+                "has_api_key": bool(self.commentator.api_key),
+                "has_anthropic": HAS_ANTHROPIC,
+                "tokens": self.commentator.totals
+            }, keep_alive)
+        elif path == '/screen':
             # Just return current screen, no action
-            screen_content = capture_screen()
-            self.send_json({"screen": screen_content})
-
+            screen_content = await asyncio.to_thread(capture_screen, commentator.line)
+            await self._respond(writer, 200, {"screen": screen_content}, keep_alive)
         else:
-            self.send_response(404)
-            self.end_headers()
-
-    def send_json(self, data):
-        self.send_response(200)
-        self.send_cors_headers()
-        self.send_header('Content-Type', 'application/json')
-        self.end_headers()
-        self.wfile.write(json.dumps(data).encode())
-
-def main():
+            await self._respond(writer, 404, None, keep_alive)
+        return keep_alive
+
+    async def _respond(self, writer, status, result, keep_alive):
+        reason = {200: 'OK', 404: 'Not Found'}[status]
+        body = json.dumps(result).encode() if result is not None else b''
+        lines = [f'HTTP/1.1 {status} {reason}']
+        lines += [f'{name}: {value}' for name, value in self.CORS_HEADERS.items()]
+        if result is not None:
+            lines.append('Content-Type: application/json')
+        lines.append(f'Content-Length: {len(body)}')
+        lines.append('Connection: ' + ('keep-alive' if keep_alive else 'close'))
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + body)
+        await writer.drain()
+
+async def main():
     api_key = load_api_key()
     if api_key:
         print(f"API key loaded from {API_KEY_FILE}")
     else:
         print(f"WARNING: No API key found in {API_KEY_FILE}")
         print("Create file with: ANTHROPIC_API_KEY=sk-ant-...")
+    if API_BASE_URL:
+        print(f"Using API at {API_BASE_URL}")
 
-    GameHandler.api_key = api_key
+    commentator = Commentator(api_key)
+    server = GameServer(commentator)
 
     print(f"Game AI server listening on port {PORT}")
-    server = http.server.HTTPServer(('127.0.0.1', PORT), GameHandler)
-    server.serve_forever()
+    http = await asyncio.start_server(server.handle_http, '127.0.0.1', PORT)
+    try:
+        async with http:
+            await http.serve_forever()
+    finally:
+        for commentator in [server.commentator, *server.lines.values()]:
+            await commentator.close()
 
 if __name__ == '__main__':
-    main()
+    asyncio.run(main())
@@ -0,0 +1,23 @@
+#!/bin/bash
+#
+# Connect a web terminal user to a DZ11 line of their own
+# session_broker.py hands out the lines and queues users when all are busy
+#
+
+echo "=============================================="
+echo "    ADVENT MUD - 1987 Multi-User Dungeon"
+echo "    Running on RSTS/E V10.1"
+echo "=============================================="
+echo ""
+
+# RSTS/E expects rubout (DEL/0x7f) for character deletion
+stty erase '^?' 2>/dev/null || true
+
+if ! nc -z localhost 2330 2>/dev/null; then
+    echo "Session broker not running. Please wait for the system to start."
+    sleep 5
+    exit 1
+fi
+
+echo "Finding you a terminal line..."
+exec telnet localhost 2330
@@ -17,6 +17,11 @@
 #   SKIP_SOURCE=1      - Skip source file transfer
 #   SKIP_COMPILE=1     - Skip compilation and linking
 #   SETUP_TIMEOUT=7200 - Timeout for setup in seconds (default 2 hours)
+#   CHECKPOINT=0       - Always cold boot (don't save or restore the emulator
+#                        checkpoint)
+#   GAME_TERMINALS=dz  - Give each web terminal its own DZ11 line through
+#                        session_broker.py, instead of sharing the console
+#                        session (default: shared)
 #
 
 set -e
@@ -58,25 +63,211 @@ DATA_DIR="$ADVENT_DIR/data"
 SRC_DIR="$ADVENT_DIR/src"
 SCRIPTS_DIR="$ADVENT_DIR/scripts"
 
-# Restore disk image from backup on each start
-# This prevents corruption from improper shutdowns
-BACKUP_DIR="$ADVENT_DIR/disks-backup"
-if [ -f "$BACKUP_DIR/rstse_10_ra72.dsk" ]; then
-    echo "Restoring fresh RA72 disk image from backup..."
-    cp "$BACKUP_DIR/rstse_10_ra72.dsk" "$DISKS_DIR/rstse_10_ra72.dsk"
-    echo "Disk image restored."
+# What the game web terminal (ttyd on 7681) runs for each browser
+GAME_TERMINAL_SCRIPT="$ADVENT_DIR/attach_game.sh"
+if [ "${GAME_TERMINALS:-shared}" = "dz" ]; then
+    GAME_TERMINAL_SCRIPT="$ADVENT_DIR/dz_connect.sh"
 fi
 
-# Check for required disk image
-if [ ! -f "$DISKS_DIR/rstse_10_ra72.dsk" ]; then
-    echo "ERROR: RA72 disk not found at $DISKS_DIR/rstse_10_ra72.dsk"
-    exit 1
+BACKUP_DIR="$ADVENT_DIR/disks-backup"
+
+# The pristine disk is kept as a VHD (made in the Dockerfile), and the
+# working disk is an empty differencing VHD over it, created fresh on each
+# start (SIMH ATTACH -D). SIMH writes only to the overlay and never to the
+# base, so "restoring" means throwing the overlay away: constant time, no
+# matter how much of the 1 GB image the last session wrote. SIMH detects
+# VHD files by their footer, so pdp11.ini attaches the same path as before.
+# Images with only the raw .dsk backup use disk_restore.py instead.
+BASE_VHD="$BACKUP_DIR/rstse_10_ra72.vhd"
+
+new_overlay() {
+    rm -f "$DISKS_DIR/rstse_10_ra72.dsk"
+    printf 'set rq enable\nset rq0 ra72\nattach -d rq0 %s %s\ndetach rq0\nexit\n' \
+        "$DISKS_DIR/rstse_10_ra72.dsk" "$BASE_VHD" > /tmp/overlay.ini
+    /usr/local/bin/pdp11 /tmp/overlay.ini < /dev/null > /tmp/overlay.log 2>&1 &&
+        [ -s "$DISKS_DIR/rstse_10_ra72.dsk" ]
+}
+
+# Emulator checkpoint (warm boot)
+# After the first start that reaches the ready state, the full SIMH state
+# is saved (SAVE) together with the disk image it belongs to. Later starts
+# put that disk back and RESTORE, resuming the running timesharing system
+# instead of booting, copying from tape and compiling. The key records what
+# the checkpoint was made from: a different ini file, backup disk or build
+# option means a cold boot and a new checkpoint.
+#
+# Source and data changes don't: the checkpoint keeps the manifest of the
+# tape its build was copied from, and only the files that differ from it
+# go on a delta tape (DELTA_TAPE) for build_advent.exp to copy and compile.
+CHECKPOINT_DIR="$ADVENT_DIR/checkpoint"
+SIMH_CONTROL="/tmp/simh_control"
+DELTA_TAPE="$ADVENT_DIR/tapes/advent_delta.tap"
+DELTA_FILES=""
+BUILD_MANIFEST=""
+BUILD_OK=0
+
+checkpoint_key() {
+    cat "$ADVENT_DIR/pdp11.ini" "$ADVENT_DIR/pdp11_restore.ini" 2>/dev/null | cksum
+    stat -c '%s %Y' "$BACKUP_DIR/rstse_10_ra72.dsk" "$BASE_VHD" 2>/dev/null || true
+    echo "skip=${SKIP_SETUP:-0}${SKIP_DATA:-0}${SKIP_SOURCE:-0}${SKIP_COMPILE:-0}"
+}
+
+checkpoint_valid() {
+    [ "${CHECKPOINT:-1}" = "1" ] && [ -f "$CHECKPOINT_DIR/rsts.sav" ] &&
+        [ "$(cat "$CHECKPOINT_DIR/key" 2>/dev/null)" = "$(checkpoint_key)" ] &&
+        { [ "${SKIP_SETUP:-0}" = "1" ] || [ -f "$CHECKPOINT_DIR/manifest.json" ]; }
+}
+
+# Write the delta tape (pdp11_restore.ini attaches it) with the files that
+# changed since the checkpoint's build, and list them in DELTA_FILES.
+# Without a build (SKIP_SETUP) the tape is left empty.
+prepare_delta() {
+    DELTA_FILES=""
+    if [ ! -f "$CHECKPOINT_DIR/manifest.json" ]; then
+        printf '\377\377\377\377' > "$DELTA_TAPE"  # End of medium only
+        return 0
+    fi
+    python3 "$SCRIPTS_DIR/create_advent_tape.py" -o "$DELTA_TAPE" \
+        --delta-from "$CHECKPOINT_DIR/manifest.json" > /tmp/delta_tape.log 2>&1 || return 1
+    DELTA_FILES=$(python3 -c 'import json, sys; print(" ".join(json.load(open(sys.argv[1]))["tape"]))' \
+        "${DELTA_TAPE%.tap}.manifest.json") || return 1
+    if [ -n "$DELTA_FILES" ]; then
+        echo "Changed since checkpoint: $DELTA_FILES"
+    fi
+}
+
+# Put the disk image in place and choose how SIMH starts (SIMH_INI).
+# With "restart", a cold boot keeps the current disk, which holds the build;
+# so does a restart that finds files changed since the checkpoint, as only
+# a first start runs the build.
+prepare_simh() {
+    if checkpoint_valid && prepare_delta &&
+            { [ "$1" != "restart" ] || [ -z "$DELTA_FILES" ]; }; then
+        echo "Restoring disk image from checkpoint..."
+        python3 "$ADVENT_DIR/disk_restore.py" "$CHECKPOINT_DIR/rstse_10_ra72.dsk" "$DISKS_DIR/rstse_10_ra72.dsk"
+        SIMH_INI="$ADVENT_DIR/pdp11_restore.ini"
+        VERIFY_ARGS="--wake"
+        WARM_BOOT=1
+        return
+    fi
+    DELTA_FILES=""
+
+    # Restore disk image from backup on each start
+    # This prevents corruption from improper shutdowns
+    if [ "$1" != "restart" ]; then
+        if [ -f "$BASE_VHD" ] && new_overlay; then
+            echo "Fresh RA72 disk: new overlay over the pristine image"
+        elif [ -f "$BACKUP_DIR/rstse_10_ra72.dsk" ]; then
+            # disk_restore.py clones (reflink) or rewrites only the blocks
+            # that changed, instead of copying the whole 1 GB image
+            echo "Restoring fresh RA72 disk image from backup..."
+            python3 "$ADVENT_DIR/disk_restore.py" "$BACKUP_DIR/rstse_10_ra72.dsk" "$DISKS_DIR/rstse_10_ra72.dsk"
+        elif [ -f "$BASE_VHD" ]; then
+            echo "WARNING: Could not create disk overlay (see /tmp/overlay.log), copying base"
+            python3 "$ADVENT_DIR/disk_restore.py" "$BASE_VHD" "$DISKS_DIR/rstse_10_ra72.dsk"
+        fi
+    fi
+    SIMH_INI="$ADVENT_DIR/pdp11.ini"
+    VERIFY_ARGS=""
+    WARM_BOOT=0
+}
+
+# Start SIMH in the background with the given ini file (default SIMH_INI).
+# Its stdin is a FIFO opened read-write, so it never sees EOF; once SIMH is
+# stopped with SIGINT it reads commands from there (see save_checkpoint).
+start_simh() {
+    rm -f "$SIMH_CONTROL"
+    mkfifo "$SIMH_CONTROL"
+    /usr/local/bin/pdp11 "${1:-$SIMH_INI}" <> "$SIMH_CONTROL" &
+    SIMH_PID=$!
+}
+
+# Let RSTS/E run logins on the DZ lines (session_broker.py's players), and
+# check that one answers. The settings only last until SIMH stops, so this
+# runs after every boot that reached the ready state, before any
+# save_checkpoint, so the checkpoint carries them too.
+setup_dz_lines() {
+    echo "Setting up the DZ lines for logins..."
+    if "$ADVENT_DIR/dz_setup.exp" 2>/dev/null; then
+        echo "DZ lines serve logins"
+    else
+        echo "WARNING: No login prompt on the DZ lines; per-player sessions (session_broker.py) will not work"
+    fi
+}
+
+# Stop the running SIMH, SAVE its state, copy the disk it goes with, and
+# let it carry on. The checkpoint only replaces the old one once complete.
+save_checkpoint() {
+    if [ "${CHECKPOINT:-1}" != "1" ]; then
+        return 0
+    fi
+    echo "Saving emulator checkpoint..."
+    local new="$CHECKPOINT_DIR.new"
+    rm -rf "$new"
+    mkdir -p "$new"
+
+    kill -INT "$SIMH_PID" 2>/dev/null || return 0
+    sleep 1
+    printf 'save %s\n! cp --reflink=auto --sparse=always %s %s\n! touch %s\ncontinue\n' \
+        "$new/rsts.sav" "$DISKS_DIR/rstse_10_ra72.dsk" "$new/rstse_10_ra72.dsk" \
+        "$new/done" > "$SIMH_CONTROL"
+
+    local waited=0
+    while [ ! -f "$new/done" ] && [ $waited -lt 300 ]; do
+        sleep 1
+        waited=$((waited + 1))
+    done
+    if [ ! -f "$new/done" ] || [ ! -s "$new/rsts.sav" ]; then
+        echo "WARNING: Checkpoint was not saved; the next start will cold boot"
+        rm -rf "$new"
+        return 0
+    fi
+
+    rm -f "$new/done"
+    if [ $BUILD_OK -eq 1 ] && [ -n "$BUILD_MANIFEST" ]; then
+        cp "$BUILD_MANIFEST" "$new/manifest.json"
+    fi
+    checkpoint_key > "$new/key"
+    rm -rf "$CHECKPOINT_DIR"
+    mv "$new" "$CHECKPOINT_DIR"
+    echo "Checkpoint saved to $CHECKPOINT_DIR (${waited}s)"
+}
+
+# Check whether the last migrate_data.py --incremental run flagged a step
+# (reconnect, tape) in its change list
+data_changed() {
+    python3 -c 'import json, sys; sys.exit(0 if json.load(open(sys.argv[1])).get(sys.argv[2]) else 1)' \
+        "$DATA_DIR/changes.json" "$1" 2>/dev/null
+}
+
+# Regenerate data files if salvage sources exist. The incremental build
+# hashes roomfil.fil/REFRSH.CTL and only rewrites records that changed, so
+# this is cheap when nothing was edited.
+if [ -f "$DATA_DIR/roomfil.fil" ]; then
+    echo "Updating data files from salvaged sources..."
+    python3 "$SCRIPTS_DIR/migrate_data.py" --data-dir "$DATA_DIR" --output-dir "$DATA_DIR" \
+        --incremental --jobs "$(nproc)" 2>&1 || true
+
+    if data_changed reconnect; then
+        echo "Rooms changed - reconnecting exits and regenerating map..."
+        python3 "$SCRIPTS_DIR/reconstruct_rooms.py" \
+            --input "$DATA_DIR/ADVENT.DTA" \
+            --map-json "$DATA_DIR/dungeon_map.json" 2>&1 || true
+    fi
+
+    if data_changed tape; then
+        echo "Data files changed - rebuilding tape..."
+        python3 "$SCRIPTS_DIR/create_advent_tape.py" -o "$ADVENT_DIR/tapes/advent_source.tap" 2>&1 || true
+    fi
 fi
 
-# Generate data files if salvage sources exist and data files don't
-if [ -f "$DATA_DIR/roomfil.fil" ] && [ ! -f "$DATA_DIR/ADVENT.DTA" ]; then
-    echo "Generating data files from salvaged sources..."
-    python3 "$SCRIPTS_DIR/migrate_data.py" --data-dir "$DATA_DIR" --output-dir "$DATA_DIR" 2>&1 || true
+# Check the source tape against the files it is made from (milliseconds),
+# so a damaged or stale tape is rebuilt here instead of failing inside RSTS/E.
+# Its manifest is needed too, for delta tapes later on.
+if [ ! -f "$ADVENT_DIR/tapes/advent_source.manifest.json" ] ||
+        ! python3 "$SCRIPTS_DIR/create_advent_tape.py" --verify -o "$ADVENT_DIR/tapes/advent_source.tap" 2>&1; then
+    echo "Rebuilding tape..."
+    python3 "$SCRIPTS_DIR/create_advent_tape.py" -o "$ADVENT_DIR/tapes/advent_source.tap" 2>&1 || true
 fi
 
 # Start nginx early so health checks pass during boot
@@ -98,6 +289,10 @@ echo "Kick service started on port 8082"
 python3 "$ADVENT_DIR/input_server.py" &
 echo "Input service started on port 8083"
 
+# Start the session broker (DZ11 line pool on port 2330, API on port 8085)
+python3 "$ADVENT_DIR/session_broker.py" &
+echo "Session broker started on port 2330"
+
 # Start the commentary service (listens on port 8084, real-time Claude observations)
 python3 "$ADVENT_DIR/commentary_server.py" &
 echo "Commentary service started on port 8084"
@@ -108,8 +303,18 @@ echo "  Console: telnet localhost 2322"
 echo "  Terminals: telnet localhost 2323"
 echo
 
-/usr/local/bin/pdp11 "$ADVENT_DIR/pdp11.ini" &
-SIMH_PID=$!
+prepare_simh
+
+# Check for required disk image
+if [ ! -f "$DISKS_DIR/rstse_10_ra72.dsk" ]; then
+    echo "ERROR: RA72 disk not found at $DISKS_DIR/rstse_10_ra72.dsk"
+    exit 1
+fi
+
+if [ $WARM_BOOT -eq 1 ]; then
+    echo "Resuming RSTS/E from checkpoint"
+fi
+start_simh
 
 # Wait for SIMH to start
 sleep 3
@@ -121,7 +326,11 @@ fi
 echo "SIMH started (PID: $SIMH_PID)"
 
 # Update boot status
-echo '{"status": "booting", "message": "Waiting for RSTS/E to boot (this takes ~5 minutes)..."}' > /tmp/boot_status.json
+if [ $WARM_BOOT -eq 1 ]; then
+    echo '{"status": "booting", "message": "Resuming RSTS/E from checkpoint..."}' > /tmp/boot_status.json
+else
+    echo '{"status": "booting", "message": "Waiting for RSTS/E to boot (this takes ~5 minutes)..."}' > /tmp/boot_status.json
+fi
 
 # Wait for RSTS/E to boot (check if port 2323 is accepting connections)
 echo "Waiting for RSTS/E to boot..."
@@ -154,7 +363,7 @@ echo "Waiting for RSTS/E to be ready for logins..."
 MAX_READY_WAIT=120
 READY_WAIT=0
 while [ $READY_WAIT -lt $MAX_READY_WAIT ]; do
-    if "$ADVENT_DIR/verify_ready.exp" 2>/dev/null; then
+    if "$ADVENT_DIR/verify_ready.exp" $VERIFY_ARGS 2>/dev/null; then
         echo "RSTS/E is ready for logins!"
         break
     fi
@@ -171,7 +380,9 @@ fi
 
 # Run setup (build from source) BEFORE starting web terminals
 # This prevents users from connecting while build is in progress
-if [ "${SKIP_SETUP:-0}" != "1" ]; then
+# A warm boot resumes a system that was already built, and only copies and
+# compiles the files on the delta tape, if any changed
+if [ "${SKIP_SETUP:-0}" != "1" ] && { [ $WARM_BOOT -eq 0 ] || [ -n "$DELTA_FILES" ]; }; then
     echo ""
     echo "=============================================="
     echo "  Running ADVENT Setup"
@@ -179,17 +390,32 @@ if [ "${SKIP_SETUP:-0}" != "1" ]; then
     echo ""
 
     # Update boot status to show build is in progress
-    echo '{"status": "building", "message": "Building ADVENT from source...", "detail": "Copying files from tape and compiling. This takes 10-15 minutes.", "progress": "Started"}' > /tmp/boot_status.json
+    if [ -n "$DELTA_FILES" ]; then
+        echo '{"status": "building", "message": "Rebuilding ADVENT with changed files...", "detail": "Copying changed files from tape and compiling.", "progress": "Started"}' > /tmp/boot_status.json
+        TAPE_MANIFEST="${DELTA_TAPE%.tap}.manifest.json"
+    else
+        echo '{"status": "building", "message": "Building ADVENT from source...", "detail": "Copying files from tape and compiling. This takes 10-15 minutes.", "progress": "Started"}' > /tmp/boot_status.json
+        TAPE_MANIFEST="$ADVENT_DIR/tapes/advent_source.manifest.json"
+    fi
 
     # Run build_advent.exp to copy from tape and compile
     # This uses TMSCP tape (MU0:) at 18KB/sec - much faster than TECO
+    # On a delta build it gets the changed files, and copies only those
+    # pipefail: the status is build_advent.exp's (or timeout's), not tee's
     TIMEOUT="${SETUP_TIMEOUT:-7200}"
-    timeout $TIMEOUT "$ADVENT_DIR/build_advent.exp" 2>&1 | tee /tmp/setup.log || {
+    if (set -o pipefail; timeout $TIMEOUT "$ADVENT_DIR/build_advent.exp" $DELTA_FILES 2>&1 | tee /tmp/setup.log); then
+        BUILD_OK=1
+        # The tape's files are on the disk now; save_checkpoint records its
+        # manifest, which later delta tapes are made against. A failed build
+        # leaves it unset, so the same files go on the next delta tape.
+        BUILD_MANIFEST="$TAPE_MANIFEST"
+    else
         echo ""
         echo "WARNING: Build completed with errors or timed out."
         echo "Check /tmp/setup.log for details."
+        echo "No checkpoint will be saved, so the next start builds again."
         echo ""
-    }
+    fi
 
     # Kill any lingering connections from build
     # Note: tcp_connect.py sends RST on close, so we shouldn't have CLOSE_WAIT issues
@@ -210,8 +436,7 @@ if [ "${SKIP_SETUP:-0}" != "1" ]; then
     wait_for_port_free 2323 10 || true
     wait_for_port_free 2325 10 || true
 
-    /usr/local/bin/pdp11 "$ADVENT_DIR/pdp11.ini" &
-    SIMH_PID=$!
+    start_simh "$ADVENT_DIR/pdp11.ini"
     echo "SIMH restarted (PID: $SIMH_PID)"
 
     # Verify console port is listening (critical for game connections)
@@ -221,8 +446,7 @@ if [ "${SKIP_SETUP:-0}" != "1" ]; then
         echo "Attempting SIMH restart..."
         pkill -9 pdp11 2>/dev/null || true
         wait_for_port_free 2322 65 || true
-        /usr/local/bin/pdp11 "$ADVENT_DIR/pdp11.ini" &
-        SIMH_PID=$!
+        start_simh "$ADVENT_DIR/pdp11.ini"
         echo "SIMH restarted again (PID: $SIMH_PID)"
     fi
 
@@ -250,6 +474,21 @@ if [ "${SKIP_SETUP:-0}" != "1" ]; then
     echo '{"status": "booting", "message": "Build complete, starting game session..."}' > /tmp/boot_status.json
 fi
 
+# Whichever way the running system was booted, before it is checkpointed
+setup_dz_lines
+
+# First time this build reached the ready state: checkpoint it, so later
+# starts can resume from here. Only a build that succeeded is checkpointed
+# (or a cold boot with SKIP_SETUP, which has none); otherwise every later
+# warm boot would resume the failed one and never retry it.
+if [ "${SKIP_SETUP:-0}" = "1" ] && [ $WARM_BOOT -eq 0 ]; then
+    BUILD_OK=1
+fi
+if [ $BUILD_OK -eq 1 ] && "$ADVENT_DIR/verify_ready.exp" 2>/dev/null; then
+    echo '{"status": "booting", "message": "Saving emulator checkpoint..."}' > /tmp/boot_status.json
+    save_checkpoint
+fi
+
 # Start persistent game session using screen
 # This logs in once and keeps ADVENT running - users attach with screen -x
 echo "Starting persistent ADVENT game session..."
@@ -304,7 +543,7 @@ ttyd -p 7681 -b /terminal -W \
     -t titleFixed="ADVENT MUD" \
     -t fontSize=20 \
     -t fontFamily="'Courier New', Courier, monospace" \
-    "$ADVENT_DIR/attach_game.sh" &
+    "$GAME_TERMINAL_SCRIPT" &
 GAME_PID=$!
 echo "Game web terminal started on port 7681"
 
@@ -342,9 +581,9 @@ while true; do
     wait_for_port_free 2323 10 || true
     wait_for_port_free 2325 10 || true
 
+    prepare_simh restart
     echo "Starting SIMH emulator..."
-    /usr/local/bin/pdp11 "$ADVENT_DIR/pdp11.ini" &
-    SIMH_PID=$!
+    start_simh
 
     # Verify console port is listening (critical for game connections)
     sleep 2
@@ -353,8 +592,7 @@ while true; do
         echo "Attempting SIMH restart..."
         pkill -9 pdp11 2>/dev/null || true
         wait_for_port_free 2322 65 || true
-        /usr/local/bin/pdp11 "$ADVENT_DIR/pdp11.ini" &
-        SIMH_PID=$!
+        start_simh
         echo "SIMH restarted again (PID: $SIMH_PID)"
     fi
 
@@ -364,7 +602,7 @@ while true; do
     MAX_RESTART_WAIT=120
     RESTART_WAIT=0
     while [ $RESTART_WAIT -lt $MAX_RESTART_WAIT ]; do
-        if "$ADVENT_DIR/verify_ready.exp" 2>/dev/null; then
+        if "$ADVENT_DIR/verify_ready.exp" $VERIFY_ARGS 2>/dev/null; then
             echo "RSTS/E is ready!"
             break
         fi
@@ -377,6 +615,7 @@ while true; do
         echo ""
         echo "WARNING: RSTS/E may not be fully ready"
     fi
+    setup_dz_lines
 
     # Restart persistent game session using screen
     echo "Starting persistent ADVENT game session..."
@@ -394,7 +633,7 @@ while true; do
         -t titleFixed="ADVENT MUD" \
         -t fontSize=20 \
         -t fontFamily="'Courier New', Courier, monospace" \
-        "$ADVENT_DIR/attach_game.sh" &
+        "$GAME_TERMINAL_SCRIPT" &
     GAME_PID=$!
     echo "Game web terminal restarted on port 7681"
 
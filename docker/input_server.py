@@ -1,58 +1,462 @@
 #!/usr/bin/env python3
 """
-Simple HTTP server to send input to the ADVENT screen session.
+Input server for the ADVENT screen session.
 Used by the demo mode to send keystrokes.
 
 Listens on port 8083 and accepts POST requests to /send with body containing the text to send.
+
+The game session's telnet (started by start_game_session.sh inside screen)
+connects to the console through this server's relay port instead of
+going to SIMH directly. The relay keeps the console socket open, so a
+keystroke is a single write on that socket rather than a fork+exec of
+`screen -X stuff`. If the session is not going through the relay (for
+example it was started before this server), /send falls back to screen.
+
+Everything runs on one asyncio loop, so a slow request never holds up
+the others.
+
+Keystrokes go through an InputQueue: text posted in quick succession (a
+typing effect sends one character per request) is coalesced into a
+single write, in the order it arrived. GET /status reports the queue
+depth and batch latencies.
+
+The console's output to the session is also fed into a VT100 screen
+model (vt100.py), so GET /screen returns the current screen from memory;
+commentary_server.py reads it there instead of taking screen hardcopies.
+GET /screen/stream is a server-sent event stream of the same screen: a
+snapshot of all lines, then numbered diffs holding only the changed lines.
 """
 
-import http.server
-import subprocess
-import urllib.parse
+import asyncio
+import json
+import re
+import socket
+import struct
+import time
+from collections import deque
+
+from vt100 import VT100
 
 PORT = 8083
+RELAY_PORT = 2321            # start_game_session.sh points telnet here
+CONSOLE_HOST = '127.0.0.1'
+CONSOLE_PORT = 2322          # SIMH console (single connection)
+SCREEN_TIMEOUT = 5
+MAX_BODY = 64 * 1024
+BATCH_WINDOW = 0.005         # Seconds to collect more input before writing
+MAX_BATCH = 4096             # Bytes per write
+MAX_PENDING = 16 * 1024      # Queued bytes before /send waits for the writer
+FRAME_INTERVAL = 0.05        # Seconds between screen diffs on /screen/stream
+STREAM_BACKLOG = 64          # Diffs queued per stream client before it resyncs
+STREAM_PING = 15             # Seconds between keepalive comments
+
+# screen's stuff command understands these; accept them on the relay too
+_STUFF_ESCAPE = re.compile(r'\\([0-7]{1,3}|.)|\^(.)', re.DOTALL)
+_BACKSLASH = {'r': '\r', 'n': '\n', 't': '\t', 'e': '\033', 'a': '\a',
+              'b': '\b', 'f': '\f', '\\': '\\'}
+
+
+def stuff_bytes(text):
+    """Convert `screen -X stuff` text (\\r, \\033, ^M ...) to raw bytes."""
+    def replace(match):
+        escape, caret = match.groups()
+        if caret is not None:
+            return '\x7f' if caret == '?' else chr(ord(caret.upper()) & 0x1f)
+        if escape[0] in '01234567':
+            return chr(int(escape, 8) & 0xff)
+        return _BACKSLASH.get(escape, escape)
+    return _STUFF_ESCAPE.sub(replace, text).encode('latin-1', errors='replace')
+
 
-class InputHandler(http.server.BaseHTTPRequestHandler):
-    def log_message(self, format, *args):
-        # Suppress logging
+def screen_text(data):
+    """Quote raw bytes for `screen -X stuff` (the inverse of stuff_bytes)."""
+    text = data.decode('latin-1').replace('\\', '\\\\').replace('^', '\\^')
+    return text.replace('\0', '\\000')
+
+
+def sse_event(name, seq, data):
+    payload = json.dumps(data, separators=(',', ':'))
+    return f'id: {seq}\nevent: {name}\ndata: {payload}\n\n'.encode()
+
+
+def tune_socket(writer):
+    """No Nagle delay, and RST on close (see tcp_connect.py) so SIMH's
+    single-connection console is never left in CLOSE_WAIT."""
+    sock = writer.get_extra_info('socket')
+    if sock is None:
+        return
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+
+
+async def pipe(reader, writer, tap=None):
+    try:
+        while True:
+            data = await reader.read(4096)
+            if not data:
+                return
+            if tap is not None:
+                tap(data)
+            writer.write(data)
+            await writer.drain()
+    except (ConnectionError, OSError):
         pass
 
-    def do_OPTIONS(self):
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
 
-    def do_POST(self):
-        if self.path == '/send':
-            content_length = int(self.headers.get('Content-Length', 0))
-            body = self.rfile.read(content_length).decode('utf-8')
+class ScreenFeed:
+    """The session's screen, published to stream clients as line diffs.
+
+    Console output is applied to the VT100 model straight away; at most
+    every FRAME_INTERVAL the changed lines go out as one 'diff' event
+    {"seq": n, "lines": {row: text}}. A new client first gets a
+    'snapshot' {"seq": n, "lines": [text, ...]} and then every diff after
+    n. A client that falls STREAM_BACKLOG diffs behind gets a new snapshot
+    instead of the backlog.
+    """
+
+    def __init__(self):
+        self.terminal = VT100()
+        self.lines = self.terminal.display()  # As of the last published diff
+        self.seq = 0
+        self.clients = set()
+        self.timer = None
 
-            # Send to screen session
+    def text(self):
+        return self.terminal.text()
+
+    def feed(self, data):
+        self.terminal.feed(data)
+        self._schedule()
+
+    def reset(self):
+        self.terminal.reset()
+        self._schedule()
+
+    def snapshot(self):
+        return sse_event('snapshot', self.seq,
+                         {'seq': self.seq, 'lines': self.lines})
+
+    def subscribe(self):
+        queue = asyncio.Queue(STREAM_BACKLOG)
+        queue.put_nowait(self.snapshot())
+        self.clients.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self.clients.discard(queue)
+
+    def _schedule(self):
+        if self.timer is None:
+            self.timer = asyncio.get_running_loop().call_later(
+                FRAME_INTERVAL, self._publish)
+
+    def _publish(self):
+        self.timer = None
+        lines = self.terminal.display()
+        changed = {row: line for row, (line, old) in enumerate(zip(lines, self.lines))
+                   if line != old}
+        if not changed:
+            return
+        self.lines = lines
+        self.seq += 1
+        event = sse_event('diff', self.seq, {'seq': self.seq, 'lines': changed})
+        for queue in self.clients:
             try:
-                # Use screen's 'stuff' command to send input
-                subprocess.run(
-                    ['screen', '-S', 'advent', '-X', 'stuff', body],
-                    check=True,
-                    timeout=5
-                )
-                self.send_response(200)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                self.wfile.write(b'{"ok":true}')
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(self.snapshot())
+
+
+class SessionChannel:
+    """The game session's console connection, relayed through us."""
+
+    def __init__(self):
+        self.console = None  # StreamWriter to SIMH while a session is relayed
+        self.screen = ScreenFeed()
+
+    @property
+    def connected(self):
+        return self.console is not None and not self.console.is_closing()
+
+    async def handle_session(self, reader, writer):
+        """Relay one session (the telnet inside screen) to the console."""
+        tune_socket(writer)
+        try:
+            console_reader, console = await asyncio.open_connection(
+                CONSOLE_HOST, CONSOLE_PORT)
+        except OSError as e:
+            print(f'Relay: cannot reach console: {e}')
+            writer.close()
+            return
+        tune_socket(console)
+
+        if self.connected:
+            # A new session replaces the old one, as a new telnet would
+            self.console.close()
+        self.console = console
+        self.screen.reset()  # The session's terminal starts out blank too
+        print('Relay: game session connected')
+
+        tasks = [asyncio.create_task(pipe(reader, console)),
+                 asyncio.create_task(pipe(console_reader, writer,
+                                           self.screen.feed))]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            if self.console is console:
+                self.console = None
+            console.close()
+            writer.close()
+            print('Relay: game session closed')
+
+    async def send(self, data):
+        """Write keystrokes to the console; False if no session is relayed."""
+        if not self.connected:
+            return False
+        self.console.write(data)
+        await self.console.drain()
+        return True
+
+
+async def screen_stuff(text):
+    """Fallback: inject input with `screen -X stuff`."""
+    proc = await asyncio.create_subprocess_exec(
+        'screen', '-S', 'advent', '-X', 'stuff', text)
+    try:
+        returncode = await asyncio.wait_for(proc.wait(), SCREEN_TIMEOUT)
+    except asyncio.TimeoutError:
+        proc.kill()
+        raise RuntimeError('screen timed out')
+    if returncode != 0:
+        raise RuntimeError(f'screen exited with status {returncode}')
+
+
+class InputQueue:
+    """Ordered keystroke queue that coalesces bursts into single writes.
+
+    The writer waits BATCH_WINDOW after the first chunk arrives, then
+    sends everything queued by then (up to MAX_BATCH bytes) in one write,
+    or one `screen -X stuff` in fallback mode. Input arriving while a
+    write is in progress joins the next batch. Once MAX_PENDING bytes are
+    queued, submit() waits: the console socket's drain(), or screen
+    finishing, paces the senders.
+    """
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.pending = deque()       # (data, future, time queued)
+        self.pending_bytes = 0
+        self.changed = asyncio.Condition()
+        self.admit = asyncio.Lock()  # FIFO, so blocked senders keep their order
+        self.requests = 0
+        self.batches = 0
+        self.bytes = 0
+        self.screen_calls = 0
+        self.last_latency = 0.0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    async def submit(self, data):
+        """Queue `data` and return once it has been written."""
+        future = asyncio.get_running_loop().create_future()
+        async with self.admit:
+            async with self.changed:
+                await self.changed.wait_for(
+                    lambda: not self.pending or
+                    self.pending_bytes + len(data) <= MAX_PENDING)
+                self.pending.append((data, future, time.monotonic()))
+                self.pending_bytes += len(data)
+                self.requests += 1
+                self.changed.notify_all()
+        await future
+
+    async def run(self):
+        """Writer task: drain the queue batch by batch."""
+        while True:
+            async with self.changed:
+                await self.changed.wait_for(lambda: self.pending)
+            await asyncio.sleep(BATCH_WINDOW)
+
+            batch = []
+            size = 0
+            while self.pending and (not batch or
+                                    size + len(self.pending[0][0]) <= MAX_BATCH):
+                item = self.pending.popleft()
+                batch.append(item)
+                size += len(item[0])
+
+            error = None
+            try:
+                await self._write(b''.join(data for data, _, _ in batch))
             except Exception as e:
-                self.send_response(500)
-                self.send_header('Access-Control-Allow-Origin', '*')
-                self.send_header('Content-Type', 'application/json')
-                self.end_headers()
-                self.wfile.write(f'{{"ok":false,"error":"{str(e)}"}}'.encode())
+                error = e
+
+            async with self.changed:
+                self.pending_bytes -= size
+                self.changed.notify_all()
+
+            latency = time.monotonic() - batch[0][2]
+            self.batches += 1
+            self.bytes += size
+            self.last_latency = latency
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+
+            for _, future, _ in batch:
+                if future.done():  # The client went away
+                    continue
+                if error is None:
+                    future.set_result(None)
+                else:
+                    future.set_exception(error)
+
+    async def _write(self, data):
+        if not await self.channel.send(data):
+            self.screen_calls += 1
+            await screen_stuff(screen_text(data))
+
+    def status(self):
+        average = self.total_latency / self.batches if self.batches else 0.0
+        return {
+            'ok': True,
+            'relayed': self.channel.connected,
+            'queue_depth': len(self.pending),
+            'queued_bytes': self.pending_bytes,
+            'requests': self.requests,
+            'batches': self.batches,
+            'bytes': self.bytes,
+            'screen_calls': self.screen_calls,
+            'last_batch_ms': round(self.last_latency * 1000, 2),
+            'avg_batch_ms': round(average * 1000, 2),
+            'max_batch_ms': round(self.max_latency * 1000, 2),
+        }
+
+
+class InputServer:
+    """Minimal HTTP/1.1 front end (nginx proxies /api/send here)."""
+
+    CORS_HEADERS = {
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+        'Access-Control-Allow-Headers': 'Content-Type',
+    }
+
+    def __init__(self, queue):
+        self.queue = queue
+        self.channel = queue.channel
+
+    async def handle_http(self, reader, writer):
+        try:
+            while await self._handle_request(reader, writer):
+                pass
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_request(self, reader, writer):
+        """Serve one request; returns True to keep the connection open."""
+        request_line = await reader.readline()
+        if not request_line:
+            return False
+        method, path, version = request_line.decode('latin-1').split()
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get('content-length', 0))
+        if length > MAX_BODY:
+            await self._respond(writer, 413, {'ok': False, 'error': 'body too large'},
+                                keep_alive=False)
+            return False
+        body = await reader.readexactly(length) if length else b''
+
+        keep_alive = (version == 'HTTP/1.1' and
+                      headers.get('connection', '').lower() != 'close')
+
+        if method == 'OPTIONS':
+            await self._respond(writer, 200, None, keep_alive)
+            return keep_alive
+        return await self._route(method, path, body, writer, keep_alive)
+
+    async def _route(self, method, path, body, writer, keep_alive):
+        """Serve a parsed request; returns True to keep the connection open."""
+        if method == 'POST' and path == '/send':
+            status, result = await self._send(self.queue, body)
+            await self._respond(writer, status, result, keep_alive)
+        elif method == 'GET' and path == '/status':
+            await self._respond(writer, 200, self.queue.status(), keep_alive)
+        elif method == 'GET' and path == '/screen':
+            channel = self.channel
+            screen = channel.screen.text() if channel.connected else None
+            await self._respond(writer, 200, {'screen': screen}, keep_alive)
+        elif method == 'GET' and path == '/screen/stream':
+            await self._stream_screen(writer, self.channel.screen)
+            return False
         else:
-            self.send_response(404)
-            self.end_headers()
+            await self._respond(writer, 404, None, keep_alive)
+        return keep_alive
+
+    async def _send(self, queue, body):
+        try:
+            await queue.submit(stuff_bytes(body.decode('utf-8', errors='replace')))
+            return 200, {'ok': True}
+        except Exception as e:
+            return 500, {'ok': False, 'error': str(e)}
+
+    async def _stream_screen(self, writer, feed):
+        """Send a ScreenFeed as server-sent events until the client leaves."""
+        lines = ['HTTP/1.1 200 OK']
+        lines += [f'{name}: {value}' for name, value in self.CORS_HEADERS.items()]
+        lines += ['Content-Type: text/event-stream', 'Cache-Control: no-cache',
+                  'X-Accel-Buffering: no', 'Connection: close']
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode())
+        queue = feed.subscribe()
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), STREAM_PING)
+                except asyncio.TimeoutError:
+                    event = b': ping\n\n'
+                writer.write(event)
+                await writer.drain()
+        finally:
+            feed.unsubscribe(queue)
+
+    async def _respond(self, writer, status, result, keep_alive):
+        reason = {200: 'OK', 404: 'Not Found', 413: 'Payload Too Large',
+                  500: 'Internal Server Error'}[status]
+        body = json.dumps(result, separators=(',', ':')).encode() if result else b''
+        lines = [f'HTTP/1.1 {status} {reason}']
+        lines += [f'{name}: {value}' for name, value in self.CORS_HEADERS.items()]
+        if result is not None:
+            lines.append('Content-Type: application/json')
+        lines.append(f'Content-Length: {len(body)}')
+        lines.append('Connection: ' + ('keep-alive' if keep_alive else 'close'))
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + body)
+        await writer.drain()
+
+
+async def main():
+    channel = SessionChannel()
+    queue = InputQueue(channel)
+    server = InputServer(queue)
+    http = await asyncio.start_server(server.handle_http, '127.0.0.1', PORT)
+    relay = await asyncio.start_server(channel.handle_session, '127.0.0.1', RELAY_PORT)
+    print(f'Input server listening on port {PORT} (session relay on {RELAY_PORT})')
+    async with http, relay:
+        await asyncio.gather(http.serve_forever(), relay.serve_forever(),
+                             queue.run())
+
 
 if __name__ == '__main__':
-    print(f'Input server listening on port {PORT}')
-    server = http.server.HTTPServer(('127.0.0.1', PORT), InputHandler)
-    server.serve_forever()
+    asyncio.run(main())
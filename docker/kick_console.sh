@@ -21,6 +21,9 @@ pkill -f 'nc 127.0.0.1 2322' || true
 pkill -f 'telnet localhost 2322' || true
 pkill -f 'telnet 127.0.0.1 2322' || true
 
+# The game session's telnet goes through input_server.py's relay
+pkill -f 'telnet localhost 2321' || true
+
 # Kill build_advent.exp processes that may still be holding console
 pkill -f 'expect.*build_advent' || true
 
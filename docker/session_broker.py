@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Session broker for the DZ11 terminal lines.
+
+SIMH attaches 8 DZ11 lines to port 2323 (see pdp11_ra72.ini), and each
+TCP connection there gets the next free line. Rather than everyone
+sharing the console session (and kicking each other off it), players
+connect to the broker on BROKER_PORT. dz_connect.sh does this for the web
+terminal. Each player gets a line of their own. When all lines are busy,
+the player waits in a queue that shows their position and an estimated
+wait.
+
+Each line's output is fed into a ScreenFeed (see input_server.py). An
+HTTP API on HTTP_PORT gives the per-line versions of input_server.py's
+endpoints, so the demo and spectators can be pointed at one player's
+session:
+
+  GET  /status             Lines in use, queue length, estimated wait
+  POST /lines/<n>/send     Keystrokes for line n (screen's escapes work)
+  GET  /lines/<n>/screen   Line n's current screen
+  GET  /lines/<n>/stream   Line n's screen as server-sent events
+
+<n> is the broker's slot number (0-7). /status also shows the DZ line
+that SIMH reported for each slot.
+
+The estimated wait assumes each session lasts as long as the average of
+recent sessions, or DEFAULT_SESSION until some have ended.
+"""
+
+import asyncio
+import re
+import time
+from collections import deque
+
+from input_server import (InputQueue, InputServer, ScreenFeed, pipe,
+                          tune_socket)
+
+DZ_HOST = '127.0.0.1'
+DZ_PORT = 2323
+DZ_LINES = 8                 # set dz lines=8 in pdp11_ra72.ini
+BROKER_PORT = 2330
+HTTP_PORT = 8085
+DEFAULT_SESSION = 15 * 60    # Seconds, until real session lengths are known
+QUEUE_NOTICE = 30            # Seconds between queue position updates
+
+# SIMH greets each connection with the line it was given
+_LINE_BANNER = re.compile(rb'line (\d+)')
+_LINE_PATH = re.compile(r'/lines/(\d+)/(send|screen|stream)$')
+
+
+def format_wait(seconds):
+    minutes = round(seconds / 60)
+    return 'under a minute' if minutes < 1 else f'about {minutes} min'
+
+
+class Line:
+    """One DZ line slot; the channel for its InputQueue."""
+
+    def __init__(self, slot):
+        self.slot = slot
+        self.dz_line = None
+        self.claimed = None    # time.monotonic() when handed out, or None
+        self.peer = None
+        self.writer = None     # StreamWriter to SIMH while a player is on it
+        self.screen = ScreenFeed()
+        self.queue = InputQueue(self)
+
+    @property
+    def connected(self):
+        return self.writer is not None and not self.writer.is_closing()
+
+    async def send(self, data):
+        if not self.connected:
+            raise ConnectionError(f'line {self.slot} has no session')
+        self.writer.write(data)
+        await self.writer.drain()
+        return True
+
+    def tap(self, data):
+        if self.dz_line is None:
+            match = _LINE_BANNER.search(data)
+            if match:
+                self.dz_line = int(match.group(1))
+        self.screen.feed(data)
+
+    def status(self, now):
+        return {
+            'line': self.slot,
+            'dz_line': self.dz_line,
+            'busy': self.claimed is not None,
+            'connected': self.connected,
+            'seconds': round(now - self.claimed) if self.claimed else None,
+            'peer': self.peer,
+        }
+
+
+class Broker:
+    """Hands out lines first come, first served."""
+
+    def __init__(self, count=DZ_LINES):
+        self.lines = [Line(slot) for slot in range(count)]
+        self.waiting = deque()             # Futures of queued players, in order
+        self.durations = deque(maxlen=20)  # Recent session lengths
+
+    def average_session(self):
+        if not self.durations:
+            return DEFAULT_SESSION
+        return sum(self.durations) / len(self.durations)
+
+    def estimated_wait(self, position):
+        """Seconds until the player at `position` (1-based) gets a line."""
+        average = self.average_session()
+        now = time.monotonic()
+        remaining = sorted(max(average - (now - line.claimed), 0)
+                           for line in self.lines if line.claimed is not None)
+        if not remaining:
+            return 0
+        rounds, index = divmod(position - 1, len(remaining))
+        return remaining[index] + rounds * average
+
+    def _claim(self, line, peer):
+        line.claimed = time.monotonic()
+        line.peer = peer
+        line.dz_line = None
+        return line
+
+    def release(self, line, finished=True):
+        """Give the line to the next queued player, or mark it free.
+        `finished` is False if no session actually ran on it."""
+        if finished:
+            self.durations.append(time.monotonic() - line.claimed)
+        line.peer = None
+        while self.waiting:
+            future = self.waiting.popleft()
+            if not future.done():
+                line.claimed = time.monotonic()  # Held for that player
+                future.set_result(line)
+                return
+        line.claimed = None
+
+    async def acquire(self, reader, writer):
+        """Get a line for this player, queueing if need be; None if they
+        disconnect while waiting."""
+        peer = '%s:%s' % writer.get_extra_info('peername', ('?', '?'))[:2]
+        if not self.waiting:
+            for line in self.lines:
+                if line.claimed is None:
+                    return self._claim(line, peer)
+
+        future = asyncio.get_running_loop().create_future()
+        self.waiting.append(future)
+        # Typing while queued is discarded; EOF means the player left
+        gone = asyncio.create_task(reader.read())
+        try:
+            while not future.done():
+                position = self.waiting.index(future) + 1
+                wait = format_wait(self.estimated_wait(position))
+                writer.write(f'\r\nAll {len(self.lines)} lines are busy. You are number '
+                             f'{position} in the queue; estimated wait {wait}.\r\n'
+                             .encode())
+                await writer.drain()
+                await asyncio.wait([future, gone], timeout=QUEUE_NOTICE,
+                                   return_when=asyncio.FIRST_COMPLETED)
+                if gone.done() and not future.done():
+                    future.cancel()
+                    return None
+            line = future.result()
+            if gone.done():
+                self.release(line, finished=False)  # Left as it came free
+                return None
+            return self._claim(line, peer)
+        except (ConnectionError, OSError):
+            if future.done() and not future.cancelled():
+                self.release(future.result(), finished=False)
+            else:
+                future.cancel()
+            return None
+        finally:
+            gone.cancel()
+            if future in self.waiting:
+                self.waiting.remove(future)
+
+    async def handle_player(self, reader, writer):
+        """Connect one player's telnet to a DZ line of their own."""
+        tune_socket(writer)
+        line = await self.acquire(reader, writer)
+        if line is None:
+            writer.close()
+            return
+
+        try:
+            dz_reader, dz = await asyncio.open_connection(DZ_HOST, DZ_PORT)
+        except OSError as e:
+            print(f'Broker: cannot reach DZ lines: {e}')
+            writer.write(b'\r\nThe terminal lines are not available yet.\r\n')
+            self.release(line, finished=False)
+            writer.close()
+            return
+        tune_socket(dz)
+
+        line.writer = dz
+        line.screen.reset()
+        print(f'Broker: {line.peer} on line {line.slot}')
+        tasks = [asyncio.create_task(pipe(reader, dz)),
+                 asyncio.create_task(pipe(dz_reader, writer, line.tap))]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+            line.writer = None
+            dz.close()
+            writer.close()
+            print(f'Broker: {line.peer} left line {line.slot}')
+            self.release(line)
+
+    def status(self):
+        now = time.monotonic()
+        lines = [line.status(now) for line in self.lines]
+        free = sum(not line['busy'] for line in lines)
+        return {
+            'ok': True,
+            'lines': lines,
+            'free': free,
+            'queued': len(self.waiting),
+            'average_session_s': round(self.average_session()),
+            'next_wait_s': 0 if free else round(
+                self.estimated_wait(len(self.waiting) + 1)),
+        }
+
+
+class BrokerServer(InputServer):
+    """The per-line HTTP API, on input_server.py's HTTP front end."""
+
+    def __init__(self, broker):
+        self.broker = broker
+
+    async def _route(self, method, path, body, writer, keep_alive):
+        if method == 'GET' and path == '/status':
+            await self._respond(writer, 200, self.broker.status(), keep_alive)
+            return keep_alive
+
+        match = _LINE_PATH.match(path)
+        if not match or int(match.group(1)) >= len(self.broker.lines):
+            await self._respond(writer, 404, None, keep_alive)
+            return keep_alive
+        line = self.broker.lines[int(match.group(1))]
+        action = match.group(2)
+
+        if method == 'POST' and action == 'send':
+            status, result = await self._send(line.queue, body)
+            await self._respond(writer, status, result, keep_alive)
+        elif method == 'GET' and action == 'screen':
+            screen = line.screen.text() if line.connected else None
+            await self._respond(writer, 200, {'screen': screen}, keep_alive)
+        elif method == 'GET' and action == 'stream':
+            await self._stream_screen(writer, line.screen)
+            return False
+        else:
+            await self._respond(writer, 404, None, keep_alive)
+        return keep_alive
+
+
+async def main():
+    broker = Broker()
+    server = BrokerServer(broker)
+    players = await asyncio.start_server(broker.handle_player, '127.0.0.1', BROKER_PORT)
+    http = await asyncio.start_server(server.handle_http, '127.0.0.1', HTTP_PORT)
+    print(f'Session broker: {len(broker.lines)} DZ lines on port {BROKER_PORT}, '
+          f'API on port {HTTP_PORT}')
+    async with players, http:
+        await asyncio.gather(players.serve_forever(), http.serve_forever(),
+                             *(line.queue.run() for line in broker.lines))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
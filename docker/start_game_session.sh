@@ -30,9 +30,16 @@ sleep 1
 while [ $RETRY_COUNT -lt $MAX_RETRIES ] && [ $CONNECTED -eq 0 ]; do
     echo ">>> Connection attempt $((RETRY_COUNT + 1))/$MAX_RETRIES..."
 
+    # Connect through input_server.py's relay when it is up, so keystrokes
+    # can be written straight to the console socket; otherwise go direct
+    CONSOLE_PORT=2322
+    if nc -z localhost 2321 2>/dev/null; then
+        CONSOLE_PORT=2321
+    fi
+
     # Create detached screen session with telnet
     # Set terminal size to 80x24 (authentic VT100 dimensions)
-    screen -dmS advent bash -c "stty cols 80 rows 24; exec telnet localhost 2322"
+    screen -dmS advent bash -c "stty cols 80 rows 24; exec telnet localhost $CONSOLE_PORT"
 
     # Wait for connection
     sleep 3
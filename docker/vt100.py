@@ -0,0 +1,258 @@
+"""
+Minimal VT100 screen model for the game session.
+
+input_server.py feeds it the bytes the SIMH console sends to the game
+session's telnet, so the current screen is always in memory and can be
+read without `screen -X hardcopy`.
+
+It understands what RSTS/E and ADVENT send: printable text with
+autowrap, CR/LF/BS/TAB, cursor movement, erase in line/display,
+scrolling regions, insert/delete line and character, save/restore
+cursor, and it skips telnet negotiation (IAC ...) and SGR attributes.
+Anything else is ignored.
+"""
+
+ROWS = 24
+COLS = 80
+
+IAC = 0xFF
+SB = 0xFA
+SE = 0xF0
+WILL, WONT, DO, DONT = 0xFB, 0xFC, 0xFD, 0xFE
+
+# Parser states
+GROUND, ESCAPE, CSI, CHARSET, STRING, IAC_CMD, IAC_OPT, IAC_SB = range(8)
+
+
+class VT100:
+    """Screen contents and cursor, updated by feed()."""
+
+    def __init__(self, rows=ROWS, cols=COLS):
+        self.rows = rows
+        self.cols = cols
+        self.reset()
+
+    def reset(self):
+        self.lines = [[' '] * self.cols for _ in range(self.rows)]
+        self.x = 0
+        self.y = 0
+        self.wrap_pending = False
+        self.top = 0
+        self.bottom = self.rows - 1
+        self.saved = (0, 0)
+        self.state = GROUND
+        self.params = ''
+        self.string_escape = False
+
+    def line(self, row):
+        return ''.join(self.lines[row]).rstrip()
+
+    def display(self):
+        """Screen rows as strings, trailing blanks removed."""
+        return [self.line(row) for row in range(self.rows)]
+
+    def text(self):
+        """The screen as one string, like a stripped hardcopy."""
+        return '\n'.join(self.display()).strip()
+
+    def feed(self, data):
+        """Process bytes received from the console."""
+        for byte in data:
+            state = self.state
+            if state == GROUND:
+                if byte == IAC:
+                    self.state = IAC_CMD
+                elif byte == 0x1B:
+                    self.state = ESCAPE
+                elif byte < 0x20 or byte == 0x7F:
+                    self._control(byte)
+                else:
+                    # Bytes are Latin-1; 8-bit controls do not occur here
+                    self._print(chr(byte))
+            elif state == ESCAPE:
+                self._escape(byte)
+            elif state == CSI:
+                if 0x40 <= byte <= 0x7E:
+                    self.state = GROUND
+                    self._csi(chr(byte), self.params)
+                elif byte == 0x18 or byte == 0x1A:  # CAN/SUB abort
+                    self.state = GROUND
+                elif byte >= 0x20:
+                    self.params += chr(byte)
+            elif state == CHARSET:
+                self.state = GROUND  # Character set designator: ignored
+            elif state == STRING:
+                # OSC/DCS/...: skip up to BEL or ST (ESC \)
+                if byte == 0x07 or (self.string_escape and byte == 0x5C):
+                    self.state = GROUND
+                self.string_escape = byte == 0x1B
+            elif state == IAC_CMD:
+                if byte == IAC:
+                    self.state = GROUND
+                    self._print(chr(byte))
+                elif byte in (WILL, WONT, DO, DONT):
+                    self.state = IAC_OPT
+                elif byte == SB:
+                    self.state = IAC_SB
+                    self.string_escape = False
+                else:
+                    self.state = GROUND
+            elif state == IAC_OPT:
+                self.state = GROUND
+            elif state == IAC_SB:
+                if self.string_escape and byte == SE:
+                    self.state = GROUND
+                self.string_escape = byte == IAC
+
+    def _control(self, byte):
+        if byte == 0x0D:
+            self.x = 0
+            self.wrap_pending = False
+        elif byte in (0x0A, 0x0B, 0x0C):
+            self._index()
+        elif byte == 0x08:
+            if self.x > 0:
+                self.x -= 1
+            self.wrap_pending = False
+        elif byte == 0x09:
+            self.x = min(self.cols - 1, (self.x // 8 + 1) * 8)
+            self.wrap_pending = False
+        # BEL, NUL, SO/SI, DEL: nothing to draw
+
+    def _escape(self, byte):
+        char = chr(byte)
+        self.state = GROUND
+        if char == '[':
+            self.state = CSI
+            self.params = ''
+        elif char in '()*+':
+            self.state = CHARSET
+        elif char in ']PX^_':
+            self.state = STRING
+            self.string_escape = False
+        elif char == 'D':
+            self._index()
+        elif char == 'E':
+            self.x = 0
+            self._index()
+        elif char == 'M':
+            self._reverse_index()
+        elif char == '7':
+            self.saved = (self.x, self.y)
+        elif char == '8':
+            self.x, self.y = self.saved
+            self.wrap_pending = False
+        elif char == 'c':
+            self.reset()
+
+    def _csi(self, final, params):
+        if params.startswith(('?', '>', '=')):
+            return  # Private modes (cursor keys, autowrap ...): ignored
+        args = [int(p) if p.isdigit() else 0 for p in params.split(';')]
+        n = max(args[0], 1)
+        self.wrap_pending = False
+
+        if final == 'A':
+            self.y = max(self.top if self.y >= self.top else 0, self.y - n)
+        elif final == 'B':
+            self.y = min(self.bottom if self.y <= self.bottom else self.rows - 1,
+                         self.y + n)
+        elif final == 'C':
+            self.x = min(self.cols - 1, self.x + n)
+        elif final == 'D':
+            self.x = max(0, self.x - n)
+        elif final in 'Hf':
+            row = args[0] if args else 0
+            col = args[1] if len(args) > 1 else 0
+            self.y = min(self.rows - 1, max(row, 1) - 1)
+            self.x = min(self.cols - 1, max(col, 1) - 1)
+        elif final == 'G':
+            self.x = min(self.cols - 1, n - 1)
+        elif final == 'd':
+            self.y = min(self.rows - 1, n - 1)
+        elif final == 'J':
+            self._erase_display(args[0])
+        elif final == 'K':
+            self._erase_line(args[0])
+        elif final == 'r':
+            top = args[0] if args else 0
+            bottom = args[1] if len(args) > 1 else 0
+            top = max(top, 1) - 1
+            bottom = (bottom or self.rows) - 1
+            if top < bottom < self.rows:
+                self.top, self.bottom = top, bottom
+                self.x, self.y = 0, 0
+        elif final == 'L':
+            if self.top <= self.y <= self.bottom:
+                for _ in range(min(n, self.bottom - self.y + 1)):
+                    del self.lines[self.bottom]
+                    self.lines.insert(self.y, [' '] * self.cols)
+        elif final == 'M':
+            if self.top <= self.y <= self.bottom:
+                for _ in range(min(n, self.bottom - self.y + 1)):
+                    del self.lines[self.y]
+                    self.lines.insert(self.bottom, [' '] * self.cols)
+        elif final == 'P':
+            row = self.lines[self.y]
+            n = min(n, self.cols - self.x)
+            row[self.x:] = row[self.x + n:] + [' '] * n
+        elif final == '@':
+            row = self.lines[self.y]
+            n = min(n, self.cols - self.x)
+            row[self.x:] = [' '] * n + row[self.x:self.cols - n]
+        elif final == 'X':
+            row = self.lines[self.y]
+            for col in range(self.x, min(self.cols, self.x + n)):
+                row[col] = ' '
+        elif final == 's':
+            self.saved = (self.x, self.y)
+        elif final == 'u':
+            self.x, self.y = self.saved
+        # 'm' (attributes), 'h'/'l' (modes), 'n' (reports) ...: ignored
+
+    def _print(self, char):
+        if self.wrap_pending:
+            self.x = 0
+            self._index()
+            self.wrap_pending = False
+        self.lines[self.y][self.x] = char
+        if self.x == self.cols - 1:
+            self.wrap_pending = True
+        else:
+            self.x += 1
+
+    def _index(self):
+        """Move down a line, scrolling the region at its bottom margin."""
+        self.wrap_pending = False
+        if self.y == self.bottom:
+            del self.lines[self.top]
+            self.lines.insert(self.bottom, [' '] * self.cols)
+        elif self.y < self.rows - 1:
+            self.y += 1
+
+    def _reverse_index(self):
+        self.wrap_pending = False
+        if self.y == self.top:
+            del self.lines[self.bottom]
+            self.lines.insert(self.top, [' '] * self.cols)
+        elif self.y > 0:
+            self.y -= 1
+
+    def _erase_line(self, mode):
+        row = self.lines[self.y]
+        start, end = {0: (self.x, self.cols), 1: (0, self.x + 1)}.get(
+            mode, (0, self.cols))
+        for col in range(start, end):
+            row[col] = ' '
+
+    def _erase_display(self, mode):
+        if mode == 0:
+            self._erase_line(0)
+            rows = range(self.y + 1, self.rows)
+        elif mode == 1:
+            self._erase_line(1)
+            rows = range(0, self.y)
+        else:
+            rows = range(self.rows)
+        for row in rows:
+            self.lines[row] = [' '] * self.cols
@@ -12,6 +12,10 @@
     let ttsVoice = null;
     let ambientAudio = null;
 
+    // Page opened with ?line=<n>: play that DZ line instead of the console
+    const lineParam = new URLSearchParams(window.location.search).get('line');
+    const LINE_QUERY = lineParam === null ? '' : '?line=' + encodeURIComponent(lineParam);
+
     /**
      * Start ambient audio using a visible player first, then hide it
      */
@@ -163,7 +167,7 @@
         if (!aiRunning) return;
 
         try {
-            const response = await fetch('/api/next');
+            const response = await fetch('/api/next' + LINE_QUERY);
             const data = await response.json();
 
             if (data.error) {
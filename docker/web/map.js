@@ -1,17 +1,31 @@
 /**
  * ADVENT MUD Dungeon Map Explorer
  * Interactive map showing all rooms and their connections
+ *
+ * Only the topology index (exits and flags, a few KB) is loaded when the
+ * map opens. Descriptions live in 100-room shards that are fetched when a
+ * room or list row needs them, and the room list renders only the rows
+ * that are scrolled into view.
+ *
+ * The grid view draws rooms at their layout coordinates (see
+ * scripts/advent_data/spatial.py). The tile index lists the rooms in each
+ * tile, so a frame only looks at the tiles that overlap the viewport.
  */
 
 (function() {
     'use strict';
 
     const mapModal = document.getElementById('map-modal');
-    const roomSelect = document.getElementById('room-select');
+    const roomList = document.getElementById('room-list');
+    const roomListSpacer = document.getElementById('room-list-spacer');
+    const roomSearch = document.getElementById('room-search');
     const roomNumberEl = document.getElementById('room-number');
     const roomDescEl = document.getElementById('room-description');
     const roomExitsEl = document.getElementById('room-exits');
     const mapStatsEl = document.getElementById('map-stats');
+    const routeTargetEl = document.getElementById('route-target');
+    const roomRouteEl = document.getElementById('room-route');
+    const mapGrid = document.getElementById('map-grid');
 
     let mapData = null;
     let currentRoom = null;
@@ -23,93 +37,389 @@
         'W': 'West'
     };
 
+    const EXIT_DIRS = ['N', 'E', 'S', 'W'];
+    const MAP_MAGIC = 'AMAP';
+    const MAP_VERSION = 3;
+    const MAP_HEADER_SIZE = 28;
+    const MAP_NO_EXIT = 0xFFFF;
+    const MAP_FLAG_REACHABLE = 0x01;
+    const MAP_FLAG_RECONSTRUCTED = 0x10;
+    const SHARD_URL = '/data/dungeon_map.rooms/';
+    const ROUTES_URL = '/data/dungeon_map.routes.bin';
+    const ROUTES_MAGIC = 'AROU';
+    const ROUTES_VERSION = 1;
+    const ROUTES_HEADER_SIZE = 16;
+    const ROUTES_UNREACHABLE = 0xFFFF;
+    const TILES_URL = '/data/dungeon_map.tiles.json';
+
+    const ROW_HEIGHT = 26;    // Must match .room-list-row height
+    const ROW_OVERSCAN = 10;  // Extra rows rendered above and below
+
+    const CELL_SIZE = 24;     // Grid view pixels per layout cell
+    const ROOM_SIZE = 14;     // Side of a room's square in the grid view
+    const DRAG_THRESHOLD = 4; // Pixels a press may move and still be a click
+
+    // Descriptions fetched so far, and shard fetches in flight
+    const descriptions = new Map();
+    const shardRequests = new Map();
+
+    // Landmark tables for routing, fetched on the first route request
+    let routeTables = null;
+
+    // Tile index ({tile_size, bounds, tiles: {"tx,ty": [room, ...]}}),
+    // fetched when the map opens, and the grid cell at the view's centre
+    let tileIndex = null;
+    let gridCenter = null;
+
+    /**
+     * Decode dungeon_map.bin (see scripts/advent_data/mapfile.py). The
+     * arrays are little-endian and aligned, so they are used as typed
+     * arrays without copying.
+     */
+    function decodeMapBinary(buffer) {
+        const header = new DataView(buffer, 0, MAP_HEADER_SIZE);
+        const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+        if (magic !== MAP_MAGIC || header.getUint16(4, true) !== MAP_VERSION) {
+            throw new Error('Unsupported map format');
+        }
+        const count = header.getUint32(8, true);
+
+        let pos = MAP_HEADER_SIZE;
+        const numbers = new Uint16Array(buffer, pos, count);
+        pos += 2 * count;
+        const exits = new Uint16Array(buffer, pos, 4 * count);
+        pos += 8 * count;
+        const flags = new Uint8Array(buffer, pos, count);
+        pos += count + count % 2;
+        const xs = new Int16Array(buffer, pos, count);
+        const ys = new Int16Array(buffer, pos + 2 * count, count);
+
+        return {
+            count: count,
+            startRoom: header.getUint32(12, true),
+            totalChanges: header.getUint32(16, true),
+            shardSize: header.getUint32(20, true),
+            reachableCount: header.getUint32(24, true),
+            numbers: numbers,
+            exits: exits,
+            flags: flags,
+            xs: xs,
+            ys: ys
+        };
+    }
+
+    /**
+     * Build the same structure from dungeon_map.json (fallback). All
+     * descriptions are in the JSON, so they go straight into the cache.
+     */
+    function decodeMapJson(json) {
+        const rooms = Object.values(json.rooms).sort((a, b) => a.number - b.number);
+        const count = rooms.length;
+        const numbers = new Uint16Array(count);
+        const exits = new Uint16Array(4 * count).fill(MAP_NO_EXIT);
+        const flags = new Uint8Array(count);
+        const xs = new Int16Array(count);
+        const ys = new Int16Array(count);
+        let reachableCount = 0;
+
+        rooms.forEach((room, i) => {
+            numbers[i] = room.number;
+            xs[i] = room.x || 0;
+            ys[i] = room.y || 0;
+            const allExits = room.all_exits || room.exits || {};
+            const reconstructed = room.reconstructed_exits || {};
+            EXIT_DIRS.forEach((dir, j) => {
+                if (dir in allExits) exits[4 * i + j] = allExits[dir];
+                if (dir in reconstructed) flags[i] |= MAP_FLAG_RECONSTRUCTED << j;
+            });
+            if (room.reachable) {
+                flags[i] |= MAP_FLAG_REACHABLE;
+                reachableCount++;
+            }
+            descriptions.set(room.number, room.description || '');
+        });
+
+        if (json.layout) tileIndex = json.layout;
+
+        return {
+            count: count,
+            startRoom: json.start_room,
+            totalChanges: (json.metadata && json.metadata.total_changes) || 0,
+            shardSize: 0,
+            reachableCount: reachableCount,
+            numbers: numbers,
+            exits: exits,
+            flags: flags,
+            xs: xs,
+            ys: ys
+        };
+    }
+
+    /**
+     * Fetch the topology index, falling back to the full JSON map
+     */
+    async function fetchMapData() {
+        try {
+            const response = await fetch('/data/dungeon_map.bin');
+            if (response.ok) {
+                return decodeMapBinary(await response.arrayBuffer());
+            }
+        } catch (err) {
+            console.warn('Binary map unavailable, using JSON:', err);
+        }
+        const response = await fetch('/data/dungeon_map.json');
+        if (!response.ok) throw new Error('Map data not found');
+        return decodeMapJson(await response.json());
+    }
+
     /**
      * Load map data from server
      */
     async function loadMapData() {
         try {
-            const response = await fetch('/data/dungeon_map.json');
-            if (!response.ok) throw new Error('Map data not found');
-            mapData = await response.json();
-            populateRoomSelect();
+            mapData = await fetchMapData();
+            initRoomList();
             updateStats();
+            await loadTileIndex();
             return true;
         } catch (err) {
             console.error('Failed to load map data:', err);
-            roomSelect.innerHTML = '<option value="">Error loading map</option>';
+            roomList.textContent = 'Error loading map';
             return false;
         }
     }
 
     /**
-     * Populate the room select dropdown
+     * Fetch the tile index for the grid view; without one the view stays
+     * hidden (the JSON fallback already set it from the map's layout)
      */
-    function populateRoomSelect() {
-        if (!mapData) return;
-
-        const rooms = Object.values(mapData.rooms).sort((a, b) => a.number - b.number);
-        roomSelect.innerHTML = '';
+    async function loadTileIndex() {
+        if (!tileIndex) {
+            try {
+                const response = await fetch(TILES_URL);
+                if (response.ok) tileIndex = await response.json();
+            } catch (err) {
+                console.warn('Tile index unavailable, no grid view:', err);
+            }
+        }
+        if (tileIndex && mapGrid) initGrid();
+    }
 
-        for (const room of rooms) {
-            const opt = document.createElement('option');
-            opt.value = room.number;
+    /**
+     * Position of a room in the index (binary search), or -1
+     */
+    function indexOfRoom(roomNum) {
+        const numbers = mapData.numbers;
+        let lo = 0;
+        let hi = numbers.length - 1;
+        while (lo <= hi) {
+            const mid = (lo + hi) >> 1;
+            if (numbers[mid] === roomNum) return mid;
+            if (numbers[mid] < roomNum) lo = mid + 1;
+            else hi = mid - 1;
+        }
+        return -1;
+    }
 
-            // Create a short label from the description
-            let label = `Room ${room.number}`;
-            if (room.description) {
-                const shortDesc = room.description.substring(0, 40);
-                label += ` - ${shortDesc}${room.description.length > 40 ? '...' : ''}`;
+    /**
+     * Exits and flags of one room, built from the typed arrays on demand
+     */
+    function roomInfo(roomNum) {
+        const i = indexOfRoom(roomNum);
+        if (i < 0) return null;
+
+        const allExits = {};
+        const reconstructedExits = {};
+        EXIT_DIRS.forEach((dir, j) => {
+            const dest = mapData.exits[4 * i + j];
+            if (dest === MAP_NO_EXIT) return;
+            allExits[dir] = dest;
+            if (mapData.flags[i] & (MAP_FLAG_RECONSTRUCTED << j)) {
+                reconstructedExits[dir] = dest;
             }
+        });
+
+        return {
+            number: roomNum,
+            all_exits: allExits,
+            reconstructed_exits: reconstructedExits,
+            reachable: Boolean(mapData.flags[i] & MAP_FLAG_REACHABLE),
+            x: mapData.xs[i],
+            y: mapData.ys[i]
+        };
+    }
 
-            // Mark starting room
-            if (room.number === mapData.start_room) {
+    function shardOf(roomNum) {
+        return Math.floor(roomNum / mapData.shardSize);
+    }
+
+    /**
+     * Fetch the description shard holding a room (once per shard)
+     */
+    function loadShard(roomNum) {
+        if (descriptions.has(roomNum) || !mapData.shardSize) {
+            return Promise.resolve();
+        }
+        const shard = shardOf(roomNum);
+        if (!shardRequests.has(shard)) {
+            const request = fetch(`${SHARD_URL}${shard}.json`)
+                .then(response => {
+                    if (!response.ok) throw new Error(`Shard ${shard} not found`);
+                    return response.json();
+                })
+                .then(data => {
+                    for (const [num, desc] of Object.entries(data.rooms)) {
+                        descriptions.set(parseInt(num), desc);
+                    }
+                })
+                .catch(err => {
+                    // Rooms in this shard are shown without descriptions
+                    console.error('Failed to load room descriptions:', err);
+                });
+            shardRequests.set(shard, request);
+        }
+        return shardRequests.get(shard);
+    }
+
+    function loadDescriptions(roomNums) {
+        return Promise.all(roomNums.map(loadShard));
+    }
+
+    function truncate(text, length) {
+        return text.length > length ? `${text.substring(0, length)}...` : text;
+    }
+
+    /**
+     * Set up the virtualized room list
+     */
+    function initRoomList() {
+        roomListSpacer.style.height = `${mapData.count * ROW_HEIGHT}px`;
+        roomList.addEventListener('scroll', scheduleRoomListRender);
+        window.addEventListener('resize', scheduleRoomListRender);
+
+        roomSearch.addEventListener('keydown', e => {
+            if (e.key === 'Enter') goToSearchedRoom();
+        });
+        roomSearch.addEventListener('change', goToSearchedRoom);
+    }
+
+    function goToSearchedRoom() {
+        const num = parseInt(roomSearch.value);
+        if (num && indexOfRoom(num) >= 0) displayRoom(num);
+    }
+
+    let renderPending = false;
+
+    function scheduleRoomListRender() {
+        if (renderPending) return;
+        renderPending = true;
+        requestAnimationFrame(() => {
+            renderPending = false;
+            renderRoomList();
+        });
+    }
+
+    /**
+     * Render only the rows in (or near) the visible part of the list
+     */
+    function renderRoomList() {
+        if (!mapData) return;
+
+        const first = Math.max(0, Math.floor(roomList.scrollTop / ROW_HEIGHT) - ROW_OVERSCAN);
+        const visible = Math.ceil(roomList.clientHeight / ROW_HEIGHT) + 2 * ROW_OVERSCAN;
+        const last = Math.min(mapData.count, first + visible);
+
+        const fragment = document.createDocumentFragment();
+        const missing = [];
+        for (let i = first; i < last; i++) {
+            const num = mapData.numbers[i];
+            const row = document.createElement('div');
+            row.className = 'room-list-row';
+            row.style.top = `${i * ROW_HEIGHT}px`;
+
+            let label = `Room ${num}`;
+            if (descriptions.has(num)) {
+                const desc = descriptions.get(num);
+                if (desc) label += ` - ${truncate(desc, 40)}`;
+            } else if (mapData.shardSize && !shardRequests.has(shardOf(num))) {
+                missing.push(num);
+            }
+            if (num === mapData.startRoom) {
                 label = `* ${label} (START)`;
+                row.classList.add('start');
             }
+            if (num === currentRoom) row.classList.add('active');
 
-            opt.textContent = label;
-            roomSelect.appendChild(opt);
+            row.textContent = label;
+            row.addEventListener('click', () => displayRoom(num));
+            fragment.appendChild(row);
         }
 
-        roomSelect.addEventListener('change', () => {
-            const num = parseInt(roomSelect.value);
-            if (num) displayRoom(num);
-        });
+        roomListSpacer.replaceChildren(fragment);
+
+        if (missing.length) {
+            loadDescriptions(missing).then(scheduleRoomListRender);
+        }
+    }
+
+    /**
+     * Scroll the list so a room's row is visible
+     */
+    function scrollRoomIntoView(roomNum) {
+        const top = indexOfRoom(roomNum) * ROW_HEIGHT;
+        if (top < roomList.scrollTop ||
+            top + ROW_HEIGHT > roomList.scrollTop + roomList.clientHeight) {
+            roomList.scrollTop = top - (roomList.clientHeight - ROW_HEIGHT) / 2;
+        }
+        scheduleRoomListRender();
     }
 
     /**
      * Display a room's information
      */
-    function displayRoom(roomNum) {
-        if (!mapData || !mapData.rooms[roomNum]) return;
+    async function displayRoom(roomNum) {
+        if (!mapData) return;
+        const room = roomInfo(roomNum);
+        if (!room) return;
 
         currentRoom = roomNum;
-        const room = mapData.rooms[roomNum];
+        roomSearch.value = roomNum;
+        roomRouteEl.innerHTML = '';
+        scrollRoomIntoView(roomNum);
 
         // Update room number
         let numText = `Room ${roomNum}`;
-        if (roomNum === mapData.start_room) {
+        if (roomNum === mapData.startRoom) {
             numText += ' (Starting Room)';
         }
+        numText += ` - grid ${room.x}, ${room.y}`;
         roomNumberEl.textContent = numText;
+        centerGrid(room.x, room.y);
+
+        const needed = [roomNum, ...Object.values(room.all_exits).filter(dest => dest > 0)];
+        if (!needed.every(num => descriptions.has(num))) {
+            roomDescEl.textContent = 'Loading...';
+            roomExitsEl.innerHTML = '';
+            await loadDescriptions(needed);
+            if (currentRoom !== roomNum) return;  // Moved on meanwhile
+        }
 
         // Update description
-        roomDescEl.textContent = room.description || '(No description)';
+        roomDescEl.textContent = descriptions.get(roomNum) || '(No description)';
 
         // Update exits
         roomExitsEl.innerHTML = '';
 
-        const exitDirs = ['N', 'E', 'S', 'W'];
-        for (const dir of exitDirs) {
+        for (const dir of EXIT_DIRS) {
             const exitDiv = document.createElement('div');
             exitDiv.className = 'exit-item';
 
             const dest = room.all_exits[dir];
-            const isReconstructed = room.reconstructed_exits && room.reconstructed_exits[dir];
-            const isOriginal = room.original_exits && room.original_exits[dir];
+            const isReconstructed = room.reconstructed_exits[dir];
 
             if (dest && dest > 0) {
-                const destRoom = mapData.rooms[dest];
-                const destDesc = destRoom ? destRoom.description.substring(0, 30) : 'Unknown';
+                const destExists = indexOfRoom(dest) >= 0;
+                const destDesc = destExists ? truncate(descriptions.get(dest) || '', 30) : 'Unknown';
 
                 exitDiv.innerHTML = `
                     <span class="exit-dir">${DIR_NAMES[dir]}:</span>
@@ -117,9 +427,10 @@
                        onclick="goToRoom(${dest}); return false;">
                         Room ${dest}
                     </a>
-                    <span class="exit-dest-desc">${destDesc}${destRoom && destRoom.description.length > 30 ? '...' : ''}</span>
+                    <span class="exit-dest-desc"></span>
                     ${isReconstructed ? '<span class="exit-reconstructed">(reconstructed)</span>' : ''}
                 `;
+                exitDiv.querySelector('.exit-dest-desc').textContent = destDesc;
             } else if (dest === 0) {
                 exitDiv.innerHTML = `
                     <span class="exit-dir">${DIR_NAMES[dir]}:</span>
@@ -134,26 +445,352 @@
 
             roomExitsEl.appendChild(exitDiv);
         }
+    }
 
-        // Update select
-        roomSelect.value = roomNum;
+    /**
+     * Set up the grid view: drag to pan, click a room to show it
+     */
+    function initGrid() {
+        mapGrid.classList.remove('hidden');
+        let press = null;
+
+        mapGrid.addEventListener('pointerdown', e => {
+            press = { x: e.clientX, y: e.clientY, center: gridCenter, moved: false };
+            mapGrid.setPointerCapture(e.pointerId);
+        });
+        mapGrid.addEventListener('pointermove', e => {
+            if (!press || !press.center) return;
+            const dx = e.clientX - press.x;
+            const dy = e.clientY - press.y;
+            if (Math.abs(dx) + Math.abs(dy) > DRAG_THRESHOLD) press.moved = true;
+            if (press.moved) {
+                gridCenter = [press.center[0] - dx / CELL_SIZE,
+                              press.center[1] - dy / CELL_SIZE];
+                scheduleGridRender();
+            }
+        });
+        mapGrid.addEventListener('pointerup', e => {
+            if (press && !press.moved) {
+                const rect = mapGrid.getBoundingClientRect();
+                const roomNum = roomAtPoint(e.clientX - rect.left, e.clientY - rect.top);
+                if (roomNum) displayRoom(roomNum);
+            }
+            press = null;
+        });
+        window.addEventListener('resize', scheduleGridRender);
+    }
+
+    function centerGrid(x, y) {
+        gridCenter = [x, y];
+        scheduleGridRender();
+    }
+
+    let gridRenderPending = false;
+
+    function scheduleGridRender() {
+        if (gridRenderPending || !tileIndex || !mapGrid) return;
+        gridRenderPending = true;
+        requestAnimationFrame(() => {
+            gridRenderPending = false;
+            renderGrid();
+        });
+    }
+
+    /**
+     * The visible part of the grid, in layout cells, and the rooms in it
+     * (only the tiles that overlap it are looked at)
+     */
+    function visibleGrid() {
+        const cols = mapGrid.clientWidth / CELL_SIZE;
+        const rows = mapGrid.clientHeight / CELL_SIZE;
+        const view = {
+            minX: gridCenter[0] - cols / 2,
+            minY: gridCenter[1] - rows / 2,
+            maxX: gridCenter[0] + cols / 2,
+            maxY: gridCenter[1] + rows / 2
+        };
+
+        const size = tileIndex.tile_size;
+        const rooms = [];
+        for (let ty = Math.floor(view.minY / size); ty <= Math.floor(view.maxY / size); ty++) {
+            for (let tx = Math.floor(view.minX / size); tx <= Math.floor(view.maxX / size); tx++) {
+                for (const roomNum of tileIndex.tiles[`${tx},${ty}`] || []) {
+                    const i = indexOfRoom(roomNum);
+                    if (i >= 0 && mapData.xs[i] >= view.minX - 1 && mapData.xs[i] <= view.maxX + 1 &&
+                        mapData.ys[i] >= view.minY - 1 && mapData.ys[i] <= view.maxY + 1) {
+                        rooms.push(roomNum);
+                    }
+                }
+            }
+        }
+        return { view: view, rooms: rooms };
+    }
+
+    function gridPoint(view, x, y) {
+        return [(x - view.minX) * CELL_SIZE, (y - view.minY) * CELL_SIZE];
+    }
+
+    /**
+     * Draw the rooms of the visible tiles and their exits
+     */
+    function renderGrid() {
+        if (!mapData || !gridCenter) return;
+
+        const ratio = window.devicePixelRatio || 1;
+        const width = mapGrid.clientWidth;
+        const height = mapGrid.clientHeight;
+        if (mapGrid.width !== width * ratio || mapGrid.height !== height * ratio) {
+            mapGrid.width = width * ratio;
+            mapGrid.height = height * ratio;
+        }
+        const ctx = mapGrid.getContext('2d');
+        ctx.setTransform(ratio, 0, 0, ratio, 0, 0);
+        ctx.clearRect(0, 0, width, height);
+
+        const { view, rooms } = visibleGrid();
+        const offsets = { N: [0, -1], E: [1, 0], S: [0, 1], W: [-1, 0] };
+
+        // Exits first, so the rooms are drawn over them. An exit to a
+        // neighbouring cell is a line to it; one that leads further away
+        // (the layout could not place the rooms side by side) is a stub.
+        ctx.lineWidth = 2;
+        for (const roomNum of rooms) {
+            const i = indexOfRoom(roomNum);
+            if (i < 0) continue;
+            const [x, y] = gridPoint(view, mapData.xs[i], mapData.ys[i]);
+            EXIT_DIRS.forEach((dir, j) => {
+                const dest = mapData.exits[4 * i + j];
+                if (dest === MAP_NO_EXIT || dest === 0) return;
+                const k = indexOfRoom(dest);
+                if (k < 0) return;
+                const reconstructed = mapData.flags[i] & (MAP_FLAG_RECONSTRUCTED << j);
+                ctx.strokeStyle = reconstructed ? '#ffaa00' : '#33ff33';
+                let [endX, endY] = gridPoint(view, mapData.xs[k], mapData.ys[k]);
+                if (Math.abs(mapData.xs[k] - mapData.xs[i]) +
+                    Math.abs(mapData.ys[k] - mapData.ys[i]) !== 1) {
+                    endX = x + offsets[dir][0] * CELL_SIZE / 2;
+                    endY = y + offsets[dir][1] * CELL_SIZE / 2;
+                }
+                ctx.beginPath();
+                ctx.moveTo(x, y);
+                ctx.lineTo(endX, endY);
+                ctx.stroke();
+            });
+        }
+
+        for (const roomNum of rooms) {
+            const i = indexOfRoom(roomNum);
+            if (i < 0) continue;
+            const [x, y] = gridPoint(view, mapData.xs[i], mapData.ys[i]);
+            if (roomNum === mapData.startRoom) ctx.fillStyle = '#ff6666';
+            else if (mapData.flags[i] & MAP_FLAG_REACHABLE) ctx.fillStyle = '#224422';
+            else ctx.fillStyle = '#332211';
+            ctx.fillRect(x - ROOM_SIZE / 2, y - ROOM_SIZE / 2, ROOM_SIZE, ROOM_SIZE);
+            if (roomNum === currentRoom) {
+                ctx.strokeStyle = '#ffffff';
+                ctx.strokeRect(x - ROOM_SIZE / 2, y - ROOM_SIZE / 2, ROOM_SIZE, ROOM_SIZE);
+            }
+        }
+    }
+
+    /**
+     * The room drawn at a point of the grid view, or null
+     */
+    function roomAtPoint(px, py) {
+        if (!gridCenter) return null;
+        const { view } = visibleGrid();
+        const x = Math.round(view.minX + px / CELL_SIZE);
+        const y = Math.round(view.minY + py / CELL_SIZE);
+        const tile = tileIndex.tiles[
+            `${Math.floor(x / tileIndex.tile_size)},${Math.floor(y / tileIndex.tile_size)}`] || [];
+        return tile.find(num => {
+            const i = indexOfRoom(num);
+            return mapData.xs[i] === x && mapData.ys[i] === y;
+        }) || null;
+    }
+
+    /**
+     * Decode dungeon_map.routes.bin (see scripts/advent_data/routing.py).
+     * Tables are in the same room order as the topology index.
+     */
+    function decodeRoutes(buffer) {
+        const header = new DataView(buffer, 0, ROUTES_HEADER_SIZE);
+        const magic = String.fromCharCode(...new Uint8Array(buffer, 0, 4));
+        if (magic !== ROUTES_MAGIC || header.getUint16(4, true) !== ROUTES_VERSION) {
+            throw new Error('Unsupported route format');
+        }
+        const count = header.getUint32(8, true);
+        const landmarks = header.getUint32(12, true);
+        if (count !== mapData.count) throw new Error('Route tables do not match map');
+
+        let pos = ROUTES_HEADER_SIZE + 2 * landmarks + 2 * count;
+        const fromLandmark = [];
+        const toLandmark = [];
+        for (const tables of [fromLandmark, toLandmark]) {
+            for (let l = 0; l < landmarks; l++) {
+                tables.push(new Uint16Array(buffer, pos, count));
+                pos += 2 * count;
+            }
+        }
+        return { fromLandmark: fromLandmark, toLandmark: toLandmark };
+    }
+
+    function loadRoutes() {
+        if (!routeTables) {
+            routeTables = fetch(ROUTES_URL)
+                .then(response => {
+                    if (!response.ok) throw new Error('Route data not found');
+                    return response.arrayBuffer();
+                })
+                .then(decodeRoutes)
+                .catch(err => {
+                    routeTables = null;
+                    throw err;
+                });
+        }
+        return routeTables;
+    }
+
+    /**
+     * Minimal binary heap of arrays ordered by their first element
+     */
+    function heapPush(heap, item) {
+        heap.push(item);
+        let i = heap.length - 1;
+        while (i > 0) {
+            const parent = (i - 1) >> 1;
+            if (heap[parent][0] <= item[0]) break;
+            heap[i] = heap[parent];
+            i = parent;
+        }
+        heap[i] = item;
+    }
+
+    function heapPop(heap) {
+        const top = heap[0];
+        const last = heap.pop();
+        if (heap.length) {
+            let i = 0;
+            for (;;) {
+                let child = 2 * i + 1;
+                if (child >= heap.length) break;
+                if (child + 1 < heap.length && heap[child + 1][0] < heap[child][0]) child++;
+                if (heap[child][0] >= last[0]) break;
+                heap[i] = heap[child];
+                i = child;
+            }
+            heap[i] = last;
+        }
+        return top;
+    }
+
+    /**
+     * A* with landmark lower bounds (same search as RouteIndex in Python).
+     * Returns [[direction, room], ...] or null if there is no route.
+     */
+    function findRoute(tables, sourceNum, targetNum) {
+        const source = indexOfRoom(sourceNum);
+        const target = indexOfRoom(targetNum);
+        if (source < 0 || target < 0) return null;
+
+        const landmarks = tables.fromLandmark.map((from, l) => [
+            from, tables.toLandmark[l], from[target], tables.toLandmark[l][target]
+        ]);
+        const bound = i => {
+            let best = 0;
+            for (const [from, to, fromTarget, toTarget] of landmarks) {
+                if (fromTarget !== ROUTES_UNREACHABLE && from[i] !== ROUTES_UNREACHABLE) {
+                    best = Math.max(best, fromTarget - from[i]);
+                }
+                if (toTarget !== ROUTES_UNREACHABLE && to[i] !== ROUTES_UNREACHABLE) {
+                    best = Math.max(best, to[i] - toTarget);
+                }
+            }
+            return best;
+        };
+
+        const cost = new Int32Array(mapData.count).fill(-1);
+        const previous = new Int32Array(mapData.count).fill(-1);
+        const previousDir = new Uint8Array(mapData.count);
+        const heap = [[bound(source), source, 0]];
+        cost[source] = 0;
+
+        while (heap.length) {
+            const [, i, reached] = heapPop(heap);
+            if (i === target) break;
+            if (reached > cost[i]) continue;  // Stale entry
+            const moves = reached + 1;
+            for (let j = 0; j < 4; j++) {
+                const dest = mapData.exits[4 * i + j];
+                if (dest === MAP_NO_EXIT || dest === 0) continue;
+                const k = indexOfRoom(dest);
+                if (k < 0 || (cost[k] >= 0 && cost[k] <= moves)) continue;
+                cost[k] = moves;
+                previous[k] = i;
+                previousDir[k] = j;
+                heapPush(heap, [moves + bound(k), k, moves]);
+            }
+        }
+
+        if (cost[target] < 0) return null;
+        const steps = [];
+        for (let i = target; i !== source; i = previous[i]) {
+            steps.push([EXIT_DIRS[previousDir[i]], mapData.numbers[i]]);
+        }
+        return steps.reverse();
     }
 
+    /**
+     * Show the shortest route from the current room to the requested one
+     */
+    async function showRoute() {
+        const targetNum = parseInt(routeTargetEl.value);
+        const sourceNum = currentRoom;
+        if (!mapData || !sourceNum || !targetNum) return;
+        if (indexOfRoom(targetNum) < 0) {
+            roomRouteEl.textContent = `Room ${targetNum} does not exist`;
+            return;
+        }
+
+        roomRouteEl.textContent = 'Finding route...';
+        let steps;
+        try {
+            steps = findRoute(await loadRoutes(), sourceNum, targetNum);
+        } catch (err) {
+            console.error('Failed to load route data:', err);
+            roomRouteEl.textContent = 'Route data unavailable';
+            return;
+        }
+        if (currentRoom !== sourceNum) return;  // Moved on meanwhile
+
+        if (!steps) {
+            roomRouteEl.textContent = `No route from room ${sourceNum} to room ${targetNum}`;
+            return;
+        }
+        const links = steps.map(([dir, room]) =>
+            `${dir}&nbsp;<a href="#" class="exit-link" onclick="goToRoom(${room}); return false;">${room}</a>`);
+        roomRouteEl.innerHTML = `
+            <strong>Route to room ${targetNum}: ${steps.length} moves</strong>
+            <div class="route-steps">${links.join(' &rarr; ')}</div>
+        `;
+    }
+
+    routeTargetEl?.addEventListener('keydown', e => {
+        if (e.key === 'Enter') showRoute();
+    });
+    routeTargetEl?.addEventListener('change', showRoute);
+
     /**
      * Update statistics display
      */
     function updateStats() {
         if (!mapData || !mapStatsEl) return;
 
-        const totalRooms = Object.keys(mapData.rooms).length;
-        const reachableRooms = Object.values(mapData.rooms).filter(r => r.reachable).length;
-        const totalChanges = mapData.metadata.total_changes || 0;
-
         mapStatsEl.innerHTML = `
             <strong>Dungeon Statistics:</strong>
-            ${totalRooms} rooms total |
-            ${reachableRooms} reachable from start |
-            ${totalChanges} reconstructed connections
+            ${mapData.count} rooms total |
+            ${mapData.reachableCount} reachable from start |
+            ${mapData.totalChanges} reconstructed connections
         `;
     }
 
@@ -174,7 +811,7 @@
         }
 
         mapModal.classList.remove('hidden');
-        displayRoom(mapData.start_room);
+        displayRoom(mapData.startRoom);
         return false;
     };
 
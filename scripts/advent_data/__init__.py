@@ -0,0 +1,33 @@
+"""
+Shared access to the ADVENT binary data files.
+
+ADVENT.DTA, ADVENT.MON, ADVENT.CHR, BOARD.NTC and MESSAG.NPC are opened
+with mmap and read through lazy record views (memoryview + struct), so
+loading the whole dungeon does not copy it, and read-modify-write tools
+only dirty the pages they change.
+
+    from advent_data import RoomFile
+
+    with RoomFile('build/data/ADVENT.DTA') as dta:
+        rooms = dta.rooms()
+        print(rooms[2].description, rooms[2].exits)
+"""
+
+from .boards import BoardFile
+from .graph import RoomGraph
+from .layout import DIR_NAMES, DIRECTIONS, OPPOSITE
+from .mapfile import decode_map, encode_map, encode_shards, write_map
+from .monsters import (Monster, MonsterFile, MonsterRecord, pack_monster,
+                       write_monster_file)
+from .records import CharacterFile, MessageFile, RecordFile
+from .rooms import RoomFile, RoomRecord
+from .routing import RouteIndex
+from .spatial import place_rooms, tile_index
+
+__all__ = [
+    'BoardFile', 'CharacterFile', 'DIR_NAMES', 'DIRECTIONS', 'MessageFile',
+    'Monster', 'MonsterFile', 'MonsterRecord', 'OPPOSITE', 'RecordFile',
+    'RoomFile', 'RoomGraph', 'RoomRecord', 'RouteIndex', 'decode_map',
+    'encode_map', 'encode_shards', 'pack_monster', 'place_rooms',
+    'tile_index', 'write_map', 'write_monster_file',
+]
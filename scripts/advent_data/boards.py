@@ -0,0 +1,50 @@
+"""
+BOARD.NTC noticeboards.
+
+The file starts with INDEX%(0-511), the room number of each board as a
+16-bit little-endian word, followed by one 512-byte BOARD$ entry per
+indexed room in the same order.
+"""
+
+from .layout import (BOARD_ENTRY_SIZE, BOARD_INDEX_ENTRY, BOARD_INDEX_SIZE,
+                     BOARD_INDEX_SLOTS)
+from .records import RecordFile
+
+_HEADER_RECORDS = BOARD_INDEX_SIZE // BOARD_ENTRY_SIZE
+
+
+class BoardFile(RecordFile):
+    """BOARD.NTC, memory-mapped. Boards are numbered by INDEX slot."""
+
+    def __init__(self, path, **kwargs):
+        super().__init__(path, BOARD_ENTRY_SIZE,
+                         first_record=-_HEADER_RECORDS, **kwargs)
+
+    @property
+    def board_count(self):
+        """Number of BOARD$ entries present after the index."""
+        return max(self.record_count - _HEADER_RECORDS, 0)
+
+    def index_entry(self, slot):
+        """Room number stored in INDEX%(slot)."""
+        return BOARD_INDEX_ENTRY.unpack_from(
+            self._view, slot * BOARD_INDEX_ENTRY.size)[0]
+
+    def set_index_entry(self, slot, room):
+        BOARD_INDEX_ENTRY.pack_into(self._view, slot * BOARD_INDEX_ENTRY.size,
+                                    room)
+
+    def index(self):
+        """Iterate (slot, room_number) over the whole INDEX% array."""
+        for slot in range(BOARD_INDEX_SLOTS):
+            yield slot, self.index_entry(slot)
+
+    def board(self, slot):
+        """Return a memoryview of the BOARD$ entry for INDEX slot `slot`."""
+        return self.record(slot)
+
+    def set_board_text(self, slot, text):
+        data = text.encode('ascii', errors='replace')[:BOARD_ENTRY_SIZE]
+        entry = self.board(slot)
+        entry[:len(data)] = data
+        entry[len(data):] = bytes(BOARD_ENTRY_SIZE - len(data))
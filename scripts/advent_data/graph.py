@@ -0,0 +1,203 @@
+"""
+Compact room connectivity index.
+
+RoomGraph stores the exit graph in CSR form: for room r, the rooms its
+exits lead to are targets[offsets[r]:offsets[r + 1]], and the directions
+of those exits (as DIRECTIONS indexes) are at the same positions of
+edge_dirs. A second CSR holds the reversed edges. Room numbers are used
+directly as node ids (they are 16-bit), so no dictionaries are involved
+in traversal.
+
+Only exits to existing rooms are edges; exits to room 0 (leave the
+dungeon) and to missing rooms are left out.
+"""
+
+from array import array
+from collections import deque
+
+from .layout import DIRECTIONS
+
+
+def _csr(size, edges):
+    """Build (offsets, targets, labels) from (source, target, label) edges."""
+    counts = array('I', bytes(4 * (size + 1)))
+    for source, _, _ in edges:
+        counts[source + 1] += 1
+    for i in range(1, size + 1):
+        counts[i] += counts[i - 1]
+    offsets = counts
+    targets = array('H', bytes(2 * len(edges)))
+    labels = bytearray(len(edges))
+    fill = array('I', offsets[:-1])
+    for source, target, label in edges:
+        targets[fill[source]] = target
+        labels[fill[source]] = label
+        fill[source] += 1
+    return offsets, targets, labels
+
+
+class RoomGraph:
+    """Directed exit graph over room numbers.
+
+    Args:
+        exits: {room_number: {direction: destination}} for every room
+    """
+
+    def __init__(self, exits):
+        self.rooms = array('H', sorted(exits))
+        self.size = (self.rooms[-1] + 1) if self.rooms else 1
+        self.present = bytearray(self.size)
+        for room in self.rooms:
+            self.present[room] = 1
+
+        edges = []
+        for room in self.rooms:
+            room_exits = exits[room]
+            for i, direction in enumerate(DIRECTIONS):
+                dest = room_exits.get(direction)
+                if dest and dest < self.size and self.present[dest]:
+                    edges.append((room, dest, i))
+
+        self.edge_count = len(edges)
+        self.offsets, self.targets, self.edge_dirs = _csr(self.size, edges)
+        (self.reverse_offsets, self.reverse_targets,
+         self.reverse_edge_dirs) = _csr(
+            self.size, [(dest, room, i) for room, dest, i in edges])
+
+    @classmethod
+    def from_rooms(cls, rooms):
+        """Build from {number: RoomRecord}, or anything with .exits."""
+        return cls({num: room.exits for num, room in rooms.items()})
+
+    def __contains__(self, room):
+        return 0 <= room < self.size and self.present[room] == 1
+
+    def __len__(self):
+        return len(self.rooms)
+
+    def successors(self, room):
+        """Rooms reachable in one move from `room`."""
+        return self.targets[self.offsets[room]:self.offsets[room + 1]]
+
+    def predecessors(self, room):
+        """Rooms with an exit leading into `room`."""
+        return self.reverse_targets[
+            self.reverse_offsets[room]:self.reverse_offsets[room + 1]]
+
+    def exits(self, room):
+        """(direction, destination) pairs for the edges out of `room`."""
+        return [(DIRECTIONS[self.edge_dirs[i]], self.targets[i])
+                for i in range(self.offsets[room], self.offsets[room + 1])]
+
+    def distances(self, start, reverse=False):
+        """BFS from `start`; an array of moves per room, -1 if unreachable.
+
+        With reverse=True edges are followed backwards, giving the number
+        of moves from each room *to* `start`.
+        """
+        dist = array('i', [-1]) * self.size
+        if start not in self:
+            return dist
+        if reverse:
+            offsets, targets = self.reverse_offsets, self.reverse_targets
+        else:
+            offsets, targets = self.offsets, self.targets
+        dist[start] = 0
+        queue = deque([start])
+        while queue:
+            current = queue.popleft()
+            step = dist[current] + 1
+            for i in range(offsets[current], offsets[current + 1]):
+                dest = targets[i]
+                if dist[dest] < 0:
+                    dist[dest] = step
+                    queue.append(dest)
+        return dist
+
+    def reachable(self, start):
+        """Set of rooms reachable from `start` (including it)."""
+        dist = self.distances(start)
+        return {room for room in self.rooms if dist[room] >= 0}
+
+    def connected_components(self):
+        """Clusters of rooms linked by exits in either direction.
+
+        Returns sorted room lists, ordered by their lowest room number.
+        """
+        seen = bytearray(self.size)
+        components = []
+        for start in self.rooms:
+            if seen[start]:
+                continue
+            seen[start] = 1
+            component = [start]
+            queue = deque([start])
+            while queue:
+                current = queue.popleft()
+                for neighbours in (self.successors(current),
+                                   self.predecessors(current)):
+                    for dest in neighbours:
+                        if not seen[dest]:
+                            seen[dest] = 1
+                            component.append(dest)
+                            queue.append(dest)
+            component.sort()
+            components.append(component)
+        return components
+
+    def strongly_connected_components(self):
+        """Sets of rooms that can all reach each other (iterative Tarjan).
+
+        Returns sorted room lists, ordered by their lowest room number.
+        """
+        index = array('i', [-1]) * self.size
+        low = array('i', [0]) * self.size
+        on_stack = bytearray(self.size)
+        stack = []
+        components = []
+        counter = 0
+        offsets, targets = self.offsets, self.targets
+
+        for root in self.rooms:
+            if index[root] >= 0:
+                continue
+            # Each frame is (room, next edge position)
+            work = [(root, offsets[root])]
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+
+            while work:
+                room, pos = work[-1]
+                if pos < offsets[room + 1]:
+                    work[-1] = (room, pos + 1)
+                    dest = targets[pos]
+                    if index[dest] < 0:
+                        index[dest] = low[dest] = counter
+                        counter += 1
+                        stack.append(dest)
+                        on_stack[dest] = 1
+                        work.append((dest, offsets[dest]))
+                    elif on_stack[dest] and index[dest] < low[room]:
+                        low[room] = index[dest]
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if low[room] < low[parent]:
+                        low[parent] = low[room]
+                if low[room] == index[room]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        component.append(member)
+                        if member == room:
+                            break
+                    component.sort()
+                    components.append(component)
+
+        components.sort(key=lambda c: c[0])
+        return components
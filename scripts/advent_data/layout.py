@@ -0,0 +1,75 @@
+"""
+Record layouts for the ADVENT binary data files.
+
+These are the byte layouts the BASIC-PLUS-2 code expects. All tools that
+read or write the data files take their offsets and sizes from here so
+they cannot drift apart again.
+
+ADVENT.DTA (2000 x 512 bytes, BASIC RECORD n = file offset (n-1)*512):
+- Byte 0: Validation byte = room_num & 0xFF
+  (ADVNOR.SUB checks CHR$(ROOM%(USER%))=ROOM$; ADVENT.B2S uses room_num-1,
+  but navigation wins)
+- Bytes 1-16: Exits - 4 slots of 4 bytes
+  - Byte 0: Direction letter (N/S/E/W) or space if no exit
+  - Bytes 1-2: Room number as 16-bit big-endian (CVT$% byte order)
+  - Byte 3: Padding (0)
+  ADVNOR.SUB searches the slots for the direction letter, so the slot a
+  direction lives in does not matter to the game. New files use N,S,E,W.
+- Bytes 17-99: People/NPCs
+- Bytes 100-199: Objects
+- Bytes 200-511: Description, terminated by '$', then special codes
+
+ADVENT.MON (10000 x 20 bytes, indexed by room number from 0):
+- attack, defense, hp, damage (16-bit LE), special (6 bytes),
+  xp, flags, padding (16-bit LE)
+
+ADVENT.CHR (100 x 512 bytes): character saves
+BOARD.NTC: INDEX%(0-511) as 16-bit LE room numbers, then 512 bytes per board
+MESSAG.NPC (1000 x 60 bytes): NPC shout messages
+"""
+
+import struct
+
+# ADVENT.DTA
+ROOM_RECORD_SIZE = 512
+ROOM_RECORD_COUNT = 2000
+ROOM_FIRST_RECORD = 1  # BASIC RECORD numbers start at 1
+
+DIRECTIONS = ('N', 'E', 'S', 'W')          # Display order
+EXIT_SLOT_ORDER = ('N', 'S', 'E', 'W')     # Slot order for new records
+OPPOSITE = {'N': 'S', 'E': 'W', 'S': 'N', 'W': 'E'}
+DIR_NAMES = {'N': 'North', 'E': 'East', 'S': 'South', 'W': 'West'}
+
+EXIT_OFFSET = 1
+EXIT_SLOT = struct.Struct('>cHx')          # letter, destination, padding
+EXIT_SLOTS = 4
+EXIT_BLOCK_SIZE = EXIT_SLOT.size * EXIT_SLOTS
+MAX_ROOM_NUMBER = 0xFFFF                   # Destinations are 16-bit
+
+PEOPLE_OFFSET = 17
+PEOPLE_SIZE = 83
+OBJECTS_OFFSET = 100
+OBJECTS_SIZE = 100
+DESCRIPTION_OFFSET = 200
+DESCRIPTION_SIZE = 312
+DESCRIPTION_TERMINATOR = b'$'
+
+# ADVENT.MON
+MONSTER_RECORD_SIZE = 20
+MONSTER_RECORD_COUNT = 10000
+MONSTER_RECORD = struct.Struct('<hhhh6shhh')  # last field is padding
+
+# ADVENT.CHR
+CHARACTER_RECORD_SIZE = 512
+CHARACTER_RECORD_COUNT = 100
+
+# BOARD.NTC
+BOARD_INDEX_SLOTS = 512
+BOARD_INDEX_ENTRY = struct.Struct('<H')
+BOARD_INDEX_SIZE = BOARD_INDEX_SLOTS * BOARD_INDEX_ENTRY.size
+BOARD_ENTRY_SIZE = 512
+BOARD_RECORD_COUNT = 512  # Size of an empty file, in 512-byte blocks
+
+# MESSAG.NPC
+MESSAGE_RECORD_SIZE = 60
+MESSAGE_RECORD_COUNT = 1000
@@ -0,0 +1,225 @@
+"""
+Web map export.
+
+The map viewer (docker/web/map.js) needs each room's exits and a few
+flags up front, and descriptions only for the rooms it shows. Besides the
+full JSON map we therefore write:
+
+- <name>.bin: the topology index, a compact binary file (below)
+- <name>.rooms/<n>.json: description shards, {"rooms": {number: text}}
+  for rooms n*MAP_SHARD_SIZE up to (n+1)*MAP_SHARD_SIZE - 1
+- <name>.tiles.json: the grid layout's tile index (see spatial.py), when
+  the map has a 'layout'; map.js draws only the tiles in its grid view
+- <name>.routes.bin: landmark distance tables (see routing.py), when a
+  RouteIndex is passed in
+
+plus gzip copies of everything for nginx's gzip_static. Files are only
+rewritten when their contents change, so ETags stay put across rebuilds
+that produce the same map.
+
+Topology index layout (little-endian, laid out so each array can be read
+as a JS typed array in place):
+- Header: MAP_HEADER (magic, version, room count, start room,
+  total changes, shard size, reachable room count)
+- Room numbers: uint16 x count, ascending
+- Exits: uint16 x 4 per room in DIRECTIONS order; MAP_NO_EXIT if there
+  is none, 0 for "exit the dungeon"
+- Flags: uint8 x count (MAP_FLAG_*), then padding to a multiple of 2
+- Grid x, then grid y: int16 x count each (0 if the map has no layout);
+  encode_map() raises ValueError for coordinates outside that range
+"""
+
+import gzip
+import json
+import struct
+import sys
+from array import array
+from pathlib import Path
+
+from .layout import DIRECTIONS
+
+MAP_MAGIC = b'AMAP'
+MAP_VERSION = 3
+MAP_HEADER = struct.Struct('<4sHxxIIIII')
+MAP_NO_EXIT = 0xFFFF
+MAP_SHARD_SIZE = 100
+GRID_MIN, GRID_MAX = -0x8000, 0x7FFF  # int16 grid coordinates
+
+MAP_FLAG_REACHABLE = 0x01
+MAP_FLAG_OBJECTS = 0x02
+MAP_FLAG_NPCS = 0x04
+MAP_FLAG_RECONSTRUCTED = 0x10  # Shifted left by the direction's index
+
+
+def _room_exits(room):
+    """Exits of a map room entry (reconstruct or analyze schema)."""
+    return room.get('all_exits', room.get('exits', {}))
+
+
+def encode_map(map_data, shard_size=MAP_SHARD_SIZE):
+    """Pack the topology index of a map JSON document into bytes."""
+    rooms = sorted(map_data['rooms'].values(), key=lambda r: r['number'])
+
+    numbers = array('H')
+    exits = array('H')
+    flags = bytearray()
+    xs = array('h')
+    ys = array('h')
+
+    for room in rooms:
+        numbers.append(room['number'])
+        room_exits = _room_exits(room)
+        reconstructed = room.get('reconstructed_exits', {})
+        room_flags = 0
+        if room.get('reachable'):
+            room_flags |= MAP_FLAG_REACHABLE
+        if room.get('has_objects'):
+            room_flags |= MAP_FLAG_OBJECTS
+        if room.get('has_npcs'):
+            room_flags |= MAP_FLAG_NPCS
+        for i, direction in enumerate(DIRECTIONS):
+            exits.append(room_exits.get(direction, MAP_NO_EXIT))
+            if direction in reconstructed:
+                room_flags |= MAP_FLAG_RECONSTRUCTED << i
+        flags.append(room_flags)
+        x, y = room.get('x', 0), room.get('y', 0)
+        if not (GRID_MIN <= x <= GRID_MAX and GRID_MIN <= y <= GRID_MAX):
+            raise ValueError(f"room {room['number']}: grid position ({x}, {y})"
+                             f" does not fit the map file's int16 coordinates")
+        xs.append(x)
+        ys.append(y)
+
+    if sys.byteorder != 'little':
+        for arr in (numbers, exits, xs, ys):
+            arr.byteswap()
+
+    header = MAP_HEADER.pack(
+        MAP_MAGIC, MAP_VERSION, len(rooms), map_data.get('start_room', 0),
+        map_data.get('metadata', {}).get('total_changes', 0), shard_size,
+        sum(flags_byte & MAP_FLAG_REACHABLE for flags_byte in flags))
+    flags += bytes(len(flags) % 2)
+    return b''.join((header, numbers.tobytes(), exits.tobytes(), flags,
+                     xs.tobytes(), ys.tobytes()))
+
+
+def encode_shards(map_data, shard_size=MAP_SHARD_SIZE):
+    """Split the descriptions into {shard number: shard JSON bytes}."""
+    shards = {}
+    for room in map_data['rooms'].values():
+        number = room['number']
+        shard = shards.setdefault(number // shard_size, {})
+        shard[str(number)] = room.get('description') or ''
+    return {
+        index: json.dumps({'rooms': dict(sorted(rooms.items(),
+                                                key=lambda r: int(r[0])))},
+                          separators=(',', ':')).encode('utf-8')
+        for index, rooms in shards.items()
+    }
+
+
+def decode_map(data, shards=None):
+    """Unpack encode_map() output into the viewer's JSON shape.
+
+    Descriptions are filled in from `shards` ({shard number: shard JSON
+    bytes}) when given, and left empty otherwise.
+    """
+    (magic, version, count, start_room, total_changes, shard_size,
+     _) = MAP_HEADER.unpack_from(data)
+    if magic != MAP_MAGIC or version != MAP_VERSION:
+        raise ValueError(f"not a version {MAP_VERSION} map file")
+
+    pos = MAP_HEADER.size
+    numbers = struct.unpack_from(f'<{count}H', data, pos)
+    pos += 2 * count
+    exits = struct.unpack_from(f'<{4 * count}H', data, pos)
+    pos += 8 * count
+    flags = data[pos:pos + count]
+    pos += count + count % 2
+    xs = struct.unpack_from(f'<{count}h', data, pos)
+    ys = struct.unpack_from(f'<{count}h', data, pos + 2 * count)
+
+    descriptions = {}
+    for shard in (shards or {}).values():
+        descriptions.update(json.loads(shard)['rooms'])
+
+    rooms = {}
+    for i, number in enumerate(numbers):
+        all_exits = {}
+        reconstructed = {}
+        for j, direction in enumerate(DIRECTIONS):
+            dest = exits[4 * i + j]
+            if dest != MAP_NO_EXIT:
+                all_exits[direction] = dest
+                if flags[i] & (MAP_FLAG_RECONSTRUCTED << j):
+                    reconstructed[direction] = dest
+        rooms[str(number)] = {
+            'number': number,
+            'description': descriptions.get(str(number), ''),
+            'all_exits': all_exits,
+            'reconstructed_exits': reconstructed,
+            'reachable': bool(flags[i] & MAP_FLAG_REACHABLE),
+            'has_objects': bool(flags[i] & MAP_FLAG_OBJECTS),
+            'has_npcs': bool(flags[i] & MAP_FLAG_NPCS),
+            'x': xs[i],
+            'y': ys[i],
+        }
+
+    return {
+        'metadata': {'total_rooms': count, 'total_changes': total_changes},
+        'start_room': start_room,
+        'rooms': rooms,
+    }
+
+
+def _write_if_changed(path, data):
+    """Write `data` unless the file already holds exactly that."""
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    path.write_bytes(data)
+    return True
+
+
+def _gzip(data):
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def write_map(map_data, path, routes=None):
+    """Write the map as minified JSON at `path`, the topology index beside
+    it (.bin), description shards in a .rooms directory, the tile index
+    (.tiles.json), the route tables of `routes` (.routes.bin) and .gz
+    copies of all of them.
+
+    Returns the paths that were (re)written.
+    """
+    path = Path(path)
+    binary_path = path.with_suffix('.bin')
+    shard_dir = path.with_suffix('.rooms')
+    shard_dir.mkdir(exist_ok=True)
+
+    files = {
+        path: json.dumps(map_data, separators=(',', ':')).encode('utf-8'),
+        binary_path: encode_map(map_data),
+    }
+    for index, shard in encode_shards(map_data).items():
+        files[shard_dir / f'{index}.json'] = shard
+    if 'layout' in map_data:
+        files[path.with_suffix('.tiles.json')] = json.dumps(
+            map_data['layout'], separators=(',', ':')).encode('utf-8')
+    if routes is not None:
+        files[path.with_suffix('.routes.bin')] = routes.encode()
+
+    outputs = {}
+    for file_path, data in files.items():
+        outputs[file_path] = data
+        outputs[file_path.with_name(file_path.name + '.gz')] = _gzip(data)
+
+    # Shards for room ranges that no longer exist
+    for stale in shard_dir.iterdir():
+        if stale not in outputs:
+            stale.unlink()
+
+    return [p for p, data in outputs.items() if _write_if_changed(p, data)]
@@ -0,0 +1,98 @@
+"""
+ADVENT.MON monster spawn records.
+
+Only a few hundred of the 10000 slots are ever populated, so the file is
+written sparse (the empty slots are holes) and read by scanning for
+non-zero bytes rather than decoding every slot.
+"""
+
+import re
+from collections import namedtuple
+
+from .layout import MONSTER_RECORD, MONSTER_RECORD_COUNT, MONSTER_RECORD_SIZE
+from .records import RecordFile
+
+_EMPTY = bytes(MONSTER_RECORD_SIZE)
+_NONZERO = re.compile(rb'[^\x00]')
+
+Monster = namedtuple('Monster',
+                     'attack defense hp damage special xp flag')
+
+
+def pack_monster(attack, defense, hp, damage, special, xp, flag):
+    """Return the 20-byte record for one monster."""
+    special_bytes = special.encode('ascii', errors='replace')[:6]
+    return MONSTER_RECORD.pack(attack, defense, hp, damage,
+                               special_bytes, xp, flag, 0)
+
+
+class MonsterRecord:
+    """View of one 20-byte monster slot."""
+
+    __slots__ = ('slot', 'buf')
+
+    def __init__(self, slot, buf):
+        self.slot = slot
+        self.buf = buf
+
+    @property
+    def empty(self):
+        return self.buf == _EMPTY
+
+    def unpack(self):
+        """Decode the slot into a Monster."""
+        (attack, defense, hp, damage, special,
+         xp, flag, _) = MONSTER_RECORD.unpack(self.buf)
+        return Monster(attack, defense, hp, damage,
+                       special.rstrip(b'\x00').decode('ascii', errors='replace'),
+                       xp, flag)
+
+
+class MonsterFile(RecordFile):
+    """ADVENT.MON, memory-mapped. Slot N holds the monster for room N."""
+
+    def __init__(self, path, **kwargs):
+        super().__init__(path, MONSTER_RECORD_SIZE, first_record=0, **kwargs)
+
+    def monster(self, slot):
+        return MonsterRecord(slot, self.record(slot))
+
+    def __iter__(self):
+        for slot in self.numbers():
+            yield self.monster(slot)
+
+    def populated(self):
+        """Iterate over the non-empty slots only.
+
+        Runs of empty slots are skipped by a regex scan over the mapping,
+        so empty slots are never sliced or decoded.
+        """
+        if self._map is None:
+            return
+        end = self.record_count * MONSTER_RECORD_SIZE
+        pos = 0
+        while True:
+            match = _NONZERO.search(self._map, pos, end)
+            if match is None:
+                return
+            slot = match.start() // MONSTER_RECORD_SIZE
+            yield self.monster(slot)
+            pos = (slot + 1) * MONSTER_RECORD_SIZE
+
+
+def write_monster_file(path, records, record_count=MONSTER_RECORD_COUNT):
+    """Write ADVENT.MON sparsely.
+
+    The file is truncated to its full size, leaving holes that read back
+    as zeros, and only the populated records are written.
+
+    Args:
+        path: Output file
+        records: {slot: 20-byte record}
+        record_count: Total number of slots in the file
+    """
+    with open(path, 'wb') as f:
+        f.truncate(record_count * MONSTER_RECORD_SIZE)
+        for slot in sorted(records):
+            f.seek(slot * MONSTER_RECORD_SIZE)
+            f.write(records[slot])
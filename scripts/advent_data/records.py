@@ -0,0 +1,110 @@
+"""
+Memory-mapped fixed-length record files.
+
+A RecordFile maps the whole file and hands out memoryview slices of it,
+so looking at a record never copies it. Writable files are mapped
+shared, so only the pages that are actually modified get written back.
+"""
+
+import mmap
+from pathlib import Path
+
+from .layout import (CHARACTER_RECORD_SIZE, MESSAGE_RECORD_SIZE)
+
+
+class RecordFile:
+    """A file of fixed-length records, addressed by record number.
+
+    Args:
+        path: File to map
+        record_size: Bytes per record
+        first_record: Number of the record at file offset 0 (BASIC files
+            number their records from 1)
+        writable: Map the file shared so changes go back to disk
+        copy_on_write: Map the file privately; changes stay in memory
+            (used for dry runs)
+    """
+
+    def __init__(self, path, record_size, first_record=0, writable=False,
+                 copy_on_write=False):
+        self.path = Path(path)
+        self.record_size = record_size
+        self.first_record = first_record
+        self.writable = writable
+
+        self._file = open(self.path, 'r+b' if writable else 'rb')
+        if writable:
+            access = mmap.ACCESS_WRITE
+        elif copy_on_write:
+            access = mmap.ACCESS_COPY
+        else:
+            access = mmap.ACCESS_READ
+
+        size = self._file.seek(0, 2)
+        if size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=access)
+            self._view = memoryview(self._map)
+        else:
+            # mmap refuses zero-length files
+            self._map = None
+            self._view = memoryview(b'')
+
+        self.record_count = len(self._view) // record_size
+
+    def __len__(self):
+        return self.record_count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __contains__(self, number):
+        index = number - self.first_record
+        return 0 <= index < self.record_count
+
+    def record(self, number):
+        """Return a memoryview of record `number` (no copy)."""
+        index = number - self.first_record
+        if not 0 <= index < self.record_count:
+            raise IndexError(f"record {number} out of range")
+        offset = index * self.record_size
+        return self._view[offset:offset + self.record_size]
+
+    def numbers(self):
+        """Iterate over all record numbers in the file."""
+        return range(self.first_record, self.first_record + self.record_count)
+
+    def flush(self):
+        """Write modified pages back to disk."""
+        if self._map is not None and self.writable:
+            self._map.flush()
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.flush()
+        self._view.release()
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # Record views are still alive; the mapping goes away
+                # when the last of them is garbage collected.
+                pass
+        self._file.close()
+
+
+class CharacterFile(RecordFile):
+    """ADVENT.CHR - character saves."""
+
+    def __init__(self, path, **kwargs):
+        super().__init__(path, CHARACTER_RECORD_SIZE, first_record=1, **kwargs)
+
+
+class MessageFile(RecordFile):
+    """MESSAG.NPC - NPC shout messages."""
+
+    def __init__(self, path, **kwargs):
+        super().__init__(path, MESSAGE_RECORD_SIZE, first_record=1, **kwargs)
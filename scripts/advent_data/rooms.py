@@ -0,0 +1,196 @@
+"""
+ADVENT.DTA room records.
+
+RoomRecord is a thin view over 512 bytes of any buffer - a mapped
+ADVENT.DTA, or a bytearray being built by migrate_data.py. Fields are
+decoded on access; nothing is copied up front.
+"""
+
+from .layout import (
+    DESCRIPTION_OFFSET, DESCRIPTION_SIZE, DESCRIPTION_TERMINATOR, DIRECTIONS,
+    EXIT_OFFSET, EXIT_SLOT, EXIT_SLOT_ORDER, EXIT_SLOTS, MAX_ROOM_NUMBER,
+    OBJECTS_OFFSET, OBJECTS_SIZE, PEOPLE_OFFSET, PEOPLE_SIZE,
+    ROOM_FIRST_RECORD, ROOM_RECORD_SIZE,
+)
+from .records import RecordFile
+
+_DIRECTION_BYTES = {d: d.encode('ascii') for d in DIRECTIONS}
+_NO_EXIT = EXIT_SLOT.pack(b' ', 0)
+_BLANK_RECORD = bytes(ROOM_RECORD_SIZE)
+
+# Everything except printable ASCII and the line breaks we turn into '\n'
+_UNPRINTABLE = bytes(b for b in range(256) if not 32 <= b < 127 and b != 10)
+
+
+def _text(view):
+    """Decode a NUL-padded text field."""
+    return bytes(view).decode('ascii', errors='ignore').rstrip('\x00')
+
+
+def _encode(text, size):
+    return text.encode('ascii', errors='replace')[:size]
+
+
+class RoomRecord:
+    """View of one 512-byte room record.
+
+    Args:
+        number: Room number (BASIC record number)
+        buf: Writable or read-only buffer of exactly ROOM_RECORD_SIZE bytes
+    """
+
+    __slots__ = ('number', 'buf')
+
+    def __init__(self, number, buf):
+        self.number = number
+        self.buf = buf
+
+    @property
+    def validation(self):
+        return self.buf[0]
+
+    @property
+    def valid(self):
+        """True if the validation byte matches and the record is in use."""
+        return (self.number > 0 and
+                self.buf[0] == self.number & 0xFF and
+                self.buf != _BLANK_RECORD)
+
+    # -- Exits -----------------------------------------------------------
+
+    def _slots(self):
+        return EXIT_SLOT.iter_unpack(
+            self.buf[EXIT_OFFSET:EXIT_OFFSET + EXIT_SLOT.size * EXIT_SLOTS])
+
+    @property
+    def exits(self):
+        """Exits as {direction: destination}, 0 meaning exit the dungeon."""
+        found = {}
+        for letter, dest in self._slots():
+            direction = letter.decode('latin-1')
+            if direction in _DIRECTION_BYTES and direction not in found:
+                found[direction] = dest
+        return {d: found[d] for d in DIRECTIONS if d in found}
+
+    def exit(self, direction):
+        """Destination for `direction`, or None if there is no exit."""
+        letter = _DIRECTION_BYTES[direction]
+        for slot_letter, dest in self._slots():
+            if slot_letter == letter:
+                return dest
+        return None
+
+    def _slot_for(self, direction):
+        """Pick the slot a direction is (or should be) stored in."""
+        letters = [letter for letter, _ in self._slots()]
+        letter = _DIRECTION_BYTES[direction]
+        if letter in letters:
+            return letters.index(letter)
+        preferred = EXIT_SLOT_ORDER.index(direction)
+        if letters[preferred].decode('latin-1') not in _DIRECTION_BYTES:
+            return preferred
+        for slot, other in enumerate(letters):
+            if other.decode('latin-1') not in _DIRECTION_BYTES:
+                return slot
+        raise ValueError(f"room {self.number} has no free exit slot")
+
+    def set_exit(self, direction, destination):
+        """Point `direction` at `destination` (16-bit room number)."""
+        if not 0 <= destination <= MAX_ROOM_NUMBER:
+            raise ValueError(f"destination {destination} does not fit in 16 bits")
+        slot = self._slot_for(direction)
+        EXIT_SLOT.pack_into(self.buf, EXIT_OFFSET + slot * EXIT_SLOT.size,
+                            _DIRECTION_BYTES[direction], destination)
+
+    def clear_exit(self, direction):
+        letter = _DIRECTION_BYTES[direction]
+        for slot, (slot_letter, _) in enumerate(self._slots()):
+            if slot_letter == letter:
+                offset = EXIT_OFFSET + slot * EXIT_SLOT.size
+                self.buf[offset:offset + EXIT_SLOT.size] = _NO_EXIT
+
+    def set_exits(self, exits):
+        """Rewrite the whole exit block in EXIT_SLOT_ORDER.
+
+        Exits to room 0 are written as empty slots, as in the original
+        migration.
+        """
+        for slot, direction in enumerate(EXIT_SLOT_ORDER):
+            offset = EXIT_OFFSET + slot * EXIT_SLOT.size
+            dest = exits.get(direction, 0)
+            if dest > 0:
+                EXIT_SLOT.pack_into(self.buf, offset,
+                                    _DIRECTION_BYTES[direction], dest)
+            else:
+                self.buf[offset:offset + EXIT_SLOT.size] = _NO_EXIT
+
+    # -- Text fields -----------------------------------------------------
+
+    @property
+    def people(self):
+        return _text(self.buf[PEOPLE_OFFSET:PEOPLE_OFFSET + PEOPLE_SIZE])
+
+    @property
+    def objects(self):
+        return _text(self.buf[OBJECTS_OFFSET:OBJECTS_OFFSET + OBJECTS_SIZE])
+
+    @property
+    def description(self):
+        """Description up to the '$' terminator, with line breaks as '\\n'."""
+        raw = bytes(self.buf[DESCRIPTION_OFFSET:
+                             DESCRIPTION_OFFSET + DESCRIPTION_SIZE])
+        raw = raw.split(DESCRIPTION_TERMINATOR, 1)[0].split(b'\x00', 1)[0]
+        raw = raw.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+        return raw.translate(None, _UNPRINTABLE).decode('ascii').strip()
+
+    @property
+    def special(self):
+        """Special codes following the '$' terminator."""
+        raw = bytes(self.buf[DESCRIPTION_OFFSET:
+                             DESCRIPTION_OFFSET + DESCRIPTION_SIZE])
+        if DESCRIPTION_TERMINATOR not in raw:
+            return ''
+        return _text(raw.split(DESCRIPTION_TERMINATOR, 1)[1])
+
+    def set_people(self, text):
+        self._set_field(PEOPLE_OFFSET, PEOPLE_SIZE, text)
+
+    def set_objects(self, text):
+        self._set_field(OBJECTS_OFFSET, OBJECTS_SIZE, text)
+
+    def set_description(self, description, special=''):
+        """Write description + '$' terminator + special codes."""
+        text = description + '$' + special
+        self._set_field(DESCRIPTION_OFFSET, DESCRIPTION_SIZE, text)
+
+    def _set_field(self, offset, size, text):
+        data = _encode(text, size)
+        self.buf[offset:offset + len(data)] = data
+        self.buf[offset + len(data):offset + size] = bytes(size - len(data))
+
+    def set_validation(self):
+        self.buf[0] = self.number & 0xFF
+
+
+class RoomFile(RecordFile):
+    """ADVENT.DTA, memory-mapped."""
+
+    def __init__(self, path, **kwargs):
+        super().__init__(path, ROOM_RECORD_SIZE,
+                         first_record=ROOM_FIRST_RECORD, **kwargs)
+
+    def room(self, number):
+        return RoomRecord(number, self.record(number))
+
+    def __iter__(self):
+        """Iterate over every record, valid or not."""
+        for number in self.numbers():
+            yield self.room(number)
+
+    def rooms(self):
+        """Return {room_number: RoomRecord} for all valid rooms."""
+        rooms = {}
+        for room in self:
+            if room.valid:
+                rooms[room.number] = room
+        return rooms
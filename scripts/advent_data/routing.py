@@ -0,0 +1,175 @@
+"""
+Shortest routes between rooms.
+
+RouteIndex precomputes BFS distances from and to a handful of landmark
+rooms (the ALT technique: A*, Landmarks, Triangle inequality). For any
+landmark L, d(v, t) >= d(L, t) - d(L, v) and d(v, t) >= d(v, L) - d(t, L),
+which gives A* a tight lower bound, so a route query only expands the
+rooms close to the actual path.
+
+The landmark tables are small (LANDMARK_COUNT x rooms x 2 x 16-bit), so
+they are also exported for the web map, which runs the same search.
+
+Export layout (little-endian):
+- Header: ROUTES_HEADER (magic, version, room count, landmark count)
+- Landmark room numbers: uint16 x landmarks
+- Room numbers: uint16 x count, ascending
+- Distance from each landmark: uint16 x count, per landmark
+- Distance to each landmark: uint16 x count, per landmark
+ROUTES_UNREACHABLE marks rooms a landmark cannot reach (or be reached from).
+"""
+
+import heapq
+import struct
+import sys
+from array import array
+
+ROUTES_MAGIC = b'AROU'
+ROUTES_VERSION = 1
+ROUTES_HEADER = struct.Struct('<4sHxxII')
+ROUTES_UNREACHABLE = 0xFFFF
+LANDMARK_COUNT = 16
+
+
+class RouteIndex:
+    """Landmark distance tables over a RoomGraph.
+
+    Args:
+        graph: RoomGraph to route over
+        landmarks: Landmark rooms, or None to pick LANDMARK_COUNT of them
+        start: Room the landmark selection starts from
+    """
+
+    def __init__(self, graph, landmarks=None, start=2):
+        self.graph = graph
+        if landmarks is None:
+            landmarks = self._choose_landmarks(start)
+        self.landmarks = [room for room in landmarks if room in graph]
+        self.from_landmark = [graph.distances(room) for room in self.landmarks]
+        self.to_landmark = [graph.distances(room, reverse=True)
+                            for room in self.landmarks]
+
+    def _choose_landmarks(self, start, count=LANDMARK_COUNT):
+        """Farthest-point selection: each new landmark is the room farthest
+        (in moves there and back) from the start and the landmarks chosen
+        so far."""
+        graph = self.graph
+        if not graph.rooms:
+            return []
+        if start not in graph:
+            start = graph.rooms[0]
+
+        nearest = array('i', [2 ** 30]) * graph.size
+        self._merge_nearest(nearest, start)
+        landmarks = []
+        while len(landmarks) < min(count, len(graph)):
+            room = max(graph.rooms, key=lambda r: (nearest[r], -r))
+            if nearest[room] == 0:
+                break
+            landmarks.append(room)
+            self._merge_nearest(nearest, room)
+        return landmarks
+
+    def _merge_nearest(self, nearest, room):
+        """Lower `nearest` to the round-trip distance to `room`.
+
+        Unreachable rooms count as very far away, so disconnected parts
+        of the dungeon get landmarks of their own.
+        """
+        forward = self.graph.distances(room)
+        backward = self.graph.distances(room, reverse=True)
+        far = 2 * len(self.graph)
+        for r in self.graph.rooms:
+            d = ((forward[r] if forward[r] >= 0 else far) +
+                 (backward[r] if backward[r] >= 0 else far))
+            if d < nearest[r]:
+                nearest[r] = d
+
+    def _bound(self, target):
+        """Return a function giving a lower bound on d(room, target)."""
+        pairs = [(f, t, f[target], t[target])
+                 for f, t in zip(self.from_landmark, self.to_landmark)]
+
+        def bound(room):
+            best = 0
+            for from_l, to_l, from_target, to_target in pairs:
+                if from_target >= 0 and from_l[room] >= 0:
+                    d = from_target - from_l[room]
+                    if d > best:
+                        best = d
+                if to_target >= 0 and to_l[room] >= 0:
+                    d = to_l[room] - to_target
+                    if d > best:
+                        best = d
+            return best
+
+        return bound
+
+    def _search(self, source, target):
+        """A* from source to target; returns {room: previous room} or None."""
+        graph = self.graph
+        if source not in graph or target not in graph:
+            return None
+        bound = self._bound(target)
+        offsets, targets = graph.offsets, graph.targets
+        cost = {source: 0}
+        previous = {source: None}
+        queue = [(bound(source), 0, source)]
+        while queue:
+            _, moves, room = heapq.heappop(queue)
+            if room == target:
+                return previous
+            if moves > cost[room]:
+                continue
+            moves += 1
+            for i in range(offsets[room], offsets[room + 1]):
+                dest = targets[i]
+                if moves < cost.get(dest, moves + 1):
+                    cost[dest] = moves
+                    previous[dest] = room
+                    heapq.heappush(queue, (moves + bound(dest), moves, dest))
+        return None
+
+    def route(self, source, target):
+        """Rooms on a shortest route, source and target included, or None."""
+        previous = self._search(source, target)
+        if previous is None:
+            return None
+        path = [target]
+        while path[-1] != source:
+            path.append(previous[path[-1]])
+        path.reverse()
+        return path
+
+    def distance(self, source, target):
+        """Number of moves from source to target, or None if unreachable."""
+        path = self.route(source, target)
+        return None if path is None else len(path) - 1
+
+    def directions(self, source, target):
+        """Moves on a shortest route as [(direction, room), ...], or None."""
+        path = self.route(source, target)
+        if path is None:
+            return None
+        steps = []
+        for room, dest in zip(path, path[1:]):
+            direction = next(d for d, r in self.graph.exits(room) if r == dest)
+            steps.append((direction, dest))
+        return steps
+
+    def encode(self):
+        """Pack the landmark tables for the web map."""
+        rooms = self.graph.rooms
+        tables = array('H')
+        for table in self.from_landmark + self.to_landmark:
+            tables.extend(d if d >= 0 else ROUTES_UNREACHABLE
+                          for d in (table[r] for r in rooms))
+        landmarks = array('H', self.landmarks)
+        numbers = array('H', rooms)
+        if sys.byteorder != 'little':
+            for arr in (landmarks, numbers, tables):
+                arr.byteswap()
+        header = ROUTES_HEADER.pack(ROUTES_MAGIC, ROUTES_VERSION, len(rooms),
+                                    len(self.landmarks))
+        return b''.join((header, landmarks.tobytes(), numbers.tobytes(),
+                         tables.tobytes()))
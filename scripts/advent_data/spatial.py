@@ -0,0 +1,144 @@
+"""
+Grid layout of the dungeon for the web map.
+
+Rooms are placed by a breadth-first walk from the start room: following
+an exit moves one cell in its direction (N is up, E is right). When that
+cell is already taken the room goes in the nearest free cell instead.
+Exits are followed both ways, so a room only reachable through one-way
+exits into it is still placed next to its neighbour. Rooms the walk does
+not reach are laid out the same way as separate islands, packed in rows
+below the start room's island.
+
+The tile index groups rooms by TILE_SIZE x TILE_SIZE blocks of cells so a
+viewer can fetch or draw only the rooms in its viewport.
+"""
+
+from collections import deque
+
+from .layout import DIRECTIONS, OPPOSITE
+
+DIRECTION_OFFSETS = {'N': (0, -1), 'E': (1, 0), 'S': (0, 1), 'W': (-1, 0)}
+TILE_SIZE = 16
+ISLAND_GAP = 2         # Empty cells between separately placed islands
+MIN_ROW_WIDTH = 32     # Islands are packed in rows at least this wide
+
+
+def _neighbours(exits):
+    """{room: [(neighbour, direction)]} following exits both ways."""
+    neighbours = {room: [] for room in exits}
+    for room in sorted(exits):
+        room_exits = exits[room]
+        for direction in DIRECTIONS:
+            dest = room_exits.get(direction)
+            if dest and dest in neighbours and dest != room:
+                neighbours[room].append((dest, direction))
+                neighbours[dest].append((room, OPPOSITE[direction]))
+    return neighbours
+
+
+def _nearest_free(occupied, x, y):
+    """Closest unoccupied cell to (x, y), searching outward ring by ring."""
+    if (x, y) not in occupied:
+        return x, y
+    radius = 1
+    while True:
+        best = None
+        for dx in range(-radius, radius + 1):
+            for dy in range(-radius, radius + 1):
+                if max(abs(dx), abs(dy)) != radius:
+                    continue
+                cell = (x + dx, y + dy)
+                if cell in occupied:
+                    continue
+                # Prefer straight-line distance, then a fixed cell order
+                key = (dx * dx + dy * dy, dy, dx)
+                if best is None or key < best[0]:
+                    best = (key, cell)
+        if best is not None:
+            return best[1]
+        radius += 1
+
+
+def _place_island(seed, neighbours):
+    """Lay out everything connected to `seed`, with `seed` at (0, 0)."""
+    positions = {seed: (0, 0)}
+    occupied = {(0, 0): seed}
+    queue = deque([seed])
+    while queue:
+        room = queue.popleft()
+        x, y = positions[room]
+        for dest, direction in neighbours[room]:
+            if dest in positions:
+                continue
+            dx, dy = DIRECTION_OFFSETS[direction]
+            cell = _nearest_free(occupied, x + dx, y + dy)
+            positions[dest] = cell
+            occupied[cell] = dest
+            queue.append(dest)
+    return positions
+
+
+def _bounds(positions):
+    xs = [x for x, _ in positions.values()]
+    ys = [y for _, y in positions.values()]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def place_rooms(exits, start):
+    """Assign grid coordinates to every room.
+
+    Args:
+        exits: {room_number: {direction: destination}}
+        start: Room placed at (0, 0)
+
+    Returns:
+        {room_number: (x, y)}
+    """
+    neighbours = _neighbours(exits)
+    positions = {}
+    seeds = ([start] if start in neighbours else []) + sorted(neighbours)
+    row = None  # [left edge, right limit, next x, top y, row height]
+
+    for seed in seeds:
+        if seed in positions:
+            continue
+        island = _place_island(seed, neighbours)
+        min_x, min_y, max_x, max_y = _bounds(island)
+        if row is None:
+            # The first island stays put; the rest are packed below it
+            positions.update(island)
+            row = [min_x, max(min_x + MIN_ROW_WIDTH, max_x + 1), min_x,
+                   max_y + 1 + ISLAND_GAP, 0]
+            continue
+
+        width, height = max_x - min_x + 1, max_y - min_y + 1
+        left, limit, x, y, row_height = row
+        if x > left and x + width > limit:
+            x, y, row_height = left, y + row_height + ISLAND_GAP, 0
+        for room, (rx, ry) in island.items():
+            positions[room] = (rx - min_x + x, ry - min_y + y)
+        row[2:] = [x + width + ISLAND_GAP, y, max(row_height, height)]
+
+    return positions
+
+
+def tile_index(positions, tile_size=TILE_SIZE):
+    """Group rooms by tile.
+
+    Returns:
+        {'tile_size': n, 'bounds': [min_x, min_y, max_x, max_y],
+         'tiles': {"tx,ty": [room, ...]}} with rooms sorted in each tile
+    """
+    tiles = {}
+    for room, (x, y) in sorted(positions.items()):
+        key = f'{x // tile_size},{y // tile_size}'
+        tiles.setdefault(key, []).append(room)
+
+    if positions:
+        xs = [x for x, _ in positions.values()]
+        ys = [y for _, y in positions.values()]
+        bounds = [min(xs), min(ys), max(xs), max(ys)]
+    else:
+        bounds = [0, 0, 0, 0]
+
+    return {'tile_size': tile_size, 'bounds': bounds, 'tiles': tiles}
@@ -2,110 +2,35 @@
 """
 Analyze ADVENT.DTA room data to find connectivity issues and generate map data.
 
-Room Record Format (512 bytes per room):
-  Byte 0: Room validation (should equal room_number % 256)
-  Bytes 1-16: Exits (4 bytes per direction: N=1-4, E=5-8, S=9-12, W=13-16)
-    - Byte 0: Direction letter ('N','E','S','W') or null if no exit
-    - Bytes 1-2: Destination room number as 16-bit little-endian (0 = exit dungeon)
-    - Byte 3: unused
-  Bytes 17-99: People/NPCs
-  Bytes 100-199: Objects
-  Bytes 200-511: Description (ends at '$')
+Rooms are read through the shared advent_data package; see
+advent_data.layout for the 512-byte record format.
 """
 
 import sys
-import json
 from collections import defaultdict
 from pathlib import Path
 
-RECORD_SIZE = 512
-DIRECTIONS = ['N', 'E', 'S', 'W']
-OPPOSITE = {'N': 'S', 'E': 'W', 'S': 'N', 'W': 'E'}
-DIR_NAMES = {'N': 'North', 'E': 'East', 'S': 'South', 'W': 'West'}
-
-class Room:
-    def __init__(self, number, data):
-        self.number = number
-        # Validation byte stores (room_number - 1) % 256
-        expected_validation = (number - 1) % 256
-        self.valid = (data[0] == expected_validation) if number > 0 else False
-        self.exits = {}
-        self.description = ""
-        self.objects = ""
-        self.people = ""
-
-        if self.valid:
-            # Parse exits (bytes 1-16, 4 bytes per direction)
-            for i, direction in enumerate(DIRECTIONS):
-                offset = 1 + (i * 4)
-                dir_char = chr(data[offset]) if data[offset] else ''
-                # 16-bit little-endian destination at offset+1 and offset+2
-                dest = data[offset + 1] + (data[offset + 2] << 8)
-
-                if dir_char in DIRECTIONS:
-                    self.exits[direction] = dest  # 0 = exit dungeon, >0 = room number
-
-            # Parse description (bytes 200-511)
-            desc_bytes = data[200:512]
-            desc = ""
-            for b in desc_bytes:
-                if b == ord('$') or b == 0:
-                    break
-                if 32 <= b < 127:
-                    desc += chr(b)
-                elif b == 13:
-                    desc += '\n'
-            self.description = desc.strip()
-
-            # Parse objects (bytes 100-199)
-            obj_bytes = data[100:200]
-            self.objects = bytes(obj_bytes).decode('ascii', errors='ignore').rstrip('\x00')
-
-            # Parse people (bytes 17-99)
-            ppl_bytes = data[17:100]
-            self.people = bytes(ppl_bytes).decode('ascii', errors='ignore').rstrip('\x00')
+from advent_data import (OPPOSITE, RoomFile, RoomGraph, RouteIndex, place_rooms,
+                         tile_index, write_map)
+
 
 def load_rooms(filepath):
     """Load all rooms from ADVENT.DTA
 
-    BASIC-PLUS uses 1-indexed records, so:
-    - Record 1 (offset 0) = room 1 data, validation byte = 0
-    - Record 2 (offset 512) = room 2 data, validation byte = 1
-    - Record N = room N data, validation byte = N-1
+    Returns {room_number: RoomRecord}. The records are views into the
+    memory-mapped file, so nothing is copied until a field is read.
     """
-    rooms = {}
-    with open(filepath, 'rb') as f:
-        data = f.read()
-
-    num_records = len(data) // RECORD_SIZE
-    print(f"File size: {len(data)} bytes, {num_records} records")
-
-    for i in range(num_records):
-        offset = i * RECORD_SIZE
-        record = data[offset:offset + RECORD_SIZE]
-        room_number = i + 1  # BASIC records are 1-indexed
-        room = Room(room_number, record)
-        if room.valid:
-            rooms[room_number] = room
-
-    return rooms
+    dta = RoomFile(filepath)
+    print(f"File size: {dta.record_count * dta.record_size} bytes, "
+          f"{dta.record_count} records")
+    return dta.rooms()
 
 def analyze_connectivity(rooms, start_room=2):
     """Analyze room connectivity from starting room"""
 
     # Find all reachable rooms from start
-    reachable = set()
-    to_visit = [start_room]
-
-    while to_visit:
-        current = to_visit.pop(0)
-        if current in reachable or current not in rooms:
-            continue
-        reachable.add(current)
-
-        for dest in rooms[current].exits.values():
-            if dest > 0 and dest not in reachable:
-                to_visit.append(dest)
+    graph = RoomGraph.from_rooms(rooms)
+    reachable = graph.reachable(start_room)
 
     # Find unreachable rooms
     all_rooms = set(rooms.keys())
@@ -145,7 +70,9 @@ def analyze_connectivity(rooms, start_room=2):
         'dead_ends': sorted(dead_ends),
         'no_exits': sorted(no_exits),
         'one_way': one_way,
-        'broken': broken
+        'broken': broken,
+        'clusters': graph.connected_components(),
+        'strong_components': graph.strongly_connected_components()
     }
 
 def generate_map_json(rooms, analysis):
@@ -164,9 +91,14 @@ def generate_map_json(rooms, analysis):
         }
     }
 
+    positions = place_rooms({num: room.exits for num, room in rooms.items()},
+                            map_data['start_room'])
+    map_data['layout'] = tile_index(positions)
+
     for num, room in rooms.items():
         # Clean description for display
         desc = room.description[:200] + '...' if len(room.description) > 200 else room.description
+        x, y = positions[num]
 
         map_data['rooms'][str(num)] = {
             'number': num,
@@ -174,7 +106,9 @@ def generate_map_json(rooms, analysis):
             'exits': room.exits,
             'reachable': num in analysis['reachable'],
             'has_objects': bool(room.objects.strip()),
-            'has_npcs': bool(room.people.strip() and room.people[0] in '*#')
+            'has_npcs': bool(room.people.strip() and room.people[0] in '*#'),
+            'x': x,
+            'y': y
         }
 
         # Add connections (bidirectional as single entries)
@@ -216,6 +150,8 @@ def main():
                        help='Starting room number (default: 2)')
     parser.add_argument('--verbose', '-v', action='store_true',
                        help='Show detailed room info')
+    parser.add_argument('--route', '-r', type=int, nargs=2, metavar=('FROM', 'TO'),
+                       help='Show the shortest route between two rooms')
     args = parser.parse_args()
 
     # Find data file
@@ -243,6 +179,8 @@ def main():
     print(f"No exits: {len(analysis['no_exits'])}")
     print(f"One-way connections: {len(analysis['one_way'])}")
     print(f"Broken exits: {len(analysis['broken'])}")
+    print(f"Clusters (connected either way): {len(analysis['clusters'])}")
+    print(f"Strongly connected components: {len(analysis['strong_components'])}")
 
     if analysis['no_exits']:
         print(f"\nRooms with NO exits: {analysis['no_exits'][:20]}")
@@ -274,13 +212,27 @@ def main():
     else:
         print(f"\nWARNING: Starting room {start} is invalid!")
 
+    routes = None
+    if args.route or args.json:
+        routes = RouteIndex(RoomGraph.from_rooms(rooms), start=args.start)
+
+    if args.route:
+        source, target = args.route
+        steps = routes.directions(source, target)
+        print(f"\n=== Route {source} -> {target} ===")
+        if steps is None:
+            print(f"No route from room {source} to room {target}")
+        else:
+            print(f"{len(steps)} moves: {' '.join(d for d, _ in steps)}")
+            print("Via: " + ' '.join(str(room) for _, room in steps))
+
     # Generate JSON if requested
     if args.json:
         map_data = generate_map_json(rooms, analysis)
         output_path = Path(args.json)
-        with open(output_path, 'w') as f:
-            json.dump(map_data, f, indent=2)
-        print(f"\nMap data written to {output_path}")
+        written = write_map(map_data, output_path, routes)
+        print(f"\nMap data written to {output_path} "
+              f"({len(written)} files updated)")
 
 if __name__ == '__main__':
     main()
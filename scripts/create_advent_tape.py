@@ -3,12 +3,20 @@
 Create a SIMH tape image with all ADVENT source and data files.
 
 This tape can be used to bootstrap ADVENT from a clean RSTS/E installation.
+
+Every tape is written with a manifest beside it (<tape>.manifest.json):
+the SHA-256 of each current file, and which of them are on the tape.
+With --delta-from, only the files that differ from an earlier manifest go
+on the tape, so a system that already has that earlier build copies just
+the changed files (build_advent.exp FILE...).
 """
 
+import hashlib
+import json
 import os
 import sys
 sys.path.insert(0, os.path.dirname(__file__))
-from create_tape import write_file_to_tape, write_end_of_medium
+from create_tape import TapeImage, write_file_to_tape, write_end_of_medium
 
 # Base directory
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -48,49 +56,96 @@ DATA_FILES = [
     ('generated_data/BOARD.NTC', 'BOARD', 'NTC'),
 ]
 
-def create_advent_tape(output_path, include_data=True):
-    """Create a tape with all ADVENT source and optionally data files."""
+def load_tape_files(file_list, quiet=False):
+    """Read the files in `file_list` as they go on the tape.
 
-    print(f"Creating ADVENT tape: {output_path}")
-    print("=" * 60)
+    Returns a list of (name, ext, data) tuples, with text files converted
+    to RSTS line endings (CR/LF).
+    """
+    files = []
+    for rel_path, name, ext in file_list:
+        full_path = os.path.join(BASE_DIR, rel_path)
 
-    files_to_include = SOURCE_FILES.copy()
-    if include_data:
-        files_to_include.extend(DATA_FILES)
+        if not os.path.exists(full_path):
+            if not quiet:
+                print(f"  WARNING: {rel_path} not found, skipping")
+            continue
 
-    total_size = 0
-    file_count = 0
+        with open(full_path, 'rb') as f:
+            data = f.read()
 
+        # Convert line endings to RSTS format (CR/LF)
+        # Only for text files (.B2S, .SUB, .ODL)
+        if ext in ('B2S', 'SUB', 'ODL'):
+            # Convert to text, normalize line endings
+            try:
+                text = data.decode('ascii', errors='replace')
+                # Normalize to CR/LF
+                text = text.replace('\r\n', '\n').replace('\r', '\n')
+                text = text.replace('\n', '\r\n')
+                data = text.encode('ascii', errors='replace')
+            except:
+                pass  # Keep binary data as-is
+
+        files.append((name, ext, data))
+    return files
+
+def manifest_path(tape_path):
+    """Where the manifest of a tape image is kept."""
+    return os.path.splitext(tape_path)[0] + '.manifest.json'
+
+def write_manifest(tape_path, files, on_tape):
+    """Record the hashes of all current `files` and which are `on_tape`."""
+    manifest = {
+        'files': {f"{name}.{ext}": hashlib.sha256(data).hexdigest()
+                  for name, ext, data in files},
+        'tape': [f"{name}.{ext}" for name, ext, _ in on_tape],
+    }
+    with open(manifest_path(tape_path), 'w') as f:
+        json.dump(manifest, f, indent=1)
+
+def changed_files(files, previous_manifest):
+    """The `files` whose contents differ from (or are missing in) the
+    manifest of an earlier tape."""
+    with open(previous_manifest) as f:
+        previous = json.load(f)['files']
+    return [(name, ext, data) for name, ext, data in files
+            if previous.get(f"{name}.{ext}") != hashlib.sha256(data).hexdigest()]
+
+def write_tape(output_path, files):
+    """Write (name, ext, data) files to a tape image; returns total data bytes."""
+    total_size = 0
     with open(output_path, 'wb') as tape:
-        for rel_path, name, ext in files_to_include:
-            full_path = os.path.join(BASE_DIR, rel_path)
-
-            if not os.path.exists(full_path):
-                print(f"  WARNING: {rel_path} not found, skipping")
-                continue
-
-            with open(full_path, 'rb') as f:
-                data = f.read()
-
-            # Convert line endings to RSTS format (CR/LF)
-            # Only for text files (.B2S, .SUB, .ODL)
-            if ext in ('B2S', 'SUB', 'ODL'):
-                # Convert to text, normalize line endings
-                try:
-                    text = data.decode('ascii', errors='replace')
-                    # Normalize to CR/LF
-                    text = text.replace('\r\n', '\n').replace('\r', '\n')
-                    text = text.replace('\n', '\r\n')
-                    data = text.encode('ascii', errors='replace')
-                except:
-                    pass  # Keep binary data as-is
-
+        for name, ext, data in files:
             print(f"  Adding: {name}.{ext} ({len(data):,} bytes)")
             write_file_to_tape(tape, name, ext, data)
             total_size += len(data)
-            file_count += 1
 
         write_end_of_medium(tape)
+    return total_size
+
+def create_advent_tape(output_path, include_data=True, delta_from=None):
+    """Create a tape with all ADVENT source and optionally data files.
+
+    With `delta_from` (the manifest of an earlier tape), only files that
+    changed since that tape are written.
+    """
+
+    print(f"Creating ADVENT {'delta ' if delta_from else ''}tape: {output_path}")
+    print("=" * 60)
+
+    files_to_include = SOURCE_FILES.copy()
+    if include_data:
+        files_to_include.extend(DATA_FILES)
+
+    files = load_tape_files(files_to_include)
+    on_tape = files
+    if delta_from:
+        on_tape = changed_files(files, delta_from)
+        print(f"  {len(on_tape)} of {len(files)} files changed since {delta_from}")
+    total_size = write_tape(output_path, on_tape)
+    write_manifest(output_path, files, on_tape)
+    file_count = len(on_tape)
 
     tape_size = os.path.getsize(output_path)
     print("=" * 60)
@@ -107,42 +162,42 @@ def create_source_only_tape(output_path):
     print(f"Creating source-only tape: {output_path}")
     print("=" * 60)
 
-    total_size = 0
-    file_count = 0
-
-    with open(output_path, 'wb') as tape:
-        for rel_path, name, ext in SOURCE_FILES:
-            full_path = os.path.join(BASE_DIR, rel_path)
-
-            if not os.path.exists(full_path):
-                print(f"  WARNING: {rel_path} not found, skipping")
-                continue
-
-            with open(full_path, 'rb') as f:
-                data = f.read()
-
-            # Convert line endings for text files
-            try:
-                text = data.decode('ascii', errors='replace')
-                text = text.replace('\r\n', '\n').replace('\r', '\n')
-                text = text.replace('\n', '\r\n')
-                data = text.encode('ascii', errors='replace')
-            except:
-                pass
-
-            print(f"  Adding: {name}.{ext} ({len(data):,} bytes)")
-            write_file_to_tape(tape, name, ext, data)
-            total_size += len(data)
-            file_count += 1
-
-        write_end_of_medium(tape)
+    files = load_tape_files(SOURCE_FILES)
+    total_size = write_tape(output_path, files)
+    write_manifest(output_path, files, files)
 
     print("=" * 60)
-    print(f"Created tape with {file_count} source files")
+    print(f"Created tape with {len(files)} source files")
     print(f"Total: {total_size:,} bytes ({total_size/1024:.1f} KB)")
 
     return output_path
 
+def verify_advent_tape(tape_path, include_data=True):
+    """Check a built tape against the current source and data files.
+
+    Returns True if every file is on the tape with matching contents.
+    Only the table of contents and the file data are read, so this takes
+    milliseconds and can run before every boot.
+    """
+    files_to_include = SOURCE_FILES.copy()
+    if include_data:
+        files_to_include.extend(DATA_FILES)
+    files = load_tape_files(files_to_include, quiet=True)
+
+    try:
+        with TapeImage(tape_path) as tape:
+            problems = tape.verify(files)
+    except (OSError, ValueError) as e:
+        problems = [str(e)]
+
+    if problems:
+        print(f"Tape {tape_path} does not match its files:")
+        for problem in problems:
+            print(f"  {problem}")
+        return False
+    print(f"Tape {tape_path} verified: {len(files)} files")
+    return True
+
 if __name__ == '__main__':
     import argparse
 
@@ -153,13 +208,23 @@ if __name__ == '__main__':
                         help='Only include source files, not data')
     parser.add_argument('--full', action='store_true',
                         help='Include source and data files (default)')
+    parser.add_argument('--delta-from', metavar='MANIFEST',
+                        help='Only write files that changed since the tape '
+                             'this manifest belongs to')
+    parser.add_argument('--verify', action='store_true',
+                        help='Check an existing tape against the files instead '
+                             'of writing one (exit status 1 if it differs)')
 
     args = parser.parse_args()
 
     output_path = os.path.join(BASE_DIR, args.output)
+
+    if args.verify:
+        sys.exit(0 if verify_advent_tape(output_path, not args.source_only) else 1)
+
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
     if args.source_only:
         create_source_only_tape(output_path)
     else:
-        create_advent_tape(output_path, include_data=True)
+        create_advent_tape(output_path, include_data=True, delta_from=args.delta_from)
@@ -14,9 +14,15 @@ DOS-11 Tape File Structure:
 - Multiple 512-byte data records
 - Tape mark at end of file
 
+Reading tapes back: TapeImage memory-maps an image and lists its files
+(name, UIC, record offsets) in one pass, for listing, extracting and
+verifying a tape against the files it was made from.
+
 Reference: https://vmsnet.pdp-11.narkive.com/26ioynLm/dos-11-magtape-format
 """
 
+import hashlib
+import mmap
 import struct
 import sys
 import os
@@ -25,6 +31,12 @@ import os
 # Space=0, A-Z=1-26, $=27, .=28, unused=29, 0-9=30-39
 RAD50_CHARS = " ABCDEFGHIJKLMNOPQRSTUVWXYZ$. 0123456789"
 
+TAPE_GAP = 0xFFFFFFFE   # Erase gap
+TAPE_EOM = 0xFFFFFFFF   # End of medium
+
+_LENGTH = struct.Struct('<I')
+_HEADER = struct.Struct('<7H')  # DOS-11 file header, see create_dos11_header()
+
 def char_to_rad50(c):
     """Convert a single character to RAD50 value."""
     c = c.upper()
@@ -222,79 +234,250 @@ def create_data_tape(output_path, files):
 
     print(f"Created tape with {len(files)} files, {os.path.getsize(output_path)} bytes total")
 
+class TapeFile:
+    """One DOS-11 file on a tape image, as listed by TapeImage."""
+
+    def __init__(self, index, name, ext, group, user, protection, date,
+                 header_offset, records):
+        self.index = index
+        self.name = name
+        self.ext = ext
+        self.group = group
+        self.user = user
+        self.protection = protection
+        self.date = date
+        self.header_offset = header_offset  # Offset of the header record
+        self.records = records              # [(data offset, length)] of data records
+
+    @property
+    def filename(self):
+        return f"{self.name}.{self.ext}" if self.ext else self.name
+
+    @property
+    def size(self):
+        """Bytes of data on tape (including the last block's padding)."""
+        return sum(length for _, length in self.records)
+
+    def __repr__(self):
+        return (f"TapeFile({self.filename} [{self.group},{self.user}] "
+                f"{len(self.records)} records, {self.size} bytes)")
+
+class TapeImage:
+    """
+    Read-only view of a SIMH tape image holding DOS-11 files.
+
+    The image is memory-mapped and its table of contents built in one
+    pass over the record length words, so finding a file is a dict lookup
+    and its data records can be read straight from their offsets.
+
+        with TapeImage('advent_source.tap') as tape:
+            for entry in tape.files:
+                print(entry.filename, entry.size)
+            data = tape.read('ADVENT.DTA')
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file
+            self._map = b''
+        self.files = []
+        self.by_name = {}
+        self.end_of_medium = False
+        self._build_index()
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __iter__(self):
+        return iter(self.files)
+
+    def __len__(self):
+        return len(self.files)
+
+    def __contains__(self, filename):
+        return filename.upper() in self.by_name
+
+    def __getitem__(self, key):
+        """A file by position or by name ("ADVENT.DTA")."""
+        if isinstance(key, int):
+            return self.files[key]
+        return self.by_name[key.upper()]
+
+    def records(self):
+        """Yield (offset, length) for every record; length is 0 for a tape
+        mark, TAPE_GAP for an erase gap and TAPE_EOM at the end of medium.
+        `offset` is that of the record's data (or of the marker)."""
+        tape = self._map
+        pos = 0
+        end = len(tape)
+        while pos + 4 <= end:
+            length, = _LENGTH.unpack_from(tape, pos)
+            if length in (0, TAPE_GAP, TAPE_EOM):
+                yield pos, length
+                if length == TAPE_EOM:
+                    return
+                pos += 4
+                continue
+            # Bit 31 flags a bad record; the length is in the low bits
+            data_length = length & 0x00FFFFFF
+            if pos + 8 + data_length > end:
+                raise ValueError(f"{self.path}: record at {pos} runs past the end of the tape")
+            yield pos + 4, data_length
+            pos += 8 + ((data_length + 1) & ~1)
+
+    def _build_index(self):
+        entry = None
+        for offset, length in self.records():
+            if length == TAPE_EOM:
+                self.end_of_medium = True
+                break
+            if length == TAPE_GAP:
+                continue
+            if length == 0:
+                entry = None  # Tape mark ends the file
+                continue
+            if entry is None:
+                entry = self._parse_header(offset, length)
+                self.files.append(entry)
+                self.by_name.setdefault(entry.filename.upper(), entry)
+            else:
+                entry.records.append((offset, length))
+
+    def _parse_header(self, offset, length):
+        if length < 14:
+            raise ValueError(f"{self.path}: {length}-byte record at {offset} "
+                             "is not a DOS-11 file header")
+        (fname1, fname2, ext_word, uic, protection, date,
+         fname3) = _HEADER.unpack_from(self._map, offset)
+        name = decode_rad50(fname1) + decode_rad50(fname2)
+        if fname3:
+            name += decode_rad50(fname3)
+        entry = TapeFile(len(self.files), name.strip(), decode_rad50(ext_word).strip(),
+                         uic >> 8, uic & 0xFF, protection, date, offset, [])
+        if length > 14:  # Header and data in one record
+            entry.records.append((offset + 14, length - 14))
+        return entry
+
+    def iter_data(self, entry):
+        """Yield the data records of a file (a TapeFile or name) as
+        memoryviews of the mapped image, without copying."""
+        if not isinstance(entry, TapeFile):
+            entry = self[entry]
+        view = memoryview(self._map)
+        for offset, length in entry.records:
+            yield view[offset:offset + length]
+
+    def read(self, entry):
+        """The data of a file as bytes (block padding included)."""
+        return b''.join(self.iter_data(entry))
+
+    def extract(self, entry, out):
+        """Stream a file's data into the writable binary file `out`.
+        Returns the number of bytes written."""
+        written = 0
+        for record in self.iter_data(entry):
+            out.write(record)
+            written += len(record)
+        return written
+
+    def checksum(self, entry):
+        """SHA-256 of a file's data as it is on the tape."""
+        digest = hashlib.sha256()
+        for record in self.iter_data(entry):
+            digest.update(record)
+        return digest.hexdigest()
+
+    def verify(self, files, block_size=512):
+        """
+        Check the tape against the files it was written from.
+
+        `files` is the list of (filename, ext, data) given to
+        create_data_tape(); each must be on the tape, in that order, with
+        the checksum of its data padded to `block_size` as
+        write_file_to_tape() pads it. Returns a list of problems, empty if
+        the tape is good.
+        """
+        problems = []
+        if not self.end_of_medium:
+            problems.append("no end of medium marker (truncated tape?)")
+        if len(self.files) != len(files):
+            problems.append(f"{len(self.files)} files on tape, expected {len(files)}")
+
+        for i, (name, ext, data) in enumerate(files):
+            filename = f"{name[:9]}.{ext[:3]}".upper().rstrip('.')
+            if filename not in self:
+                problems.append(f"{filename}: missing")
+                continue
+            entry = self[filename]
+            if entry.index != i:
+                problems.append(f"{filename}: file {entry.index + 1} on tape, expected {i + 1}")
+            padding = -len(data) % block_size
+            expected = hashlib.sha256(data + bytes(padding)).hexdigest()
+            if entry.size != len(data) + padding:
+                problems.append(f"{filename}: {entry.size} bytes on tape, "
+                                f"expected {len(data) + padding}")
+            elif self.checksum(entry) != expected:
+                problems.append(f"{filename}: checksum mismatch")
+        return problems
+
 def dump_tape(tape_path):
     """Dump the contents of a SIMH tape image for debugging."""
     print(f"\nDumping tape: {tape_path}")
     print("=" * 60)
 
-    with open(tape_path, 'rb') as f:
-        record_num = 0
+    with TapeImage(tape_path) as tape:
+        headers = {entry.header_offset: entry for entry in tape.files}
         file_num = 0
 
-        while True:
-            pos = f.tell()
-            length_bytes = f.read(4)
-            if len(length_bytes) < 4:
-                print(f"[EOF at position {pos}]")
-                break
-
-            length = struct.unpack('<I', length_bytes)[0]
-
+        for record_num, (offset, length) in enumerate(tape.records()):
             if length == 0:
                 print(f"Record {record_num}: TAPE MARK (end of file {file_num})")
                 file_num += 1
-                record_num += 1
-                continue
-
-            if length == 0xFFFFFFFF:
+            elif length == TAPE_EOM:
                 print(f"Record {record_num}: END OF MEDIUM")
                 break
-
-            if length == 0xFFFFFFFE:
+            elif length == TAPE_GAP:
                 print(f"Record {record_num}: ERASE GAP")
-                record_num += 1
-                continue
-
-            # Read data
-            padded_length = (length + 1) & ~1
-            data = f.read(padded_length)
-
-            # Read trailing length
-            trailing = f.read(4)
-            trailing_length = struct.unpack('<I', trailing)[0] if len(trailing) == 4 else 0
-
-            if length == 14:
-                # Try to decode as DOS-11 header
-                try:
-                    fname1 = struct.unpack('<H', data[0:2])[0]
-                    fname2 = struct.unpack('<H', data[2:4])[0]
-                    ext_word = struct.unpack('<H', data[4:6])[0]
-                    proj = data[6]
-                    prog = data[7]
-                    prot = struct.unpack('<H', data[8:10])[0]
-                    date = struct.unpack('<H', data[10:12])[0]
-
-                    filename = decode_rad50(fname1) + decode_rad50(fname2)
-                    extension = decode_rad50(ext_word)
-
-                    print(f"Record {record_num}: HEADER - {filename.strip()}.{extension.strip()} "
-                          f"[{proj},{prog}] prot={prot:o} date={date}")
-                except Exception as e:
-                    print(f"Record {record_num}: {length} bytes (header decode failed: {e})")
+            elif offset in headers:
+                entry = headers[offset]
+                print(f"Record {record_num}: HEADER - {entry.filename} "
+                      f"[{entry.group},{entry.user}] prot={entry.protection:o} date={entry.date}")
             elif length == 512:
                 print(f"Record {record_num}: DATA BLOCK {length} bytes")
             else:
                 print(f"Record {record_num}: {length} bytes")
-
-            record_num += 1
+        else:
+            print(f"[EOF at position {len(tape._map)}]")
 
     print("=" * 60)
 
+def list_tape(tape_path):
+    """Print the table of contents of a tape image."""
+    with TapeImage(tape_path) as tape:
+        for entry in tape:
+            print(f"{entry.filename:<14} [{entry.group},{entry.user}] "
+                  f"{len(entry.records):5} records {entry.size:10,} bytes  "
+                  f"{tape.checksum(entry)[:16]}")
+        print(f"{len(tape)} files" + ("" if tape.end_of_medium else ", no end of medium marker"))
+
 if __name__ == '__main__':
     if len(sys.argv) < 2:
         print("Usage:")
         print("  create_tape.py test           - Create a test tape")
         print("  create_tape.py dump <file>    - Dump tape contents")
+        print("  create_tape.py list <file>    - List files on a tape")
+        print("  create_tape.py extract <file> <name> [output]  - Extract a file")
         print("  create_tape.py create <file> <input1> [input2...]  - Create tape from files")
         sys.exit(1)
 
@@ -307,6 +490,15 @@ if __name__ == '__main__':
     elif command == 'dump' and len(sys.argv) >= 3:
         dump_tape(sys.argv[2])
 
+    elif command == 'list' and len(sys.argv) >= 3:
+        list_tape(sys.argv[2])
+
+    elif command == 'extract' and len(sys.argv) >= 4:
+        output = sys.argv[4] if len(sys.argv) >= 5 else sys.argv[3]
+        with TapeImage(sys.argv[2]) as tape, open(output, 'wb') as f:
+            size = tape.extract(sys.argv[3], f)
+        print(f"Extracted {sys.argv[3].upper()} to {output} ({size} bytes)")
+
     elif command == 'create' and len(sys.argv) >= 4:
         output = sys.argv[2]
         files = []
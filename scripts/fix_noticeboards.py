@@ -13,9 +13,12 @@ File format:
 - Remaining bytes: BOARD$(0-N) - 512 bytes per indexed room for noticeboard text
 """
 
-import struct
+import shutil
 from pathlib import Path
 
+from advent_data import BoardFile
+from advent_data.layout import BOARD_ENTRY_SIZE
+
 # Base directory
 BASE_DIR = Path(__file__).parent.parent
 
@@ -48,29 +51,26 @@ def fix_board_ntc():
         print(f"ERROR: {tape_path} not found!")
         return False
 
-    # Read original file
-    with open(tape_path, 'rb') as f:
-        data = bytearray(f.read())
+    # Work on a copy of the original; the index and new entries are then
+    # written in place through the memory-mapped file
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(tape_path, output_path)
 
-    print(f"Read {len(data)} bytes from {tape_path}")
+    with BoardFile(output_path) as board:
+        print(f"Read {output_path.stat().st_size} bytes from {tape_path}")
 
-    # Parse INDEX array (first 1024 bytes = 512 x 2-byte integers)
-    indexed_rooms = {}
-    index_count = 0
-    for i in range(512):
-        offset = i * 2
-        room_num = struct.unpack('<H', data[offset:offset+2])[0]
-        if room_num > 0 and room_num < 2000:
-            indexed_rooms[room_num] = i
-            index_count = i + 1
-            print(f"  INDEX[{i}] = Room {room_num}")
+        # Parse INDEX array (first 1024 bytes = 512 x 2-byte integers)
+        indexed_rooms = {}
+        index_count = 0
+        for i, room_num in board.index():
+            if room_num > 0 and room_num < 2000:
+                indexed_rooms[room_num] = i
+                index_count = i + 1
+                print(f"  INDEX[{i}] = Room {room_num}")
 
-    print(f"\nCurrently indexed rooms ({index_count} total): {sorted(indexed_rooms.keys())}")
+        current_board_entries = board.board_count
 
-    # Calculate current BOARD data size
-    board_offset_start = 1024  # INDEX is 512 x 2 = 1024 bytes
-    board_entry_size = 512
-    current_board_entries = (len(data) - board_offset_start) // board_entry_size
+    print(f"\nCurrently indexed rooms ({index_count} total): {sorted(indexed_rooms.keys())}")
     print(f"Current BOARD entries: {current_board_entries}")
 
     # Combine room lists and find missing ones
@@ -82,36 +82,32 @@ def fix_board_ntc():
     else:
         print(f"\nMissing rooms to add: {missing_rooms}")
 
-    # Add missing rooms
-    for room in missing_rooms:
-        # Find next empty INDEX slot
-        next_slot = index_count
-
-        # Write room number to INDEX
-        idx_offset = next_slot * 2
-        data[idx_offset:idx_offset+2] = struct.pack('<H', room)
+    # Grow the file by one BOARD entry per missing room
+    with open(output_path, 'r+b') as f:
+        f.truncate(f.seek(0, 2) + len(missing_rooms) * BOARD_ENTRY_SIZE)
 
-        # Create new BOARD entry with default message
-        default_msg = f"[Room {room} Noticeboard]\n\nNo messages have been posted here yet.\n"
-        board_bytes = default_msg.encode('ascii', errors='replace')
-        board_bytes = board_bytes[:board_entry_size].ljust(board_entry_size, b'\x00')
+    with BoardFile(output_path, writable=True) as board:
+        for room in missing_rooms:
+            # New entries are appended after the existing ones
+            next_slot = index_count
+            entry_slot = current_board_entries
 
-        # Extend data with new BOARD entry
-        data.extend(board_bytes)
+            # Write room number to INDEX
+            board.set_index_entry(next_slot, room)
 
-        indexed_rooms[room] = next_slot
-        index_count += 1
+            # Create new BOARD entry with default message
+            default_msg = f"[Room {room} Noticeboard]\n\nNo messages have been posted here yet.\n"
+            board.set_board_text(entry_slot, default_msg)
 
-        print(f"  Added room {room} at INDEX[{next_slot}]")
+            indexed_rooms[room] = next_slot
+            index_count += 1
+            current_board_entries += 1
 
-    # Ensure output directory exists
-    output_path.parent.mkdir(parents=True, exist_ok=True)
+            print(f"  Added room {room} at INDEX[{next_slot}]")
 
-    # Write fixed file
-    with open(output_path, 'wb') as f:
-        f.write(data)
+        total_size = board.record_count * board.record_size
 
-    print(f"\nWrote fixed BOARD.NTC ({len(data)} bytes) to {output_path}")
+    print(f"\nWrote fixed BOARD.NTC ({total_size} bytes) to {output_path}")
     print(f"Final indexed rooms ({len(indexed_rooms)}): {sorted(indexed_rooms.keys())}")
 
     return True
@@ -12,28 +12,48 @@ Output files:
 - BOARD.NTC: 512 × 512 bytes (noticeboard - empty)
 - MESSAG.NPC: 1000 × 60 bytes (NPC messages - empty)
 
-Record structure for ADVENT.DTA (512 bytes per room):
-- Byte 0 (1 byte): Validation byte = room_num & 0xFF
-- Bytes 1-16 (16 bytes): Exits - 4 bytes each for N,S,E,W
-  - Byte 0: Direction letter (N/S/E/W) or space if no exit
-  - Bytes 1-2: Room number as 16-bit big-endian (for CVT$% compatibility)
-  - Byte 3: Padding (0)
-- Bytes 17-99 (83 bytes): Monsters/NPCs
-- Bytes 100-199 (100 bytes): Objects
-- Bytes 200-511 (312 bytes): Room description
+Record layouts for all five files live in advent_data.layout.
 """
 
+import contextlib
+import hashlib
+import io
+import json
 import os
 import re
-import struct
+import shutil
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+from advent_data import (MonsterFile, RoomFile, RoomRecord, pack_monster,
+                         write_monster_file)
+from advent_data.layout import (
+    BOARD_ENTRY_SIZE, BOARD_RECORD_COUNT, CHARACTER_RECORD_COUNT,
+    CHARACTER_RECORD_SIZE, MESSAGE_RECORD_COUNT, MESSAGE_RECORD_SIZE,
+    MAX_ROOM_NUMBER, MONSTER_RECORD_COUNT, MONSTER_RECORD_SIZE,
+    ROOM_RECORD_COUNT, ROOM_RECORD_SIZE,
+)
+
 # Paths
 SCRIPT_DIR = Path(__file__).parent
 PROJECT_DIR = SCRIPT_DIR.parent
 DATA_DIR = PROJECT_DIR / "data"
 OUTPUT_DIR = PROJECT_DIR / "build" / "data"
+BOARD_SOURCE = PROJECT_DIR / "tape" / "BOARD.NTC"
+
+# Incremental builds (--incremental)
+MANIFEST_NAME = "build_manifest.json"
+CHANGES_NAME = "changes.json"
+DTA_BASE_NAME = "ADVENT.DTA.base"  # ADVENT.DTA before reconstruct_rooms.py
+TAPE_FILES = ("ADVENT.DTA", "ADVENT.MON", "ADVENT.CHR", "BOARD.NTC")
+
+
+# Room header line in roomfil.fil: "21,W20E601"
+ROOM_HEADER = re.compile(r'(\d+),(.*)')
+
+# Exit format: direction letter followed by room number
+EXIT_PATTERN = re.compile(r'([NSEW])(\d+)')
 
 
 def parse_exits(exit_string):
@@ -47,57 +67,15 @@ def parse_exits(exit_string):
     if not exit_string:
         return exits
 
-    # Parse exit format: direction followed by room number
-    # Pattern: letter followed by digits
-    pattern = r'([NSEW])(\d+)'
-    matches = re.findall(pattern, exit_string.upper())
-
-    for direction, room_num in matches:
-        try:
-            exits[direction] = int(room_num)
-        except ValueError:
-            pass
+    for match in EXIT_PATTERN.finditer(exit_string.upper()):
+        exits[match.group(1)] = int(match.group(2))
 
     return exits
 
 
-def create_binary_exits(exits):
-    """
-    Create 16-byte binary exit string from exits dictionary.
-
-    Format: 4 bytes per direction (N, S, E, W)
-    - Byte 0: Direction letter if exit exists, else space
-    - Bytes 1-2: Room number as 16-bit big-endian (for CVT$% compatibility)
-    - Byte 3: Padding (0)
-    """
-    result = bytearray(16)
-    directions = ['N', 'S', 'E', 'W']
-
-    for idx, d in enumerate(directions):
-        pos = idx * 4
-        room = exits.get(d, 0)
-
-        if room > 0:
-            # Valid exit - direction letter and room number
-            # NOTE: CVT$% in BASIC-PLUS-2 interprets bytes as big-endian
-            # so we store high byte first, low byte second
-            result[pos] = ord(d)
-            result[pos+1] = (room >> 8) & 0xFF # High byte (for CVT$%)
-            result[pos+2] = room & 0xFF        # Low byte
-            result[pos+3] = 0                  # Padding
-        else:
-            # No exit - space character
-            result[pos] = ord(' ')
-            result[pos+1] = 0
-            result[pos+2] = 0
-            result[pos+3] = 0
-
-    return bytes(result)
-
-
-def parse_roomfil(filepath):
+def iter_roomfil(filepath):
     """
-    Parse roomfil.fil and return dictionary of room data.
+    Stream roomfil.fil, yielding (room_number, room_data) as each room ends.
 
     Room format:
     - Line 1: room_number,exits (e.g., "21,W20E601")
@@ -105,99 +83,98 @@ def parse_roomfil(filepath):
     - Line 3: objects (e.g., "A chest~50/A dagger$5")
     - Lines 4+: description (until next room number)
     - Optional: /special codes/ at end
+
+    The file is read one line at a time and only the current room is held
+    in memory, so time and memory do not depend on the file size.
     """
-    rooms = {}
+    room_num = None
+    exit_str = monsters = objects = ''
+    desc_lines = []
+    special_lines = []
+    desc_started = False
+    state = 'seek'  # seek -> monsters -> objects -> description
+
+    def finish():
+        return room_num, {
+            'exits': parse_exits(exit_str),
+            'monsters': monsters,
+            'objects': objects,
+            'description': '\n'.join(desc_lines).strip(),
+            'special': '\n'.join(special_lines).rstrip(),
+        }
 
     with open(filepath, 'r', encoding='latin-1') as f:
-        lines = f.readlines()
-
-    i = 0
-    while i < len(lines):
-        line = lines[i].rstrip('\n\r')
-
-        # Skip header line
-        if line.startswith('pip '):
-            i += 1
-            continue
-
-        # Try to parse as room header (number,exits)
-        match = re.match(r'^(\d+),(.*)$', line)
-        if match:
-            room_num = int(match.group(1))
-            exit_str = match.group(2).strip()
-
-            # Parse exits
-            exits = parse_exits(exit_str)
-
-            # Next line should be monsters
-            i += 1
-            monsters = lines[i].rstrip('\n\r') if i < len(lines) else ''
-
-            # Next line should be objects
-            i += 1
-            objects = lines[i].rstrip('\n\r') if i < len(lines) else ''
-
-            # Remaining lines until next room are description
-            i += 1
-            desc_lines = []
-            while i < len(lines):
-                next_line = lines[i].rstrip('\n\r')
-                # Check if this is the start of a new room
-                if re.match(r'^\d+,', next_line):
-                    break
-                desc_lines.append(next_line)
-                i += 1
-
-            description = '\n'.join(desc_lines).strip()
-
-            # Extract special codes from description if present
-            # Special codes start with / and can span multiple lines
-            # Find the FIRST line that starts with / and treat everything
-            # from there as special codes
-            special = ''
-            desc_split_lines = description.split('\n')
-            for idx, line in enumerate(desc_split_lines):
-                if line.startswith('/'):
-                    # Everything from this line onwards is special codes
-                    special = '\n'.join(desc_split_lines[idx:])
-                    description = '\n'.join(desc_split_lines[:idx]).strip()
-                    break
-
-            rooms[room_num] = {
-                'exits': exits,
-                'monsters': monsters,
-                'objects': objects,
-                'description': description,
-                'special': special
-            }
-        else:
-            i += 1
+        for line in f:
+            line = line.rstrip('\n\r')
 
-    return rooms
+            if state == 'monsters':
+                monsters = line
+                state = 'objects'
+                continue
+            if state == 'objects':
+                objects = line
+                state = 'description'
+                continue
 
+            # Any "number," line starts a new room (this also skips the
+            # "pip ..." header and anything else before the first room)
+            match = ROOM_HEADER.match(line)
+            if match:
+                if room_num is not None:
+                    yield finish()
+                room_num = int(match.group(1))
+                exit_str = match.group(2).strip()
+                monsters = objects = ''
+                desc_lines = []
+                special_lines = []
+                desc_started = False
+                state = 'monsters'
+                continue
 
-def create_room_record(room_num, room_data):
-    """
-    Create a 512-byte room record for ADVENT.DTA.
-
-    Layout:
-    - Byte 0: Room number low byte
-    - Bytes 1-16: Exits (4 bytes each: dir, room_lo, room_hi, pad)
-    - Bytes 17-99: Monsters (83 bytes)
-    - Bytes 100-199: Objects (100 bytes)
-    - Bytes 200-511: Description (312 bytes)
+            if state != 'description':
+                continue
+
+            # Special codes start with / and can span multiple lines.
+            # Everything from the FIRST line that starts with / onwards is
+            # special codes (leading whitespace of the description is
+            # ignored when looking for it).
+            if special_lines:
+                special_lines.append(line)
+            elif line.startswith('/'):
+                special_lines.append(line)
+            elif not desc_started and line.lstrip().startswith('/'):
+                special_lines.append(line.lstrip())
+            else:
+                desc_lines.append(line)
+                desc_started = desc_started or bool(line.strip())
+
+    if room_num is not None:
+        yield finish()
+
+
+def parse_roomfil(filepath):
+    """Parse roomfil.fil and return dictionary of room data."""
+    return dict(iter_roomfil(filepath))
+
+
+def fill_room_record(room, room_data):
     """
-    record = bytearray(512)
+    Fill a room record in place.
+
+    Args:
+        room: advent_data.RoomRecord over a zeroed 512-byte buffer
+        room_data: Parsed room from parse_roomfil()
 
+    See advent_data.layout for the record layout.
+    """
     # Byte 0: Room number verification
     # ADVNOR.SUB (navigation) checks: CHR$(ROOM%(USER%))=ROOM$ so validation byte = room_num & 0xFF
     # Note: ADVENT.B2S uses room_num-1, but ADVNOR.SUB (and ADVTDY.SUB) use room_num
     # We prioritize navigation working over avoiding cosmetic errors in main loop
-    record[0] = room_num & 0xFF
+    room.set_validation()
 
-    # Bytes 1-16: Exits
-    exits = create_binary_exits(room_data.get('exits', {}))
-    record[1:17] = exits
+    # Bytes 1-16: Exits (room numbers big-endian for CVT$%)
+    room.set_exits(room_data.get('exits', {}))
 
     # Bytes 17-99: Monsters (83 bytes)
     # Monster entries require trailing '/' for display code to iterate
@@ -206,59 +183,66 @@ def create_room_record(room_num, room_data):
     monsters = room_data.get('monsters', '')
     if monsters and not monsters.endswith('/'):
         monsters = monsters + '/'
-    monsters = monsters[:83]
-    monsters_bytes = monsters.encode('ascii', errors='replace')
-    record[17:17+len(monsters_bytes)] = monsters_bytes
+    room.set_people(monsters)
 
     # Bytes 100-199: Objects (100 bytes)
-    objects = room_data.get('objects', '')[:100]
-    objects_bytes = objects.encode('ascii', errors='replace')
-    record[100:100+len(objects_bytes)] = objects_bytes
+    room.set_objects(room_data.get('objects', ''))
 
     # Bytes 200-511: Description (312 bytes)
     # Description followed by $ terminator and special codes
     # Game uses: DES$=LEFT(DES$,INSTR(1%,DES$,"$")-1%) to truncate at $
-    desc = room_data.get('description', '')
-    special = room_data.get('special', '')
-    if special:
-        desc = desc + '$' + special
-    else:
-        desc = desc + '$'  # Always add terminator
-    desc = desc[:312]
-    desc_bytes = desc.encode('ascii', errors='replace')
-    record[200:200+len(desc_bytes)] = desc_bytes
+    room.set_description(room_data.get('description', ''),
+                         room_data.get('special', ''))
 
+
+def create_room_record(room_num, room_data):
+    """Create a standalone 512-byte room record for ADVENT.DTA."""
+    record = bytearray(ROOM_RECORD_SIZE)
+    fill_room_record(RoomRecord(room_num, record), room_data)
     return bytes(record)
 
 
-def generate_advent_dta(rooms, output_path):
-    """Generate ADVENT.DTA file with 2000 room records.
+def build_advent_dta(rooms, record_count=ROOM_RECORD_COUNT):
+    """Build the complete ADVENT.DTA image in one preallocated buffer.
 
     IMPORTANT: BASIC-PLUS-2 uses 1-based record indexing:
     - GET #3%, RECORD 1 reads file offset 0
     - GET #3%, RECORD N reads file offset (N-1)*512
 
-    So room N must be written at file index N-1.
+    So room N lives at file index N-1. The buffer starts zeroed, so empty
+    records cost nothing; only populated rooms are visited, each filled
+    in place through a memoryview slice.
+    """
+    image = bytearray(record_count * ROOM_RECORD_SIZE)
+    view = memoryview(image)
+
+    for room_num, room_data in rooms.items():
+        if 1 <= room_num <= record_count:
+            offset = (room_num - 1) * ROOM_RECORD_SIZE
+            record = view[offset:offset + ROOM_RECORD_SIZE]
+            fill_room_record(RoomRecord(room_num, record), room_data)
+
+    view.release()
+    return image
+
+
+def generate_advent_dta(rooms, output_path, record_count=ROOM_RECORD_COUNT):
+    """Generate ADVENT.DTA file with `record_count` room records.
+
+    Room numbers are 16-bit in the exit block, so record_count can be
+    raised up to 65535 for larger dungeons.
     """
     print(f"Generating ADVENT.DTA...")
 
-    record_count = 2000
-    record_size = 512
+    if not 1 <= record_count <= MAX_ROOM_NUMBER:
+        raise ValueError(f"record count must be 1-{MAX_ROOM_NUMBER}")
 
+    image = build_advent_dta(rooms, record_count)
     with open(output_path, 'wb') as f:
-        # Write records 1 through record_count (1-based room numbers)
-        # File index 0 = BASIC's RECORD 1 = room 1
-        # File index N-1 = BASIC's RECORD N = room N
-        for room_num in range(1, record_count + 1):
-            if room_num in rooms:
-                record = create_room_record(room_num, rooms[room_num])
-            else:
-                # Empty room record
-                record = bytes(512)
-            f.write(record)
+        f.write(image)
 
     file_size = os.path.getsize(output_path)
-    populated = len([r for r in rooms.keys() if 1 <= r <= record_count])
+    populated = sum(1 for r in rooms if 1 <= r <= record_count)
     print(f"  Created ADVENT.DTA: {file_size:,} bytes")
     print(f"  Populated {populated} rooms out of {record_count}")
 
@@ -306,53 +290,18 @@ def parse_refrsh_ctl(filepath):
     return monsters
 
 
-def create_monster_record(attack, defense, hp, damage, special, xp, flag):
-    """
-    Create a 20-byte monster record for ADVENT.MON.
-
-    Layout:
-    - Bytes 0-1: Attack level (16-bit)
-    - Bytes 2-3: Defense level (16-bit)
-    - Bytes 4-5: Hit points (16-bit)
-    - Bytes 6-7: Damage (16-bit)
-    - Bytes 8-13: Special abilities string (6 bytes)
-    - Bytes 14-15: Experience points (16-bit)
-    - Bytes 16-17: Flags (16-bit)
-    - Bytes 18-19: Padding (16-bit)
-    """
-    # Ensure special is exactly 6 bytes
-    special_bytes = special.encode('ascii', errors='replace')[:6].ljust(6, b'\x00')
-
-    record = (
-        struct.pack('<h', attack) +
-        struct.pack('<h', defense) +
-        struct.pack('<h', hp) +
-        struct.pack('<h', damage) +
-        special_bytes +
-        struct.pack('<h', xp) +
-        struct.pack('<h', flag) +
-        struct.pack('<h', 0)  # padding
-    )
-
-    return record
-
+def build_monster_records(monsters, record_count=MONSTER_RECORD_COUNT):
+    """Pack monsters into {slot: record}; slot N is room N.
 
-def generate_advent_mon(monsters, output_path):
-    """Generate ADVENT.MON file with monster spawn data."""
-    print(f"Generating ADVENT.MON...")
-
-    record_count = 10000
-    record_size = 20
-
-    # Initialize all records as empty
-    records = [b'\x00' * record_size] * record_count
-
-    # Place monsters at their room indices
+    Returns (records, monster_count). A later monster for the same room
+    replaces an earlier one, as in the original table.
+    """
+    records = {}
     monster_count = 0
     for mon in monsters:
         room = mon['room']
         if 0 <= room < record_count:
-            records[room] = create_monster_record(
+            records[room] = pack_monster(
                 mon['attack'],
                 mon['defense'],
                 mon['hp'],
@@ -362,11 +311,22 @@ def generate_advent_mon(monsters, output_path):
                 mon['flag']
             )
             monster_count += 1
+    return records, monster_count
 
-    # Write file
-    with open(output_path, 'wb') as f:
-        for record in records:
-            f.write(record)
+
+def generate_advent_mon(monsters, output_path):
+    """Generate ADVENT.MON file with monster spawn data.
+
+    Only the populated slots are written; the rest of the file is left as
+    holes, which read back as empty (all-zero) records.
+    """
+    print(f"Generating ADVENT.MON...")
+
+    record_count = MONSTER_RECORD_COUNT
+
+    # Place monsters at their room indices
+    records, monster_count = build_monster_records(monsters, record_count)
+    write_monster_file(output_path, records, record_count)
 
     file_size = os.path.getsize(output_path)
     print(f"  Created ADVENT.MON: {file_size:,} bytes")
@@ -378,8 +338,8 @@ def generate_advent_chr(output_path):
     print(f"Generating ADVENT.CHR...")
 
     # 100 records x 512 bytes
-    record_count = 100
-    record_size = 512
+    record_count = CHARACTER_RECORD_COUNT
+    record_size = CHARACTER_RECORD_SIZE
 
     with open(output_path, 'wb') as f:
         f.write(b'\x00' * (record_count * record_size))
@@ -398,19 +358,17 @@ def generate_board_ntc(output_path):
     print(f"Copying original BOARD.NTC with 1986-87 data...")
 
     # Look for original BOARD.NTC in tape directory
-    script_dir = Path(__file__).parent.parent
-    original_path = script_dir / "tape" / "BOARD.NTC"
+    original_path = BOARD_SOURCE
 
     if original_path.exists():
-        import shutil
         shutil.copy(original_path, output_path)
         file_size = os.path.getsize(output_path)
         print(f"  Copied original BOARD.NTC: {file_size:,} bytes")
     else:
         # Fallback: generate empty file if original not found
         print(f"  WARNING: Original tape/BOARD.NTC not found, generating empty file")
-        record_count = 512
-        record_size = 512
+        record_count = BOARD_RECORD_COUNT
+        record_size = BOARD_ENTRY_SIZE
         with open(output_path, 'wb') as f:
             f.write(b'\x00' * (record_count * record_size))
         file_size = os.path.getsize(output_path)
@@ -422,8 +380,8 @@ def generate_messag_npc(output_path):
     print(f"Generating MESSAG.NPC...")
 
     # 1000 records x 60 bytes
-    record_count = 1000
-    record_size = 60
+    record_count = MESSAGE_RECORD_COUNT
+    record_size = MESSAGE_RECORD_SIZE
 
     with open(output_path, 'wb') as f:
         f.write(b'\x00' * (record_count * record_size))
@@ -432,6 +390,286 @@ def generate_messag_npc(output_path):
     print(f"  Created MESSAG.NPC: {file_size:,} bytes")
 
 
+def file_digest(path):
+    """SHA-256 of a file, or None if it does not exist."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def record_digest(record):
+    """Short hash of one generated record."""
+    return hashlib.blake2b(record, digest_size=8).hexdigest()
+
+
+def generator_digest():
+    """Hash of this script and advent_data, so layout changes force a rebuild."""
+    h = hashlib.sha256()
+    sources = [Path(__file__)] + sorted((SCRIPT_DIR / "advent_data").glob("*.py"))
+    for source in sources:
+        h.update(source.read_bytes())
+    return h.hexdigest()
+
+
+def load_manifest(path):
+    """Load the build manifest from the previous incremental run."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def has_size(path, size):
+    return path.exists() and path.stat().st_size == size
+
+
+def rewrite_records(records_file, previous, records, blank):
+    """Write the records whose hash differs from `previous`.
+
+    Args:
+        records_file: Writable RoomFile or MonsterFile
+        previous: {str(number): digest} from the last manifest
+        records: {number: bytes} as generated now
+        blank: Record written where a number has disappeared
+
+    Returns (hashes, changed_numbers).
+    """
+    hashes = {str(num): record_digest(rec) for num, rec in records.items()}
+    changed = sorted(
+        {num for num in records if hashes[str(num)] != previous.get(str(num))} |
+        {int(num) for num in previous if num not in hashes})
+    for num in changed:
+        records_file.record(num)[:] = records.get(num, blank)
+    return hashes, changed
+
+
+def update_advent_dta(rooms, output_path, previous, record_count=ROOM_RECORD_COUNT):
+    """Update ADVENT.DTA in place, rewriting only rooms whose source changed.
+
+    Falls back to a full build if the file is missing or the wrong size.
+    Returns (room_hashes, changed_rooms).
+    """
+    records = {num: create_room_record(num, data)
+               for num, data in rooms.items() if 1 <= num <= record_count}
+
+    if not previous or not has_size(output_path, record_count * ROOM_RECORD_SIZE):
+        generate_advent_dta(rooms, output_path, record_count)
+        hashes = {str(num): record_digest(rec) for num, rec in records.items()}
+        return hashes, sorted(records)
+
+    print(f"Updating ADVENT.DTA...")
+    with RoomFile(output_path, writable=True) as dta:
+        hashes, changed = rewrite_records(dta, previous, records,
+                                          bytes(ROOM_RECORD_SIZE))
+    print(f"  Rewrote {len(changed)} of {len(records)} rooms")
+    return hashes, changed
+
+
+def update_advent_mon(monsters, output_path, previous):
+    """Update ADVENT.MON in place, rewriting only changed monster slots.
+
+    Returns (slot_hashes, changed_slots).
+    """
+    records, _ = build_monster_records(monsters)
+
+    if not previous or not has_size(output_path,
+                                    MONSTER_RECORD_COUNT * MONSTER_RECORD_SIZE):
+        generate_advent_mon(monsters, output_path)
+        hashes = {str(slot): record_digest(rec) for slot, rec in records.items()}
+        return hashes, sorted(records)
+
+    print(f"Updating ADVENT.MON...")
+    with MonsterFile(output_path, writable=True) as mon:
+        hashes, changed = rewrite_records(mon, previous, records,
+                                          bytes(MONSTER_RECORD_SIZE))
+    print(f"  Rewrote {len(changed)} of {len(records)} monster slots")
+    return hashes, changed
+
+
+def incremental_build(data_dir, output_dir, room_count, jobs=1):
+    """Regenerate only what changed since the last incremental run.
+
+    Inputs and every generated room/monster record are hashed into
+    MANIFEST_NAME in the output directory. Output files whose inputs are
+    unchanged are skipped; ADVENT.DTA and ADVENT.MON are updated record
+    by record. CHANGES_NAME lists what was rewritten so later steps
+    (room reconstruction / map JSON, tape building) can decide whether
+    they need to run.
+
+    reconstruct_rooms.py rewrites exits in ADVENT.DTA itself, so the room
+    records are kept up to date in DTA_BASE_NAME instead, and ADVENT.DTA
+    is replaced by a fresh copy of it whenever it changes, ready to be
+    reconstructed again as a whole.
+    """
+    manifest_path = output_dir / MANIFEST_NAME
+    manifest = load_manifest(manifest_path)
+    old_inputs = manifest.get('inputs', {})
+
+    roomfil_path = data_dir / "roomfil.fil"
+    refrsh_path = data_dir / "REFRSH.CTL"
+    inputs = {
+        'generator': generator_digest(),
+        'roomfil.fil': file_digest(roomfil_path),
+        'REFRSH.CTL': file_digest(refrsh_path),
+        'BOARD.NTC': file_digest(BOARD_SOURCE),
+        'room_count': room_count,
+    }
+
+    def unchanged(*names):
+        return all(inputs[name] == old_inputs.get(name) for name in names)
+
+    changes = {'files': [], 'rooms': [], 'monsters': []}
+
+    dta_path = output_dir / "ADVENT.DTA"
+    base_path = output_dir / DTA_BASE_NAME
+    mon_path = output_dir / "ADVENT.MON"
+    rebuild_dta = not (unchanged('generator', 'roomfil.fil', 'room_count') and
+                       has_size(base_path, room_count * ROOM_RECORD_SIZE))
+    rebuild_mon = not (unchanged('generator', 'REFRSH.CTL') and
+                       has_size(mon_path, MONSTER_RECORD_COUNT * MONSTER_RECORD_SIZE))
+
+    rooms, monsters = parse_sources(roomfil_path if rebuild_dta else None,
+                                    refrsh_path if rebuild_mon else None, jobs)
+
+    # ADVENT.DTA
+    if not rebuild_dta:
+        print("ADVENT.DTA: inputs unchanged, skipping")
+    else:
+        manifest['rooms'], changes['rooms'] = update_advent_dta(
+            rooms, base_path, manifest.get('rooms', {}), room_count)
+    if changes['rooms'] or not has_size(dta_path, room_count * ROOM_RECORD_SIZE):
+        # Unreconstructed copy; reconstruct_rooms.py runs on all of it
+        shutil.copyfile(base_path, dta_path)
+        changes['files'].append("ADVENT.DTA")
+
+    # ADVENT.MON
+    if not rebuild_mon:
+        print("ADVENT.MON: inputs unchanged, skipping")
+    else:
+        manifest['monsters'], changes['monsters'] = update_advent_mon(
+            monsters, mon_path, manifest.get('monsters', {}))
+        if changes['monsters']:
+            changes['files'].append("ADVENT.MON")
+
+    # BOARD.NTC is a copy of the original. Without the original here (as
+    # in the Docker image) an existing board is kept, never replaced by
+    # the empty fallback.
+    board_path = output_dir / "BOARD.NTC"
+    if inputs['BOARD.NTC'] is None and board_path.exists():
+        print("BOARD.NTC: no original to copy, keeping existing file")
+    elif unchanged('BOARD.NTC') and board_path.exists():
+        print("BOARD.NTC: original unchanged, skipping")
+    else:
+        generate_board_ntc(board_path)
+        changes['files'].append("BOARD.NTC")
+
+    # ADVENT.CHR and MESSAG.NPC are empty; only create them if missing
+    for name, size, generate in (
+            ("ADVENT.CHR", CHARACTER_RECORD_COUNT * CHARACTER_RECORD_SIZE,
+             generate_advent_chr),
+            ("MESSAG.NPC", MESSAGE_RECORD_COUNT * MESSAGE_RECORD_SIZE,
+             generate_messag_npc)):
+        path = output_dir / name
+        if has_size(path, size):
+            print(f"{name}: present, skipping")
+        else:
+            generate(path)
+            changes['files'].append(name)
+
+    # Downstream hints
+    changes['reconnect'] = "ADVENT.DTA" in changes['files']
+    changes['tape'] = any(name in changes['files'] for name in TAPE_FILES)
+
+    manifest['inputs'] = inputs
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f)
+    with open(output_dir / CHANGES_NAME, 'w') as f:
+        json.dump(changes, f, indent=2)
+
+    print()
+    if changes['files']:
+        print(f"Changed files: {', '.join(changes['files'])}")
+    else:
+        print("No changes")
+    print(f"Change list written to {output_dir / CHANGES_NAME}")
+    return changes
+
+
+def load_room_source(roomfil_path):
+    """Parse roomfil.fil if present."""
+    if roomfil_path.exists():
+        print(f"Parsing {roomfil_path}...")
+        rooms = parse_roomfil(roomfil_path)
+        print(f"  Found {len(rooms)} rooms")
+    else:
+        print(f"Warning: {roomfil_path} not found!")
+        rooms = {}
+    return rooms
+
+
+def load_monster_source(refrsh_path):
+    """Parse REFRSH.CTL if present."""
+    if refrsh_path.exists():
+        print(f"Parsing {refrsh_path}...")
+        monsters = parse_refrsh_ctl(refrsh_path)
+        print(f"  Found {len(monsters)} monsters")
+    else:
+        print(f"Warning: {refrsh_path} not found!")
+        monsters = []
+    return monsters
+
+
+def parse_sources(roomfil_path, refrsh_path, jobs=1):
+    """Parse roomfil.fil and REFRSH.CTL, concurrently if jobs > 1.
+
+    Either path may be None to skip that input. Returns (rooms, monsters).
+    """
+    if jobs > 1 and roomfil_path and refrsh_path:
+        with ProcessPoolExecutor(2) as pool:
+            room_future = pool.submit(_captured, load_room_source, roomfil_path)
+            monster_future = pool.submit(_captured, load_monster_source, refrsh_path)
+            return _print_captured(room_future), _print_captured(monster_future)
+
+    rooms = load_room_source(roomfil_path) if roomfil_path else {}
+    monsters = load_monster_source(refrsh_path) if refrsh_path else []
+    return rooms, monsters
+
+
+def generation_tasks(rooms, monsters, output_dir, room_count):
+    """(function, args) for each output file, in serial order.
+
+    The tasks write separate files and share no state, so they can run
+    in any order or in parallel.
+    """
+    return [
+        (generate_advent_dta, (rooms, output_dir / "ADVENT.DTA", room_count)),
+        (generate_advent_mon, (monsters, output_dir / "ADVENT.MON")),
+        (generate_advent_chr, (output_dir / "ADVENT.CHR",)),
+        (generate_board_ntc, (output_dir / "BOARD.NTC",)),
+        (generate_messag_npc, (output_dir / "MESSAG.NPC",)),
+    ]
+
+
+def _captured(func, *args):
+    """Run func in a worker process, returning (result, printed output)."""
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        result = func(*args)
+    return result, out.getvalue()
+
+
+def _print_captured(future):
+    result, output = future.result()
+    print(output, end='')
+    return result
+
+
 def main():
     import argparse
 
@@ -440,6 +678,15 @@ def main():
                         help='Directory containing salvaged data files')
     parser.add_argument('--output-dir', type=Path, default=OUTPUT_DIR,
                         help='Directory for output files')
+    parser.add_argument('--room-count', type=int, default=ROOM_RECORD_COUNT,
+                        help=f'Number of ADVENT.DTA records (default: {ROOM_RECORD_COUNT}, '
+                             f'max: {MAX_ROOM_NUMBER})')
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help='Worker processes for parsing inputs and generating '
+                             'files (default: 1)')
+    parser.add_argument('--incremental', action='store_true',
+                        help=f'Only regenerate what changed since the last run '
+                             f'(uses {MANIFEST_NAME}, writes {CHANGES_NAME})')
     args = parser.parse_args()
 
     data_dir = args.data_dir
@@ -455,34 +702,31 @@ def main():
     # Create output directory
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    # Parse room data
-    roomfil_path = data_dir / "roomfil.fil"
-    if roomfil_path.exists():
-        print(f"Parsing {roomfil_path}...")
-        rooms = parse_roomfil(roomfil_path)
-        print(f"  Found {len(rooms)} rooms")
-    else:
-        print(f"Warning: {roomfil_path} not found!")
-        rooms = {}
+    if args.incremental:
+        incremental_build(data_dir, output_dir, args.room_count, args.jobs)
+        return 0
 
-    # Parse monster data
+    roomfil_path = data_dir / "roomfil.fil"
     refrsh_path = data_dir / "REFRSH.CTL"
-    if refrsh_path.exists():
-        print(f"Parsing {refrsh_path}...")
-        monsters = parse_refrsh_ctl(refrsh_path)
-        print(f"  Found {len(monsters)} monsters")
-    else:
-        print(f"Warning: {refrsh_path} not found!")
-        monsters = []
 
+    if args.jobs > 1:
+        print(f"Using {args.jobs} worker processes")
+
+    rooms, monsters = parse_sources(roomfil_path, refrsh_path, args.jobs)
     print()
 
     # Generate all data files
-    generate_advent_dta(rooms, output_dir / "ADVENT.DTA")
-    generate_advent_mon(monsters, output_dir / "ADVENT.MON")
-    generate_advent_chr(output_dir / "ADVENT.CHR")
-    generate_board_ntc(output_dir / "BOARD.NTC")
-    generate_messag_npc(output_dir / "MESSAG.NPC")
+    tasks = generation_tasks(rooms, monsters, output_dir, args.room_count)
+    if args.jobs > 1:
+        # The files are independent; logs are printed in the serial order
+        with ProcessPoolExecutor(args.jobs) as pool:
+            futures = [pool.submit(_captured, generate, *gen_args)
+                       for generate, gen_args in tasks]
+            for future in futures:
+                _print_captured(future)
+    else:
+        for generate, gen_args in tasks:
+            generate(*gen_args)
 
     print()
     print("=" * 60)
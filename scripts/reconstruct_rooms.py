@@ -14,59 +14,28 @@ Reconstructed exits are tracked separately from original data.
 
 import sys
 import json
-import struct
+import shutil
 from pathlib import Path
-from collections import defaultdict
-from copy import deepcopy
+from bisect import bisect_left
+from collections import defaultdict, deque
 
-RECORD_SIZE = 512
-DIRECTIONS = ['N', 'E', 'S', 'W']
-OPPOSITE = {'N': 'S', 'E': 'W', 'S': 'N', 'W': 'E'}
-DIR_OFFSETS = {'N': 1, 'E': 5, 'S': 9, 'W': 13}  # Byte offset within record
-DIR_NAMES = {'N': 'North', 'E': 'East', 'S': 'South', 'W': 'West'}
+from advent_data import (DIRECTIONS, OPPOSITE, RoomFile, RoomGraph, RouteIndex,
+                         place_rooms, tile_index, write_map)
 
 
 class RoomData:
-    """Raw room data with modification tracking"""
-
-    def __init__(self, number, raw_bytes):
-        self.number = number
-        self.raw = bytearray(raw_bytes)
-        # Validation byte: ADVNOR.SUB checks CHR$(ROOM%(USER%))=ROOM$
-        # So validation byte = room_num & 0xFF
-        # (Note: ADVENT.B2S uses room_num-1, but ADVNOR handles navigation)
-        expected_validation = number & 0xFF
-        self.valid = (raw_bytes[0] == expected_validation) if number > 0 else False
-        self.original_exits = {}
-        self.reconstructed_exits = {}
+    """Room record with modification tracking
 
-        if self.valid:
-            self._parse_exits()
-            self._parse_description()
-
-    def _parse_exits(self):
-        """Parse existing exits from raw data"""
-        for direction in DIRECTIONS:
-            offset = DIR_OFFSETS[direction]
-            dir_char = chr(self.raw[offset]) if self.raw[offset] else ''
-            # 16-bit big-endian destination (for CVT$% compatibility)
-            dest = (self.raw[offset + 1] << 8) + self.raw[offset + 2]
-
-            if dir_char == direction:
-                self.original_exits[direction] = dest  # 0 = exit dungeon, >0 = room number
-
-    def _parse_description(self):
-        """Extract room description"""
-        desc_bytes = self.raw[200:512]
-        desc = ""
-        for b in desc_bytes:
-            if b == ord('$') or b == 0:
-                break
-            if 32 <= b < 127:
-                desc += chr(b)
-            elif b == 10 or b == 13:
-                desc += ' '
-        self.description = ' '.join(desc.split())  # Normalize whitespace
+    Wraps an advent_data.RoomRecord; reconstructed exits are written
+    straight into the underlying (memory-mapped) record.
+    """
+
+    def __init__(self, record):
+        self.number = record.number
+        self.record = record
+        self.original_exits = record.exits
+        self.reconstructed_exits = {}
+        self.description = ' '.join(record.description.split())  # Normalize whitespace
 
     def get_all_exits(self):
         """Get combined original + reconstructed exits"""
@@ -109,80 +78,91 @@ class RoomData:
                 return False
 
         self.reconstructed_exits[direction] = destination
-        # Write to raw bytes as 16-bit big-endian (for CVT$% compatibility)
-        offset = DIR_OFFSETS[direction]
-        self.raw[offset] = ord(direction)
-        self.raw[offset + 1] = (destination >> 8) & 0xFF   # High byte (for CVT$%)
-        self.raw[offset + 2] = destination & 0xFF          # Low byte
-        self.raw[offset + 3] = 0  # Padding byte
+        self.record.set_exit(direction, destination)
         return True
 
-    def get_bytes(self):
-        """Return modified raw bytes"""
-        return bytes(self.raw)
-
 
-def load_rooms(filepath):
-    """Load all rooms from ADVENT.DTA"""
-    rooms = {}
-    with open(filepath, 'rb') as f:
-        data = f.read()
+def load_rooms(filepath, writable=False):
+    """Load all rooms from ADVENT.DTA
 
-    num_records = len(data) // RECORD_SIZE
+    The file is memory-mapped: shared if `writable`, so that added exits
+    land directly in the file, otherwise copy-on-write so changes stay
+    in memory (dry run).
+    """
+    dta = RoomFile(filepath, writable=writable, copy_on_write=not writable)
+    rooms = {num: RoomData(record) for num, record in dta.rooms().items()}
+    return rooms, dta
 
-    for i in range(num_records):
-        offset = i * RECORD_SIZE
-        record = data[offset:offset + RECORD_SIZE]
-        room_number = i + 1
-        room = RoomData(room_number, record)
-        if room.valid:
-            rooms[room_number] = room
 
-    return rooms, data
+def build_graph(rooms):
+    """Snapshot the current (original + reconstructed) exits as a RoomGraph"""
+    return RoomGraph({num: room.get_useful_exits() for num, room in rooms.items()})
 
 
 def find_reachable(rooms, start=2):
     """Find all rooms reachable from start"""
-    reachable = set()
-    to_visit = [start]
-
-    while to_visit:
-        current = to_visit.pop(0)
-        if current in reachable or current not in rooms:
-            continue
-        reachable.add(current)
-
-        for dest in rooms[current].get_useful_exits().values():
-            if dest not in reachable:
-                to_visit.append(dest)
-
-    return reachable
+    return build_graph(rooms).reachable(start)
 
 
 def find_clusters(rooms):
     """Find all disconnected clusters of rooms"""
-    unvisited = set(rooms.keys())
-    clusters = []
+    return build_graph(rooms).connected_components()
 
-    while unvisited:
-        start = min(unvisited)
-        cluster = set()
-        to_visit = [start]
 
-        while to_visit:
-            current = to_visit.pop(0)
-            if current in cluster or current not in rooms:
-                continue
-            cluster.add(current)
-            unvisited.discard(current)
+class FreeExitIndex:
+    """Reachable rooms with a free exit, bucketed by direction
 
-            for dest in rooms[current].get_useful_exits().values():
-                if dest not in cluster and dest in unvisited:
-                    to_visit.append(dest)
-
-        clusters.append(sorted(cluster))
+    Each bucket is a sorted list of room numbers, so the numerically
+    closest candidate for a new connection is a binary search away.
+    """
 
-    return clusters
+    def __init__(self):
+        self.buckets = {d: [] for d in DIRECTIONS}
+
+    def add(self, room):
+        for d in room.get_free_directions():
+            bucket = self.buckets[d]
+            i = bisect_left(bucket, room.number)
+            if i == len(bucket) or bucket[i] != room.number:
+                bucket.insert(i, room.number)
+
+    def discard(self, room, direction):
+        bucket = self.buckets[direction]
+        i = bisect_left(bucket, room.number)
+        if i < len(bucket) and bucket[i] == room.number:
+            del bucket[i]
+
+    def nearest(self, direction, number):
+        """Room closest to `number` with `direction` free, or None"""
+        bucket = self.buckets[direction]
+        i = bisect_left(bucket, number)
+        best = None
+        for j in (i - 1, i):
+            if 0 <= j < len(bucket):
+                if best is None or abs(bucket[j] - number) < abs(best - number):
+                    best = bucket[j]
+        return best
+
+
+def extend_reachable(rooms, reachable, start):
+    """Add `start` and everything reachable from it to `reachable`
+
+    Returns the newly reachable rooms. Rooms already in `reachable` are
+    not revisited, so repeated calls cost O(V+E) in total.
+    """
+    if start in reachable:
+        return []
+    reachable.add(start)
+    added = [start]
+    queue = deque([start])
+    while queue:
+        current = queue.popleft()
+        for dest in rooms[current].get_useful_exits().values():
+            if dest in rooms and dest not in reachable:
+                reachable.add(dest)
+                added.append(dest)
+                queue.append(dest)
+    return added
 
 
 def reconstruct_exits(rooms):
@@ -191,8 +171,17 @@ def reconstruct_exits(rooms):
 
     Strategy:
     1. Add return paths for one-way connections
-    2. Build chains connecting isolated rooms to the main cluster
+    2. Link each room that is still unreachable to the numerically
+       closest reachable room with a compatible free exit. Everything the
+       linked room leads to becomes reachable too, so each cluster is
+       joined once rather than room by room.
     3. Use force=True to override exits that go to room 0 (dungeon exit)
+
+    The set of rooms reachable from room 2 is found once, after step 1,
+    and then kept exact as step 2 adds exits (each one leaves a reachable
+    room or returns to one), so no further traversal is needed.
+
+    Returns (changes, reachable).
     """
     changes = []
 
@@ -218,112 +207,108 @@ def reconstruct_exits(rooms):
                         })
                         print(f"  Room {dest}: Added {opposite} exit to room {num}")
 
-    # Step 2: Iteratively connect isolated rooms
+    # Step 2: Connect isolated rooms to the main dungeon
     print("\nStep 2: Building connected dungeon...")
 
-    # Track what's reachable and what's not
     reachable = find_reachable(rooms, 2)
-    all_rooms = set(rooms.keys())
-    unreachable = sorted(all_rooms - reachable)
-
     print(f"  Initially reachable: {len(reachable)}")
-    print(f"  Unreachable: {len(unreachable)}")
-
-    # Build a list of rooms we can connect from (start with reachable rooms)
-    frontier = list(reachable)
-    iterations = 0
-    max_iterations = len(rooms) + 10  # Safety limit
-
-    while unreachable and iterations < max_iterations:
-        iterations += 1
-        connected_this_round = False
-
-        # Try to connect unreachable rooms to the frontier
-        for target_num in list(unreachable):
-            target = rooms[target_num]
-            target_free = target.get_free_directions()
-
-            if not target_free:
-                # All directions occupied by room-0 exits, try forcing
-                for d in DIRECTIONS:
-                    if d not in target.reconstructed_exits:
-                        target_free.append(d)
-                        break
-
-            if not target_free:
-                continue
-
-            # Find a frontier room to connect to
-            for source_num in frontier:
-                source = rooms[source_num]
-                source_free = source.get_free_directions()
-
-                if not source_free:
-                    continue
-
-                # Find compatible directions
-                for src_dir in source_free:
-                    opposite = OPPOSITE[src_dir]
-                    if opposite in target_free or opposite not in target.get_useful_exits():
-                        # Create bidirectional connection
-                        if source.add_exit(src_dir, target_num, force=True):
-                            changes.append({
-                                'type': 'chain_connection',
-                                'room': source_num,
-                                'direction': src_dir,
-                                'destination': target_num,
-                                'reason': f'Connect room {target_num} to main dungeon'
-                            })
-
-                        if target.add_exit(opposite, source_num, force=True):
-                            changes.append({
-                                'type': 'chain_connection',
-                                'room': target_num,
-                                'direction': opposite,
-                                'destination': source_num,
-                                'reason': f'Return path to room {source_num}'
-                            })
-
-                        # Update tracking
-                        unreachable.remove(target_num)
-                        frontier.append(target_num)
-                        reachable.add(target_num)
-                        connected_this_round = True
-                        break
-
-                if target_num not in unreachable:
-                    break
-
-            if target_num not in unreachable:
-                continue
-
-        if not connected_this_round and unreachable:
-            # No progress made, try harder
-            print(f"  Iteration {iterations}: Stuck with {len(unreachable)} unreachable rooms")
-            break
-
-        if iterations % 50 == 0:
-            print(f"  Iteration {iterations}: {len(unreachable)} rooms remaining")
-
-    print(f"  Final: {len(reachable)} reachable, {len(unreachable)} unreachable")
+    print(f"  Unreachable: {len(rooms) - len(reachable)}")
+
+    index = FreeExitIndex()
+    for num in reachable:
+        index.add(rooms[num])
+
+    connections = 0
+    stuck = []
+    for target_num in sorted(rooms):
+        if target_num in reachable:
+            continue
+        target = rooms[target_num]
+
+        # Pick the numerically closest reachable room that has a free exit
+        # facing one of the target's free directions
+        best = None
+        for target_dir in target.get_free_directions():
+            src_dir = OPPOSITE[target_dir]
+            source_num = index.nearest(src_dir, target_num)
+            if source_num is not None and (
+                    best is None or abs(source_num - target_num) < abs(best[0] - target_num)):
+                best = (source_num, src_dir, target_dir)
+
+        if best is None:
+            # All the target's directions lead to rooms already; a one-way
+            # exit into it is the best we can do
+            for src_dir in DIRECTIONS:
+                source_num = index.nearest(src_dir, target_num)
+                if source_num is not None and (
+                        best is None or abs(source_num - target_num) < abs(best[0] - target_num)):
+                    best = (source_num, src_dir, None)
+
+        if best is None:
+            stuck.append(target_num)
+            continue
+
+        source_num, src_dir, target_dir = best
+        source = rooms[source_num]
+        connection = None
+        if source.add_exit(src_dir, target_num, force=True):
+            index.discard(source, src_dir)
+            connection = {
+                'type': 'chain_connection',
+                'room': source_num,
+                'direction': src_dir,
+                'destination': target_num,
+                'reason': f'Connect room {target_num} to main dungeon'
+            }
+            changes.append(connection)
+
+        if target_dir and target.add_exit(target_dir, source_num, force=True):
+            changes.append({
+                'type': 'chain_connection',
+                'room': target_num,
+                'direction': target_dir,
+                'destination': source_num,
+                'reason': f'Return path to room {source_num}'
+            })
+
+        # Everything the target leads to is now reachable as well
+        added = extend_reachable(rooms, reachable, target_num)
+        for num in added:
+            index.add(rooms[num])
+        if connection:
+            connection['newly_reachable'] = len(added)
+
+        connections += 1
+        if connections % 50 == 0:
+            print(f"  Connected {connections} rooms, "
+                  f"{len(rooms) - len(reachable)} remaining")
+
+    if stuck:
+        print(f"  Stuck with {len(stuck)} unreachable rooms (no free exits left)")
+
+    print(f"  Final: {len(reachable)} reachable, {len(rooms) - len(reachable)} unreachable")
 
     # Step 3: Final verification
     print("\nStep 3: Final verification...")
-    final_reachable = find_reachable(rooms, 2)
-    all_rooms = set(rooms.keys())
-    still_unreachable = all_rooms - final_reachable
+    still_unreachable = set(rooms) - reachable
 
-    print(f"  Reachable from room 2: {len(final_reachable)}")
+    print(f"  Reachable from room 2: {len(reachable)}")
     print(f"  Still unreachable: {len(still_unreachable)}")
 
     if still_unreachable:
         print(f"  Unreachable rooms: {sorted(still_unreachable)[:20]}...")
+    else:
+        print("  All rooms are reachable from room 2")
+
+    return changes, reachable
 
-    return changes
 
+def generate_map_json(rooms, changes, reachable):
+    """Generate JSON map data for web visualization
 
-def generate_map_json(rooms, changes):
-    """Generate JSON map data for web visualization"""
+    `reachable` is the set of rooms reachable from room 2, as returned by
+    reconstruct_exits().
+    """
 
     # Create change lookup
     change_lookup = defaultdict(list)
@@ -342,10 +327,13 @@ def generate_map_json(rooms, changes):
         'reconstruction_log': changes
     }
 
-    reachable = find_reachable(rooms, 2)
+    positions = place_rooms(
+        {num: room.get_all_exits() for num, room in rooms.items()}, 2)
+    map_data['layout'] = tile_index(positions)
 
     for num, room in rooms.items():
         all_exits = room.get_all_exits()
+        x, y = positions[num]
 
         map_data['rooms'][str(num)] = {
             'number': num,
@@ -353,7 +341,9 @@ def generate_map_json(rooms, changes):
             'original_exits': room.original_exits,
             'reconstructed_exits': room.reconstructed_exits,
             'all_exits': all_exits,
-            'reachable': num in reachable
+            'reachable': num in reachable,
+            'x': x,
+            'y': y
         }
 
         # Add connections
@@ -373,18 +363,6 @@ def generate_map_json(rooms, changes):
     return map_data
 
 
-def save_modified_data(rooms, original_data, output_path):
-    """Save modified ADVENT.DTA"""
-    data = bytearray(original_data)
-
-    for num, room in rooms.items():
-        offset = (num - 1) * RECORD_SIZE
-        data[offset:offset + RECORD_SIZE] = room.get_bytes()
-
-    with open(output_path, 'wb') as f:
-        f.write(data)
-
-
 def main():
     import argparse
     parser = argparse.ArgumentParser(description='Reconstruct missing room exits')
@@ -407,8 +385,14 @@ def main():
         print(f"Error: Cannot find {args.input}")
         sys.exit(1)
 
+    output_path = Path(args.output) if args.output else input_path
+    if not args.dry_run and output_path.resolve() != input_path.resolve():
+        # Exits are written in place, so work on a copy of the input
+        shutil.copyfile(input_path, output_path)
+
     print(f"Loading rooms from {input_path}")
-    rooms, original_data = load_rooms(input_path)
+    rooms, dta = load_rooms(input_path if args.dry_run else output_path,
+                            writable=not args.dry_run)
     print(f"Found {len(rooms)} valid rooms")
 
     # Check initial state
@@ -416,30 +400,31 @@ def main():
     print(f"Initially reachable from room 2: {len(initial_reachable)}")
 
     # Reconstruct exits
-    changes = reconstruct_exits(rooms)
+    changes, reachable = reconstruct_exits(rooms)
 
     print(f"\nTotal changes made: {len(changes)}")
 
     # Generate map JSON
-    map_data = generate_map_json(rooms, changes)
+    map_data = generate_map_json(rooms, changes, reachable)
 
     if args.dry_run:
         print("\n[DRY RUN - no files modified]")
         print(f"\nMap data preview:")
         print(json.dumps(map_data['metadata'], indent=2))
     else:
-        # Save modified data
-        output_path = Path(args.output) if args.output else input_path
+        # Exits were written through the mapping; flush them to disk
         print(f"\nSaving modified data to {output_path}")
-        save_modified_data(rooms, original_data, output_path)
+        dta.flush()
 
         # Save map JSON
         map_path = Path(args.map_json)
         map_path.parent.mkdir(parents=True, exist_ok=True)
         print(f"Saving map JSON to {map_path}")
-        with open(map_path, 'w') as f:
-            json.dump(map_data, f, indent=2)
+        routes = RouteIndex(build_graph(rooms))
+        for written in write_map(map_data, map_path, routes):
+            print(f"  Wrote {written}")
 
+    dta.close()
     print("\nDone!")
 
 